@@ -60,37 +60,29 @@ async def create_patients_in_cosmos():
     print("✅ Cosmos DB connection successful!")
     print(f"Database: {cosmos_manager.database.id if cosmos_manager.database else 'Not connected'}")
     
+    # Provision the database and containers (with their indexing policies) on first run
+    await cosmos_manager.ensure_containers()
+    
     successful_creates = 0
     failed_creates = 0
     
     for patient in TEST_PATIENTS:
-        try:
-            print(f"\n📝 Creating patient: {patient.get_full_name()}")
-            print(f"   Patient ID: {patient.id}")
-            print(f"   Doctor: {patient.primary_doctor}")
-            print(f"   Medications: {', '.join(patient.get_medication_names())}")
-            print(f"   Adherence State: {patient.adherence_state.value}")
-            
-            # Create patient record in Cosmos DB
-            result = await cosmos_manager.create_patient_record(patient)
-            
+        print(f"\n📝 Creating patient: {patient.get_full_name()}")
+        print(f"   Patient ID: {patient.id}")
+        print(f"   Doctor: {patient.primary_doctor}")
+        print(f"   Medications: {', '.join(patient.get_medication_names())}")
+        print(f"   Adherence State: {patient.adherence_state.value}")
+    
+    # Create or update all patient records in Cosmos DB concurrently
+    results = await cosmos_manager.bulk_upsert_patients([patient.to_dict() for patient in TEST_PATIENTS])
+    
+    for patient, result in zip(TEST_PATIENTS, results):
+        if isinstance(result, Exception):
+            print(f"❌ Failed to create patient {patient.get_full_name()}: {str(result)}")
+            failed_creates += 1
+        else:
             print(f"✅ Successfully created patient: {patient.get_full_name()}")
             successful_creates += 1
-            
-        except Exception as e:
-            if "already exists" in str(e):
-                print(f"⚠️  Patient {patient.get_full_name()} already exists - skipping")
-                # Try to update instead
-                try:
-                    await cosmos_manager.update_patient_record(patient)
-                    print(f"✅ Updated existing patient: {patient.get_full_name()}")
-                    successful_creates += 1
-                except Exception as update_e:
-                    print(f"❌ Failed to update patient {patient.get_full_name()}: {str(update_e)}")
-                    failed_creates += 1
-            else:
-                print(f"❌ Failed to create patient {patient.get_full_name()}: {str(e)}")
-                failed_creates += 1
     
     print(f"\n📊 Summary:")
     print(f"   ✅ Successful: {successful_creates}")
@@ -170,6 +162,8 @@ async def main():
         
     else:
         print(f"\n❌ Script failed - no patients were created")
+    
+    await cosmos_manager.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Shared HTTP helpers for the endpoint modules
+CORS preflight responses, request body/parameter parsing and JSON responses
+"""
+
+import azure.functions as func
+import orjson
+import types
+from typing import Mapping
+
+
+def preflight_response(cors_headers: Mapping[str, str]) -> func.HttpResponse:
+    """
+    Build the 204 CORS preflight response for a set of CORS headers, cached by the browser for a day
+    Built once per module: preflights never log, read config or touch Cosmos DB, and the
+    worker only reads the response
+    """
+    headers = types.MappingProxyType({**cors_headers, 'Access-Control-Max-Age': '86400'})
+    return func.HttpResponse(b"", status_code=204, headers=headers)
+
+
+def json_body(req: func.HttpRequest) -> dict:
+    """Parse a JSON object request body once with orjson; {} when it is absent or not an object"""
+    body = req.get_body()
+    if not body:
+        return {}
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def request_params(req: func.HttpRequest) -> dict:
+    """Merge the JSON body (POST only) and query string into one dict; non-empty query values win"""
+    params = json_body(req) if req.method == "POST" else {}
+    params.update((key, value) for key, value in req.params.items() if value)
+    return params
+
+
+def error_response(cors_headers: Mapping[str, str], error: str, status_code: int = 500, **fields) -> func.HttpResponse:
+    """JSON error response with the given CORS headers; extra fields are added to the body"""
+    return func.HttpResponse(
+        orjson.dumps({"error": error, **fields}),
+        status_code=status_code,
+        mimetype="application/json",
+        headers=cors_headers
+    )
+
+
+# Patient and appointment (Cosmos DB record) endpoints share their CORS policy, limits and responses
+RECORD_CORS_HEADERS = types.MappingProxyType({
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, If-Match'
+})
+RECORD_PREFLIGHT_RESPONSE = preflight_response(RECORD_CORS_HEADERS)
+COSMOS_NOT_CONFIGURED_BODY = orjson.dumps({"error": "Cosmos DB not configured. Please set COSMOS_CONNECTION_STRING."})
+
+# List page size: ?limit= defaults to DEFAULT_PAGE_SIZE and is clamped to MAX_PAGE_SIZE,
+# so one request holds at most that many records in memory however large the container grows
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Records are a few KB at most; anything far larger is refused before it is parsed
+MAX_REQUEST_BODY_BYTES = 64 * 1024
+PAYLOAD_TOO_LARGE_RESPONSE = func.HttpResponse(
+    orjson.dumps({"success": False, "error": f"Request body exceeds {MAX_REQUEST_BODY_BYTES} bytes"}),
+    status_code=413,
+    mimetype="application/json",
+    headers=RECORD_CORS_HEADERS
+)
+
+# A JSON array of records is created in bulk through transactional batches, so it may be as
+# large as one batch's 2 MB payload; the manager splits it into batches by count and size
+MAX_BULK_REQUEST_BODY_BYTES = 2 * 1024 * 1024
+BULK_PAYLOAD_TOO_LARGE_RESPONSE = func.HttpResponse(
+    orjson.dumps({"success": False, "error": f"Bulk request body exceeds {MAX_BULK_REQUEST_BODY_BYTES} bytes"}),
+    status_code=413,
+    mimetype="application/json",
+    headers=RECORD_CORS_HEADERS
+)
+
+
+def json_response(cors_headers: Mapping[str, str], data, status_code: int = 200) -> func.HttpResponse:
+    """Serialize data with orjson into a JSON response carrying the given CORS headers"""
+    return func.HttpResponse(
+        orjson.dumps(data),
+        status_code=status_code,
+        mimetype="application/json",
+        headers=cors_headers
+    )
+
+
+def requested_limit(req: func.HttpRequest) -> int:
+    """Page size from ?limit=, clamped to 1..MAX_PAGE_SIZE; DEFAULT_PAGE_SIZE when absent or not a number"""
+    try:
+        limit = int(req.params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def requested_fields(req: func.HttpRequest) -> list:
+    """Property names from a comma-separated ?fields= parameter; empty for whole documents"""
+    return [name.strip() for name in req.params.get('fields', '').split(',') if name.strip()]
@@ -5,41 +5,39 @@ Handles appointment data management with Azure Cosmos DB
 
 import azure.functions as func
 import logging
-import json
-import time
-from services.cosmos_manager import cosmos_manager
+import orjson
+from endpoints._http import (
+    RECORD_CORS_HEADERS, RECORD_PREFLIGHT_RESPONSE, COSMOS_NOT_CONFIGURED_BODY, MAX_REQUEST_BODY_BYTES,
+    PAYLOAD_TOO_LARGE_RESPONSE, MAX_BULK_REQUEST_BODY_BYTES, BULK_PAYLOAD_TOO_LARGE_RESPONSE,
+    json_response, requested_limit, requested_fields
+)
+from services.cosmos_manager import (
+    cosmos_manager, new_document_id, is_not_found_error, is_precondition_failed_error
+)
+
+
+_APPOINTMENT_ID_REQUIRED_BODY = orjson.dumps({"error": "Appointment ID is required"})
 
 
 def register_appointment_endpoints(app: func.FunctionApp):
     """Register appointment management endpoints with the Function App"""
 
     @app.route(route="appointments", methods=["GET", "POST", "OPTIONS"])
-    def manage_appointments(req: func.HttpRequest) -> func.HttpResponse:
+    async def manage_appointments(req: func.HttpRequest) -> func.HttpResponse:
         """Appointment management endpoint - GET: List appointments, POST: Create appointment"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return RECORD_PREFLIGHT_RESPONSE
         
-        logging.info(f'Appointment management: {req.method} request received')
+        logging.info('Appointment management: %s request received', req.method)
         
         # Check if Cosmos DB is configured
         if not cosmos_manager.is_connected():
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
             return func.HttpResponse(
-                json.dumps({"error": "Cosmos DB not configured. Please set COSMOS_CONNECTION_STRING."}),
+                COSMOS_NOT_CONFIGURED_BODY,
                 status_code=500,
                 mimetype="application/json",
-                headers=headers
+                headers=RECORD_CORS_HEADERS
             )
         
         try:
@@ -47,66 +45,89 @@ def register_appointment_endpoints(app: func.FunctionApp):
                 # List appointments
                 patient_id = req.params.get('patientId')
                 
+                continuation_token = None
+                
                 try:
+                    if req.params.get('countOnly') == 'true':
+                        # Only the total: Cosmos returns one number per partition instead of documents
+                        count = await cosmos_manager.count_appointments(patient_id)
+                        return json_response(RECORD_CORS_HEADERS, {"success": True, "count": count}, 200)
+                    
+                    limit = requested_limit(req)
                     if patient_id:
-                        # List appointments for specific patient
-                        query = "SELECT * FROM c WHERE c.patientId = @patientId ORDER BY c.appointmentDate ASC"
-                        parameters = [{"name": "@patientId", "value": patient_id}]
-                        items = list(cosmos_manager.appointments_container.query_items(
-                            query=query,
-                            parameters=parameters,
-                            partition_key=patient_id
-                        ))
+                        # List one page of appointments for specific patient
+                        items, continuation_token = await cosmos_manager.get_patient_appointments(
+                            patient_id, limit, req.params.get('continuationToken'), requested_fields(req)
+                        )
                         message = f"Retrieved {len(items)} appointments for patient {patient_id}"
                     else:
-                        # List all appointments
-                        query = "SELECT * FROM c ORDER BY c.appointmentDate ASC"
-                        items = list(cosmos_manager.appointments_container.query_items(
-                            query=query,
-                            enable_cross_partition_query=True
-                        ))
+                        # List one page of all appointments
+                        items, continuation_token = await cosmos_manager.list_appointments_page(
+                            limit, req.params.get('continuationToken'), requested_fields(req)
+                        )
                         message = f"Retrieved {len(items)} appointments"
                     
                     response_data = {
                         "success": True,
                         "appointments": items,
                         "count": len(items),
+                        "continuationToken": continuation_token,
                         "message": message
                     }
                     
                 except Exception as e:
-                    logging.error(f"Error listing appointments: {str(e)}")
+                    logging.exception("Error listing appointments")
                     response_data = {
                         "success": False,
                         "error": f"Failed to list appointments: {str(e)}"
                     }
                     
             elif req.method == "POST":
+                body = req.get_body()
+                if len(body) > MAX_REQUEST_BODY_BYTES:
+                    # Only an array of appointments (bulk creation) may be larger
+                    if body.lstrip()[:1] != b'[':
+                        return PAYLOAD_TOO_LARGE_RESPONSE
+                    if len(body) > MAX_BULK_REQUEST_BODY_BYTES:
+                        return BULK_PAYLOAD_TOO_LARGE_RESPONSE
+                
                 # Create appointment
                 try:
-                    appointment_data = req.get_json()
+                    appointment_data = orjson.loads(body) if body else None
                     if not appointment_data:
                         response_data = {
                             "success": False,
                             "error": "No appointment data provided in request body"
                         }
+                    elif isinstance(appointment_data, list):
+                        # Several appointments: create them in per-patient transactional batches
+                        for item in appointment_data:
+                            item.setdefault('id', item.get('appointmentId') or new_document_id())
+                            item.setdefault('appointmentId', item['id'])
+                            if 'patientId' not in item:
+                                item['patientId'] = item.get('patient_id', 'default')
+                        
+                        created = await cosmos_manager.create_appointments_bulk(appointment_data)
+                        
+                        response_data = {
+                            "success": True,
+                            "appointments": created,
+                            "count": len(created),
+                            "message": f"Created {len(created)} appointments"
+                        }
                     else:
                         # Ensure required fields
                         if 'id' not in appointment_data:
-                            appointment_data['id'] = appointment_data.get('appointmentId', str(int(time.time())))
+                            appointment_data['id'] = appointment_data.get('appointmentId') or new_document_id()
                         if 'appointmentId' not in appointment_data:
                             appointment_data['appointmentId'] = appointment_data['id']
                             
-                        # Add metadata
-                        appointment_data['createdAt'] = int(time.time())
-                        appointment_data['updatedAt'] = int(time.time())
-                        
                         # Ensure patientId for partitioning
                         if 'patientId' not in appointment_data:
                             appointment_data['patientId'] = appointment_data.get('patient_id', 'default')
                         
-                        # Create appointment
-                        response = cosmos_manager.appointments_container.create_item(body=appointment_data)
+                        # Create appointment (the manager stamps createdAt/updatedAt)
+                        response = await cosmos_manager.create_appointment(appointment_data)
                         
                         response_data = {
                             "success": True,
@@ -115,105 +136,62 @@ def register_appointment_endpoints(app: func.FunctionApp):
                         }
                     
                 except Exception as e:
-                    logging.error(f"Error creating appointment: {str(e)}")
+                    logging.exception("Error creating appointment")
                     response_data = {
                         "success": False,
                         "error": f"Failed to create appointment: {str(e)}"
                     }
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             status_code = 200 if response_data.get("success") else 400
             
-            return func.HttpResponse(
-                json.dumps(response_data),
-                status_code=status_code,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, response_data, status_code)
             
         except Exception as e:
-            logging.error(f"Appointment management error: {str(e)}")
+            logging.exception("Appointment management error")
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
-            return func.HttpResponse(
-                json.dumps({"success": False, "error": str(e)}),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, {"success": False, "error": str(e)}, 500)
 
     @app.route(route="appointments/{appointment_id}", methods=["GET", "PUT", "DELETE", "OPTIONS"])
-    def manage_appointment(req: func.HttpRequest) -> func.HttpResponse:
+    async def manage_appointment(req: func.HttpRequest) -> func.HttpResponse:
         """Individual appointment management - GET/PUT/DELETE by appointment ID"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return RECORD_PREFLIGHT_RESPONSE
         
         appointment_id = req.route_params.get('appointment_id')
         if not appointment_id:
             return func.HttpResponse(
-                json.dumps({"error": "Appointment ID is required"}),
+                _APPOINTMENT_ID_REQUIRED_BODY,
                 status_code=400,
-                mimetype="application/json"
+                mimetype="application/json",
+                headers=RECORD_CORS_HEADERS
             )
         
-        logging.info(f'Appointment {req.method}: {appointment_id}')
+        logging.info('Appointment %s: %s', req.method, appointment_id)
         
         # Check if Cosmos DB is configured
         if not cosmos_manager.is_connected():
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
             return func.HttpResponse(
-                json.dumps({"error": "Cosmos DB not configured. Please set COSMOS_CONNECTION_STRING."}),
+                COSMOS_NOT_CONFIGURED_BODY,
                 status_code=500,
                 mimetype="application/json",
-                headers=headers
+                headers=RECORD_CORS_HEADERS
             )
         
         try:
             # For appointments, we need the patient_id to access the correct partition
             patient_id = req.params.get('patientId')
+            error_status = 404
             
             if req.method == "GET":
                 # Get appointment by ID
                 try:
                     if patient_id:
                         # Use patient_id as partition key
-                        response = cosmos_manager.appointments_container.read_item(
-                            item=appointment_id, 
-                            partition_key=patient_id
-                        )
+                        response = await cosmos_manager.get_appointment(appointment_id, patient_id)
                     else:
                         # Search across partitions if patient_id not provided
-                        query = "SELECT * FROM c WHERE c.id = @appointment_id"
-                        parameters = [{"name": "@appointment_id", "value": appointment_id}]
-                        items = list(cosmos_manager.appointments_container.query_items(
-                            query=query,
-                            parameters=parameters,
-                            enable_cross_partition_query=True
-                        ))
-                        if not items:
-                            raise Exception("NotFound")
-                        response = items[0]
+                        response = await cosmos_manager.find_appointment(appointment_id)
                     
                     response_data = {
                         "success": True,
@@ -221,7 +199,7 @@ def register_appointment_endpoints(app: func.FunctionApp):
                         "message": f"Appointment retrieved successfully: {appointment_id}"
                     }
                 except Exception as e:
-                    if "NotFound" in str(e):
+                    if is_not_found_error(e):
                         response_data = {
                             "success": False,
                             "error": f"Appointment with ID {appointment_id} not found"
@@ -233,39 +211,23 @@ def register_appointment_endpoints(app: func.FunctionApp):
                         }
                         
             elif req.method == "PUT":
+                body = req.get_body()
+                if len(body) > MAX_REQUEST_BODY_BYTES:
+                    return PAYLOAD_TOO_LARGE_RESPONSE
+                
                 # Update appointment
                 try:
-                    updates = req.get_json()
+                    updates = orjson.loads(body) if body else None
                     if not updates:
                         raise Exception("No update data provided")
                     
-                    # Get existing appointment first
-                    if patient_id:
-                        existing_appointment = cosmos_manager.appointments_container.read_item(
-                            item=appointment_id, 
-                            partition_key=patient_id
-                        )
-                    else:
-                        # Search for appointment if patient_id not provided
-                        query = "SELECT * FROM c WHERE c.id = @appointment_id"
-                        parameters = [{"name": "@appointment_id", "value": appointment_id}]
-                        items = list(cosmos_manager.appointments_container.query_items(
-                            query=query,
-                            parameters=parameters,
-                            enable_cross_partition_query=True
-                        ))
-                        if not items:
-                            raise Exception("NotFound")
-                        existing_appointment = items[0]
-                        patient_id = existing_appointment.get('patientId')
+                    # Find the partition if patient_id not provided
+                    if not patient_id:
+                        patient_id = (await cosmos_manager.find_appointment(appointment_id)).get('patientId')
                     
-                    # Update fields
-                    existing_appointment.update(updates)
-                    existing_appointment['updatedAt'] = int(time.time())
-                    
-                    response = cosmos_manager.appointments_container.replace_item(
-                        item=appointment_id, 
-                        body=existing_appointment
+                    # Patch only the provided fields, optionally guarded by the client's ETag
+                    response = await cosmos_manager.update_appointment(
+                        appointment_id, patient_id, updates, req.headers.get('If-Match')
                     )
                     response_data = {
                         "success": True,
@@ -274,11 +236,17 @@ def register_appointment_endpoints(app: func.FunctionApp):
                     }
                     
                 except Exception as e:
-                    if "NotFound" in str(e):
+                    if is_not_found_error(e):
                         response_data = {
                             "success": False,
                             "error": f"Appointment with ID {appointment_id} not found"
                         }
+                    elif is_precondition_failed_error(e):
+                        error_status = 412
+                        response_data = {
+                            "success": False,
+                            "error": f"Appointment {appointment_id} was modified since the given ETag"
+                        }
                     else:
                         response_data = {
                             "success": False,
@@ -289,35 +257,20 @@ def register_appointment_endpoints(app: func.FunctionApp):
                 # Delete appointment
                 try:
                     if patient_id:
-                        cosmos_manager.appointments_container.delete_item(
-                            item=appointment_id, 
-                            partition_key=patient_id
-                        )
+                        await cosmos_manager.delete_appointment(appointment_id, patient_id)
                     else:
                         # Find appointment first to get patient_id
-                        query = "SELECT * FROM c WHERE c.id = @appointment_id"
-                        parameters = [{"name": "@appointment_id", "value": appointment_id}]
-                        items = list(cosmos_manager.appointments_container.query_items(
-                            query=query,
-                            parameters=parameters,
-                            enable_cross_partition_query=True
-                        ))
-                        if not items:
-                            raise Exception("NotFound")
-                        appointment = items[0]
+                        appointment = await cosmos_manager.find_appointment(appointment_id)
                         patient_id = appointment.get('patientId')
                         
-                        cosmos_manager.appointments_container.delete_item(
-                            item=appointment_id, 
-                            partition_key=patient_id
-                        )
+                        await cosmos_manager.delete_appointment(appointment_id, patient_id)
                     
                     response_data = {
                         "success": True,
                         "message": f"Appointment deleted successfully: {appointment_id}"
                     }
                 except Exception as e:
-                    if "NotFound" in str(e):
+                    if is_not_found_error(e):
                         response_data = {
                             "success": False,
                             "error": f"Appointment with ID {appointment_id} not found"
@@ -328,33 +281,11 @@ def register_appointment_endpoints(app: func.FunctionApp):
                             "error": f"Failed to delete appointment: {str(e)}"
                         }
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
-            status_code = 200 if response_data.get("success") else 404
+            status_code = 200 if response_data.get("success") else error_status
             
-            return func.HttpResponse(
-                json.dumps(response_data),
-                status_code=status_code,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, response_data, status_code)
             
         except Exception as e:
-            logging.error(f"Appointment management error: {str(e)}")
+            logging.exception("Appointment management error")
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
-            return func.HttpResponse(
-                json.dumps({"success": False, "error": str(e)}),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, {"success": False, "error": str(e)}, 500)
@@ -5,14 +5,31 @@ Handles Azure Bot Service integration and conversation handling
 
 import azure.functions as func
 import logging
-import json
+import orjson
 import os
+import types
+from endpoints._http import preflight_response
 from services.cosmos_manager import cosmos_manager
 from services.bot_service import (
     process_bot_message_sync, 
     create_bot_response
 )
 
+# Static CORS headers; bot/messages additionally accepts the Bot Framework Authorization header
+_CORS_HEADERS = types.MappingProxyType({
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+})
+_BOT_CORS_HEADERS = types.MappingProxyType({**_CORS_HEADERS, 'Access-Control-Allow-Headers': 'Content-Type, Authorization'})
+_PREFLIGHT_RESPONSE = preflight_response(_CORS_HEADERS)
+_BOT_PREFLIGHT_RESPONSE = preflight_response(_BOT_CORS_HEADERS)
+
+# Static response bodies, serialized once
+_NO_ACTIVITY_BODY = orjson.dumps({"error": "No activity data received"})
+_DEFAULT_REPLY_BODY = orjson.dumps({"type": "message", "text": "Hello! I'm ready to help."})
+_INVALID_JSON_BODY = orjson.dumps({"error": "Invalid JSON in request body"})
+
 
 def register_bot_endpoints(app: func.FunctionApp):
     """Register Bot Service endpoints with the Function App"""
@@ -29,33 +46,27 @@ def register_bot_endpoints(app: func.FunctionApp):
         """Main bot endpoint to handle incoming messages from Azure Bot Service"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _BOT_PREFLIGHT_RESPONSE
         
         logging.info('Bot messages endpoint called')
         
         try:
             # Get the activity from the request body
-            activity_data = req.get_json()
+            activity_data = orjson.loads(req.get_body())
             if not activity_data:
                 logging.error("No activity data received")
                 return func.HttpResponse(
-                    json.dumps({"error": "No activity data received"}),
+                    _NO_ACTIVITY_BODY,
                     status_code=400,
                     mimetype="application/json"
                 )
             
-            logging.info(f"Activity type: {activity_data.get('type')}, Text: {activity_data.get('text')}")
+            logging.info("Activity type: %s, Text: %s", activity_data.get('type'), activity_data.get('text'))
             
             # Only process message activities
             if activity_data.get('type') != 'message':
                 return func.HttpResponse(
-                    json.dumps({"type": "message", "text": "Hello! I'm ready to help."}),
+                    _DEFAULT_REPLY_BODY,
                     status_code=200,
                     mimetype="application/json"
                 )
@@ -66,38 +77,32 @@ def register_bot_endpoints(app: func.FunctionApp):
             
             # Log call information if applicable
             if bot_result.get('call_initiated'):
-                logging.info(f"Bot successfully initiated call. Call ID: {bot_result.get('call_id')}")
+                logging.info("Bot successfully initiated call. Call ID: %s", bot_result.get('call_id'))
             elif bot_result.get('call_error'):
-                logging.error(f"Bot failed to initiate call: {bot_result.get('call_error')}")
+                logging.error("Bot failed to initiate call: %s", bot_result.get('call_error'))
             
             # Create bot response using the bot service module
             response_activity = create_bot_response(activity_data, response_text)
             
             # Return the response activity
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, Authorization'
-            }
-            
             return func.HttpResponse(
-                json.dumps(response_activity),
+                orjson.dumps(response_activity),
                 status_code=200,
                 mimetype="application/json",
-                headers=headers
+                headers=_BOT_CORS_HEADERS
             )
             
-        except json.JSONDecodeError:
+        except ValueError:
             logging.error("Invalid JSON in request body")
             return func.HttpResponse(
-                json.dumps({"error": "Invalid JSON in request body"}),
+                _INVALID_JSON_BODY,
                 status_code=400,
                 mimetype="application/json"
             )
         except Exception as e:
-            logging.error(f"Unexpected error in bot endpoint: {str(e)}")
+            logging.error("Unexpected error in bot endpoint: %s", e)
             return func.HttpResponse(
-                json.dumps({"error": f"Unexpected error: {str(e)}"}),
+                orjson.dumps({"error": f"Unexpected error: {str(e)}"}),
                 status_code=500,
                 mimetype="application/json"
             )
@@ -107,13 +112,7 @@ def register_bot_endpoints(app: func.FunctionApp):
         """Test endpoint to simulate bot message and call initiation"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _PREFLIGHT_RESPONSE
         
         logging.info('Test bot call endpoint called')
         
@@ -124,14 +123,14 @@ def register_bot_endpoints(app: func.FunctionApp):
             
             if req.method == "POST":
                 try:
-                    req_body = req.get_json()
+                    req_body = orjson.loads(req.get_body())
                     if req_body:
                         test_message = req_body.get('message', test_message)
                         custom_message = req_body.get('customMessage', custom_message)
                 except ValueError:
                     pass
             
-            logging.info(f"Testing bot with message: '{test_message}'")
+            logging.info("Testing bot with message: '%s'", test_message)
             
             # Create a simulated bot activity
             test_activity = {
@@ -151,13 +150,6 @@ def register_bot_endpoints(app: func.FunctionApp):
             # Process the message using the bot service module
             bot_result = process_bot_message_sync(test_activity)
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             response_data = {
                 "success": True,
                 "testMessage": test_message,
@@ -176,24 +168,18 @@ def register_bot_endpoints(app: func.FunctionApp):
             }
             
             return func.HttpResponse(
-                json.dumps(response_data, indent=2),
+                orjson.dumps(response_data, option=orjson.OPT_INDENT_2),
                 status_code=200,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error in test_bot_call: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.error("Error in test_bot_call: %s", e)
             
             return func.HttpResponse(
-                json.dumps({"success": False, "error": str(e)}),
+                orjson.dumps({"success": False, "error": str(e)}),
                 status_code=500,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
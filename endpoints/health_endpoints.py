@@ -5,12 +5,39 @@ Handles health checks and Azure Communication Services token generation
 
 import azure.functions as func
 import logging
-import json
 import time
 import os
-from azure.communication.identity import CommunicationIdentityClient
+import types
+from endpoints._http import preflight_response
+import orjson
+from typing import Optional
+from azure.communication.identity.aio import CommunicationIdentityClient
 from services.cosmos_manager import cosmos_manager
 
+# Static CORS headers for the token endpoint
+_CORS_HEADERS = types.MappingProxyType({
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization'
+})
+_PREFLIGHT_RESPONSE = preflight_response(_CORS_HEADERS)
+
+# Token responses have a fixed shape; only the values are serialized per request
+_TOKEN_RESPONSE_TEMPLATE = b'{"success":true,"user_id":%b,"access_token":%b,"expires_on":%b}'
+_ACS_NOT_CONFIGURED_BODY = orjson.dumps({"error": "ACS_CONNECTION_STRING not configured"})
+
+
+# Shared async identity client, created on first token request
+_identity_client: Optional[CommunicationIdentityClient] = None
+
+
+def _get_identity_client(connection_string: str) -> CommunicationIdentityClient:
+    """Return the shared async CommunicationIdentityClient (no I/O on creation, so no lock needed)"""
+    global _identity_client
+    if _identity_client is None:
+        _identity_client = CommunicationIdentityClient.from_connection_string(connection_string)
+    return _identity_client
+
 
 def register_health_endpoints(app: func.FunctionApp):
     """Register health and token endpoints with the Function App"""
@@ -22,22 +49,31 @@ def register_health_endpoints(app: func.FunctionApp):
     TARGET_PHONE_NUMBER = os.environ.get("TARGET_PHONE_NUMBER", "+917447474405")
     SOURCE_CALLER_ID = os.environ.get("SOURCE_CALLER_ID", "")
 
+    # Environment-derived status is fixed until the app restarts
+    _STATIC_CONFIG_STATUS = types.MappingProxyType({
+        "acs_configured": bool(ACS_CONNECTION_STRING),
+        "cognitive_services_configured": bool(COGNITIVE_SERVICES_ENDPOINT),
+        "target_user_configured": bool(TARGET_USER_ID),
+        "target_phone_configured": bool(TARGET_PHONE_NUMBER),
+        "source_caller_id_configured": bool(SOURCE_CALLER_ID)
+    })
+
+    def _config_status() -> tuple:
+        """
+        Configuration status and overall health
+        Cosmos DB is checked per call (an attribute lookup), since a client that failed
+        to build is retried rather than kept
+        """
+        config_status = dict(_STATIC_CONFIG_STATUS)
+        config_status["cosmos_db_configured"] = cosmos_manager.is_connected()
+        return config_status, all(config_status.values())
+
     @app.route(route="health_check", methods=["GET"])
     def health_check(req: func.HttpRequest) -> func.HttpResponse:
         """Health check endpoint to verify service is running"""
         logging.info('Health check endpoint called')
         
-        # Check configuration status
-        config_status = {
-            "acs_configured": bool(ACS_CONNECTION_STRING),
-            "cognitive_services_configured": bool(COGNITIVE_SERVICES_ENDPOINT),
-            "cosmos_db_configured": cosmos_manager.is_connected(),
-            "target_user_configured": bool(TARGET_USER_ID),
-            "target_phone_configured": bool(TARGET_PHONE_NUMBER),
-            "source_caller_id_configured": bool(SOURCE_CALLER_ID)
-        }
-        
-        all_healthy = all(config_status.values())
+        config_status, all_healthy = _config_status()
         
         response_data = {
             "status": "healthy" if all_healthy else "partial",
@@ -47,65 +83,53 @@ def register_health_endpoints(app: func.FunctionApp):
         }
         
         return func.HttpResponse(
-            json.dumps(response_data, indent=2),
+            orjson.dumps(response_data, option=orjson.OPT_INDENT_2),
             status_code=200 if all_healthy else 206,
             mimetype="application/json"
         )
 
     @app.route(route="get_token", methods=["GET", "POST", "OPTIONS"])
-    def get_token(req: func.HttpRequest) -> func.HttpResponse:
+    async def get_token(req: func.HttpRequest) -> func.HttpResponse:
         """Generate Azure Communication Services access token"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, Authorization',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _PREFLIGHT_RESPONSE
         
         logging.info('Token generation endpoint called')
         
         if not ACS_CONNECTION_STRING:
             return func.HttpResponse(
-                json.dumps({"error": "ACS_CONNECTION_STRING not configured"}),
+                _ACS_NOT_CONFIGURED_BODY,
                 status_code=500,
                 mimetype="application/json"
             )
         
         try:
-            # Create identity client
-            identity_client = CommunicationIdentityClient.from_connection_string(ACS_CONNECTION_STRING)
-            
-            # Create user and token
-            user = identity_client.create_user()
-            token_result = identity_client.get_token(user, ["voip"])
+            # Shared identity client
+            identity_client = _get_identity_client(ACS_CONNECTION_STRING)
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, Authorization'
-            }
+            # Always a fresh identity: this route is anonymous, so it must never issue tokens
+            # for an existing user. New user and token in a single round trip
+            user, token_result = await identity_client.create_user_and_token(["voip"])
+            user_id = user.properties['id']
             
-            response_data = {
-                "success": True,
-                "user_id": user.properties['id'],
-                "access_token": token_result.token,
-                "expires_on": str(token_result.expires_on)
-            }
+            body = _TOKEN_RESPONSE_TEMPLATE % (
+                orjson.dumps(user_id),
+                orjson.dumps(token_result.token),
+                orjson.dumps(str(token_result.expires_on))
+            )
             
             return func.HttpResponse(
-                json.dumps(response_data),
+                body,
                 status_code=200,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error generating token: {str(e)}")
+            logging.error("Error generating token: %s", e)
             return func.HttpResponse(
-                json.dumps({"error": f"Failed to generate token: {str(e)}"}),
+                orjson.dumps({"error": f"Failed to generate token: {str(e)}"}),
                 status_code=500,
                 mimetype="application/json"
             )
@@ -5,95 +5,106 @@ Handles patient data management with Azure Cosmos DB
 
 import azure.functions as func
 import logging
-import json
-import time
-from services.cosmos_manager import cosmos_manager
+import orjson
+from endpoints._http import (
+    RECORD_CORS_HEADERS, RECORD_PREFLIGHT_RESPONSE, COSMOS_NOT_CONFIGURED_BODY, MAX_REQUEST_BODY_BYTES,
+    PAYLOAD_TOO_LARGE_RESPONSE, json_response, requested_limit, requested_fields
+)
+from services.cosmos_manager import (
+    cosmos_manager, is_not_found_error, is_precondition_failed_error
+)
+
+
+_PATIENT_ID_REQUIRED_BODY = orjson.dumps({"error": "Patient ID is required"})
+
+
+def _requested_cursor(req: func.HttpRequest):
+    """(createdAt, id) keyset cursor from ?afterCreatedAt=&afterId=, or None for the first page"""
+    after_created_at = req.params.get('afterCreatedAt')
+    after_id = req.params.get('afterId')
+    if not after_created_at or not after_id:
+        return None
+    return int(after_created_at), after_id
+
+
+def _next_cursor(items: list, limit: int):
+    """Keyset cursor for the page after a full page of patients; None once the list is exhausted"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return {"afterCreatedAt": last.get('createdAt'), "afterId": last['id']}
 
 
 def register_patient_endpoints(app: func.FunctionApp):
     """Register patient management endpoints with the Function App"""
 
     @app.route(route="patients", methods=["GET", "POST", "OPTIONS"])
-    def manage_patients(req: func.HttpRequest) -> func.HttpResponse:
+    async def manage_patients(req: func.HttpRequest) -> func.HttpResponse:
         """Patient management endpoint - GET: List patients, POST: Create patient"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return RECORD_PREFLIGHT_RESPONSE
         
-        logging.info(f'Patient management: {req.method} request received')
+        logging.info('Patient management: %s request received', req.method)
         
         # Check if Cosmos DB is configured
         if not cosmos_manager.is_connected():
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
             return func.HttpResponse(
-                json.dumps({"error": "Cosmos DB not configured. Please set COSMOS_CONNECTION_STRING."}),
+                COSMOS_NOT_CONFIGURED_BODY,
                 status_code=500,
                 mimetype="application/json",
-                headers=headers
+                headers=RECORD_CORS_HEADERS
             )
         
         try:
             response_data = {"success": False, "error": "Unknown error"}  # Initialize with default
             
             if req.method == "GET":
-                # List patients
-                limit = int(req.params.get('limit', 100))
+                # List one page of patients
+                limit = requested_limit(req)
                 
                 try:
-                    # Using synchronous method for Azure Functions v1 compatibility
-                    query = "SELECT * FROM c ORDER BY c.createdAt DESC"
-                    items = list(cosmos_manager.patients_container.query_items(
-                        query=query,
-                        max_item_count=limit,
-                        enable_cross_partition_query=True
-                    ))
+                    if req.params.get('countOnly') == 'true':
+                        # Only the total: Cosmos returns one number per partition instead of documents
+                        count = await cosmos_manager.count_patients()
+                        return json_response(RECORD_CORS_HEADERS, {"success": True, "count": count}, 200)
+                    
+                    items, continuation_token = await cosmos_manager.list_patients_page(
+                        limit, req.params.get('continuationToken'), requested_fields(req),
+                        _requested_cursor(req)
+                    )
                     
                     response_data = {
                         "success": True,
                         "patients": items,
                         "count": len(items),
+                        "continuationToken": continuation_token,
+                        "nextCursor": _next_cursor(items, limit),
                         "message": f"Retrieved {len(items)} patients"
                     }
                     
                 except Exception as e:
-                    logging.error(f"Error listing patients: {str(e)}")
                     response_data = {
                         "success": False,
-                        "error": f"Failed to list patients: {str(e)}"
+                        "error": str(e)
                     }
                     
             elif req.method == "POST":
+                body = req.get_body()
+                if len(body) > MAX_REQUEST_BODY_BYTES:
+                    return PAYLOAD_TOO_LARGE_RESPONSE
+                
                 # Create patient
                 try:
-                    patient_data = req.get_json()
+                    patient_data = orjson.loads(body) if body else None
                     if not patient_data:
                         response_data = {
                             "success": False,
                             "error": "No patient data provided in request body"
                         }
                     else:
-                        # Ensure required fields
-                        if 'id' not in patient_data:
-                            patient_data['id'] = patient_data.get('patientId', str(int(time.time())))
-                        if 'patientId' not in patient_data:
-                            patient_data['patientId'] = patient_data['id']
-                            
-                        # Add metadata
-                        patient_data['createdAt'] = int(time.time())
-                        patient_data['updatedAt'] = int(time.time())
-                        
-                        # Create patient
-                        response = cosmos_manager.patients_container.create_item(body=patient_data)
+                        # Create patient (the manager fills in id, patientId and timestamps)
+                        response = await cosmos_manager.create_patient(patient_data)
                         
                         response_data = {
                             "success": True,
@@ -102,92 +113,62 @@ def register_patient_endpoints(app: func.FunctionApp):
                         }
                     
                 except Exception as e:
-                    logging.error(f"Error creating patient: {str(e)}")
+                    logging.exception("Error creating patient")
                     response_data = {
                         "success": False,
                         "error": f"Failed to create patient: {str(e)}"
                     }
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             status_code = 200 if response_data.get("success") else 400
             
-            return func.HttpResponse(
-                json.dumps(response_data),
-                status_code=status_code,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, response_data, status_code)
             
         except Exception as e:
-            logging.error(f"Patient management error: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.exception("Patient management error")
             
-            return func.HttpResponse(
-                json.dumps({"success": False, "error": str(e)}),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, {"success": False, "error": str(e)}, 500)
 
     @app.route(route="patients/{patient_id}", methods=["GET", "PUT", "DELETE", "OPTIONS"])
-    def manage_patient(req: func.HttpRequest) -> func.HttpResponse:
+    async def manage_patient(req: func.HttpRequest) -> func.HttpResponse:
         """Individual patient management - GET/PUT/DELETE by patient ID"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return RECORD_PREFLIGHT_RESPONSE
         
         patient_id = req.route_params.get('patient_id')
         if not patient_id:
             return func.HttpResponse(
-                json.dumps({"error": "Patient ID is required"}),
+                _PATIENT_ID_REQUIRED_BODY,
                 status_code=400,
-                mimetype="application/json"
+                mimetype="application/json",
+                headers=RECORD_CORS_HEADERS
             )
         
-        logging.info(f'Patient {req.method}: {patient_id}')
+        logging.info('Patient %s: %s', req.method, patient_id)
         
         # Check if Cosmos DB is configured
         if not cosmos_manager.is_connected():
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
             return func.HttpResponse(
-                json.dumps({"error": "Cosmos DB not configured. Please set COSMOS_CONNECTION_STRING."}),
+                COSMOS_NOT_CONFIGURED_BODY,
                 status_code=500,
                 mimetype="application/json",
-                headers=headers
+                headers=RECORD_CORS_HEADERS
             )
         
         try:
+            error_status = 404
+            
             if req.method == "GET":
                 # Get patient by ID
                 try:
-                    response = cosmos_manager.patients_container.read_item(item=patient_id, partition_key=patient_id)
+                    response = await cosmos_manager.get_patient(patient_id)
                     response_data = {
                         "success": True,
                         "patient": response,
                         "message": f"Patient retrieved successfully: {patient_id}"
                     }
                 except Exception as e:
-                    if "NotFound" in str(e):
+                    if is_not_found_error(e):
                         response_data = {
                             "success": False,
                             "error": f"Patient with ID {patient_id} not found"
@@ -199,20 +180,18 @@ def register_patient_endpoints(app: func.FunctionApp):
                         }
                         
             elif req.method == "PUT":
+                body = req.get_body()
+                if len(body) > MAX_REQUEST_BODY_BYTES:
+                    return PAYLOAD_TOO_LARGE_RESPONSE
+                
                 # Update patient
                 try:
-                    updates = req.get_json()
+                    updates = orjson.loads(body) if body else None
                     if not updates:
                         raise Exception("No update data provided")
                     
-                    # Get existing patient first
-                    existing_patient = cosmos_manager.patients_container.read_item(item=patient_id, partition_key=patient_id)
-                    
-                    # Update fields
-                    existing_patient.update(updates)
-                    existing_patient['updatedAt'] = int(time.time())
-                    
-                    response = cosmos_manager.patients_container.replace_item(item=patient_id, body=existing_patient)
+                    # Patch only the provided fields, optionally guarded by the client's ETag
+                    response = await cosmos_manager.update_patient(patient_id, updates, req.headers.get('If-Match'))
                     response_data = {
                         "success": True,
                         "patient": response,
@@ -220,11 +199,17 @@ def register_patient_endpoints(app: func.FunctionApp):
                     }
                     
                 except Exception as e:
-                    if "NotFound" in str(e):
+                    if is_not_found_error(e):
                         response_data = {
                             "success": False,
                             "error": f"Patient with ID {patient_id} not found"
                         }
+                    elif is_precondition_failed_error(e):
+                        error_status = 412
+                        response_data = {
+                            "success": False,
+                            "error": f"Patient {patient_id} was modified since the given ETag"
+                        }
                     else:
                         response_data = {
                             "success": False,
@@ -234,13 +219,13 @@ def register_patient_endpoints(app: func.FunctionApp):
             elif req.method == "DELETE":
                 # Delete patient
                 try:
-                    cosmos_manager.patients_container.delete_item(item=patient_id, partition_key=patient_id)
+                    await cosmos_manager.delete_patient(patient_id)
                     response_data = {
                         "success": True,
                         "message": f"Patient deleted successfully: {patient_id}"
                     }
                 except Exception as e:
-                    if "NotFound" in str(e):
+                    if is_not_found_error(e):
                         response_data = {
                             "success": False,
                             "error": f"Patient with ID {patient_id} not found"
@@ -251,33 +236,11 @@ def register_patient_endpoints(app: func.FunctionApp):
                             "error": f"Failed to delete patient: {str(e)}"
                         }
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            status_code = 200 if response_data.get("success") else error_status
             
-            status_code = 200 if response_data.get("success") else 404
-            
-            return func.HttpResponse(
-                json.dumps(response_data),
-                status_code=status_code,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, response_data, status_code)
             
         except Exception as e:
-            logging.error(f"Patient management error: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.exception("Patient management error")
             
-            return func.HttpResponse(
-                json.dumps({"success": False, "error": str(e)}),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return json_response(RECORD_CORS_HEADERS, {"success": False, "error": str(e)}, 500)
@@ -5,15 +5,29 @@ Handles PSTN phone calling functionality and webhooks with integrated bot servic
 
 import azure.functions as func
 import logging
-import json
+import orjson
 import os
+import types
+from endpoints._http import preflight_response, request_params, error_response
 from services.phone_calling import (
     create_pstn_call, 
-    handle_pstn_webhook_event, 
+    handle_pstn_webhook_events, 
     get_call_status as get_pstn_call_status
 )
 from services.bot_service import generate_response_sync
 
+# Static CORS headers shared by all PSTN endpoints
+_CORS_HEADERS = types.MappingProxyType({
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+})
+_PREFLIGHT_RESPONSE = preflight_response(_CORS_HEADERS)
+
+# Static response bodies, serialized once
+_CALL_ID_REQUIRED_BODY = orjson.dumps({"error": "callId parameter is required"})
+_WEBHOOK_OK_BODY = "PSTN webhook processed successfully"
+
 
 def register_phone_endpoints(app: func.FunctionApp):
     """Register PSTN phone calling endpoints with the Function App"""
@@ -26,32 +40,16 @@ def register_phone_endpoints(app: func.FunctionApp):
         """Create a PSTN call to a phone number with configurable parameters"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _PREFLIGHT_RESPONSE
         
         logging.info('PSTN phone call endpoint called')
         
         try:
             # Get parameters from query string or request body
-            target_phone = req.params.get('phoneNumber') or req.params.get('phone')
-            custom_message = req.params.get('message')
-            custom_voice = req.params.get('voice')
-            
-            # Check if parameters were provided in request body (for POST requests)
-            if req.method == "POST":
-                try:
-                    req_body = req.get_json()
-                    if req_body:
-                        target_phone = target_phone or req_body.get('phoneNumber') or req_body.get('phone')
-                        custom_message = custom_message or req_body.get('message')
-                        custom_voice = custom_voice or req_body.get('voice')
-                except ValueError:
-                    pass
+            params = request_params(req)
+            target_phone = params.get('phoneNumber') or params.get('phone')
+            custom_message = params.get('message')
+            custom_voice = params.get('voice')
             
             # Use provided phone number or default
             if not target_phone:
@@ -59,7 +57,7 @@ def register_phone_endpoints(app: func.FunctionApp):
                 
             if not target_phone:
                 return func.HttpResponse(
-                    json.dumps({
+                    orjson.dumps({
                         "error": "Phone number is required. Provide via 'phoneNumber' parameter or set TARGET_PHONE_NUMBER environment variable.",
                         "example": "?phoneNumber=+917447474405"
                     }),
@@ -74,75 +72,36 @@ def register_phone_endpoints(app: func.FunctionApp):
                 custom_voice=custom_voice
             )
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             status_code = 200 if call_result['success'] else 500
             
             return func.HttpResponse(
-                json.dumps(call_result, indent=2),
+                orjson.dumps(call_result, option=orjson.OPT_INDENT_2),
                 status_code=status_code,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error in make_phone_call: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.error("Error in make_phone_call: %s", e)
             
-            return func.HttpResponse(
-                json.dumps({
-                    "success": False,
-                    "error": f"Failed to create PSTN call: {str(e)}",
-                    "call_type": "PSTN"
-                }),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return error_response(_CORS_HEADERS, f"Failed to create PSTN call: {str(e)}", success=False, call_type="PSTN")
 
     @app.route(route="make_smart_phone_call", methods=["GET", "POST", "OPTIONS"])
     def make_smart_phone_call(req: func.HttpRequest) -> func.HttpResponse:
         """Create a PSTN call with AI-generated greeting message"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _PREFLIGHT_RESPONSE
         
         logging.info('Smart PSTN phone call endpoint called')
         
         try:
             # Get parameters from query string or request body
-            target_phone = req.params.get('phoneNumber') or req.params.get('phone')
-            call_purpose = req.params.get('purpose') or req.params.get('reason')
-            custom_voice = req.params.get('voice')
-            patient_name = req.params.get('patientName') or req.params.get('name')
-            
-            # Check if parameters were provided in request body (for POST requests)
-            if req.method == "POST":
-                try:
-                    req_body = req.get_json()
-                    if req_body:
-                        target_phone = target_phone or req_body.get('phoneNumber') or req_body.get('phone')
-                        call_purpose = call_purpose or req_body.get('purpose') or req_body.get('reason')
-                        custom_voice = custom_voice or req_body.get('voice')
-                        patient_name = patient_name or req_body.get('patientName') or req_body.get('name')
-                except ValueError:
-                    pass
+            params = request_params(req)
+            target_phone = params.get('phoneNumber') or params.get('phone')
+            call_purpose = params.get('purpose') or params.get('reason')
+            custom_voice = params.get('voice')
+            patient_name = params.get('patientName') or params.get('name')
             
             # Use provided phone number or default
             if not target_phone:
@@ -150,7 +109,7 @@ def register_phone_endpoints(app: func.FunctionApp):
                 
             if not target_phone:
                 return func.HttpResponse(
-                    json.dumps({
+                    orjson.dumps({
                         "error": "Phone number is required. Provide via 'phoneNumber' parameter or set TARGET_PHONE_NUMBER environment variable.",
                         "example": "?phoneNumber=+917447474405&purpose=appointment reminder"
                     }),
@@ -168,7 +127,7 @@ def register_phone_endpoints(app: func.FunctionApp):
                 else:
                     bot_prompt = "Generate a professional healthcare greeting message for a general phone call. Keep it under 30 seconds when spoken and sound natural and caring."
                 
-                logging.info(f"Generating smart greeting with bot service: '{bot_prompt}'")
+                logging.info("Generating smart greeting with bot service: '%s'", bot_prompt)
                 smart_message = generate_response_sync(bot_prompt)
                 
                 if not smart_message or not smart_message.strip():
@@ -176,10 +135,10 @@ def register_phone_endpoints(app: func.FunctionApp):
                     smart_message = f"Hello{f' {patient_name}' if patient_name else ''}! This is your healthcare assistant calling{f' regarding {call_purpose}' if call_purpose else ''}. How can I help you today?"
                     logging.warning("Bot service returned empty message, using fallback")
                 else:
-                    logging.info(f"Generated smart message: '{smart_message[:100]}...'")
+                    logging.info("Generated smart message: '%.100s...'", smart_message)
                     
             except Exception as bot_error:
-                logging.error(f"Bot service failed for greeting generation: {str(bot_error)}")
+                logging.error("Bot service failed for greeting generation: %s", bot_error)
                 # Fallback to basic personalized message
                 smart_message = f"Hello{f' {patient_name}' if patient_name else ''}! This is your healthcare assistant calling{f' regarding {call_purpose}' if call_purpose else ''}. How can I help you today?"
             
@@ -199,42 +158,19 @@ def register_phone_endpoints(app: func.FunctionApp):
                     'conversational_ai_enabled': True
                 }
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             status_code = 200 if call_result['success'] else 500
             
             return func.HttpResponse(
-                json.dumps(call_result, indent=2),
+                orjson.dumps(call_result, option=orjson.OPT_INDENT_2),
                 status_code=status_code,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error in make_smart_phone_call: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.error("Error in make_smart_phone_call: %s", e)
             
-            return func.HttpResponse(
-                json.dumps({
-                    "success": False,
-                    "error": f"Failed to create smart PSTN call: {str(e)}",
-                    "call_type": "PSTN",
-                    "smart_features_attempted": True
-                }),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return error_response(_CORS_HEADERS, f"Failed to create smart PSTN call: {str(e)}", success=False, call_type="PSTN", smart_features_attempted=True)
 
     @app.route(route="phone_call_webhook", methods=["POST"])
     def phone_call_webhook(req: func.HttpRequest) -> func.HttpResponse:
@@ -242,35 +178,33 @@ def register_phone_endpoints(app: func.FunctionApp):
         logging.info('PSTN phone call webhook called')
         
         try:
-            # Get the event data
-            event_data = req.get_body().decode('utf-8')
-            logging.info(f"Raw webhook event data: {event_data}")
+            # Get the event data, dumping it only when debugging; it can be several KB
+            body = req.get_body()
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Raw webhook event data: %s", body.decode('utf-8'))
             
-            # Parse the JSON event
-            events = json.loads(event_data)
+            # Parse the JSON event straight from the raw bytes
+            events = orjson.loads(body)
             if not isinstance(events, list):
                 events = [events]
             
-            # Process each event using the phone calling module
-            for event in events:
-                success = handle_pstn_webhook_event(event)
-                if not success:
-                    logging.warning(f"Failed to handle event: {event.get('type', 'Unknown')}")
+            # Queue the events for the phone calling module and acknowledge right away
+            handle_pstn_webhook_events(events)
             
             return func.HttpResponse(
-                "PSTN webhook processed successfully",
+                _WEBHOOK_OK_BODY,
                 status_code=200
             )
             
-        except json.JSONDecodeError as json_error:
-            logging.error(f"Invalid JSON in webhook request: {str(json_error)}")
+        except orjson.JSONDecodeError as json_error:
+            logging.error("Invalid JSON in webhook request: %s", json_error)
             return func.HttpResponse(
                 "Invalid JSON in request body",
                 status_code=400
             )
             
         except Exception as e:
-            logging.error(f"Error processing PSTN webhook: {str(e)}")
+            logging.error("Error processing PSTN webhook: %s", e)
             return func.HttpResponse(
                 f"Error processing PSTN webhook: {str(e)}",
                 status_code=500
@@ -286,7 +220,7 @@ def register_phone_endpoints(app: func.FunctionApp):
             
             if not call_id:
                 return func.HttpResponse(
-                    json.dumps({"error": "callId parameter is required"}),
+                    _CALL_ID_REQUIRED_BODY,
                     status_code=400,
                     mimetype="application/json"
                 )
@@ -294,35 +228,17 @@ def register_phone_endpoints(app: func.FunctionApp):
             # Get call status (works for both PSTN and VoIP calls)
             status_result = get_pstn_call_status(call_id)
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             return func.HttpResponse(
-                json.dumps(status_result, indent=2),
+                orjson.dumps(status_result, option=orjson.OPT_INDENT_2),
                 status_code=200,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error getting call status: {str(e)}")
+            logging.error("Error getting call status: %s", e)
             
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
-            return func.HttpResponse(
-                json.dumps({"error": f"Failed to get call status: {str(e)}"}),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return error_response(_CORS_HEADERS, f"Failed to get call status: {str(e)}")
 
     @app.route(route="get_conversation_history", methods=["GET"])
     def get_conversation_history(req: func.HttpRequest) -> func.HttpResponse:
@@ -334,7 +250,7 @@ def register_phone_endpoints(app: func.FunctionApp):
             
             if not call_id:
                 return func.HttpResponse(
-                    json.dumps({"error": "callId parameter is required"}),
+                    _CALL_ID_REQUIRED_BODY,
                     status_code=400,
                     mimetype="application/json"
                 )
@@ -343,13 +259,6 @@ def register_phone_endpoints(app: func.FunctionApp):
             from services.phone_calling import get_conversation_state
             conversation_state = get_conversation_state(call_id)
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             response_data = {
                 "call_id": call_id,
                 "conversation_state": conversation_state,
@@ -357,24 +266,13 @@ def register_phone_endpoints(app: func.FunctionApp):
             }
             
             return func.HttpResponse(
-                json.dumps(response_data, indent=2),
+                orjson.dumps(response_data, option=orjson.OPT_INDENT_2),
                 status_code=200,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error getting conversation history: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.error("Error getting conversation history: %s", e)
             
-            return func.HttpResponse(
-                json.dumps({"error": f"Failed to get conversation history: {str(e)}"}),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return error_response(_CORS_HEADERS, f"Failed to get conversation history: {str(e)}")
@@ -5,12 +5,35 @@ Handles VoIP calling functionality for Communication Service users
 
 import azure.functions as func
 import logging
-import json
+import orjson
 import os
+import types
+from endpoints._http import preflight_response, request_params, error_response
 from services.voip_calling import (
-    create_voip_call, 
-    handle_voip_webhook_event, 
-    create_test_voip_call_no_webhook
+    create_voip_call_async, 
+    handle_voip_webhook_events, 
+    create_test_voip_call_no_webhook,
+    MAX_PLAY_DELAY_SECONDS
+)
+
+# Static CORS headers shared by all VoIP endpoints
+_CORS_HEADERS = types.MappingProxyType({
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+})
+_PREFLIGHT_RESPONSE = preflight_response(_CORS_HEADERS)
+
+# Static response bodies, serialized once
+_USER_ID_REQUIRED_BODY = orjson.dumps({
+    "error": "User ID is required. Provide via 'userId' parameter or set TARGET_USER_ID environment variable.",
+    "example": "?userId=8:acs:..."
+})
+
+# Webhook events that need more than a log line; anything else is acknowledged unparsed
+_ACTIONABLE_EVENT_MARKERS = (
+    b'"Microsoft.Communication.CallConnected"',
+    b'"Microsoft.Communication.CallDisconnected"'
 )
 
 
@@ -21,36 +44,20 @@ def register_voip_endpoints(app: func.FunctionApp):
     TARGET_USER_ID = os.environ.get("TARGET_USER_ID", "")
 
     @app.route(route="make_voip_call", methods=["GET", "POST", "OPTIONS"])
-    def make_voip_call(req: func.HttpRequest) -> func.HttpResponse:
+    async def make_voip_call(req: func.HttpRequest) -> func.HttpResponse:
         """Create a VoIP call to a Communication Service user"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _PREFLIGHT_RESPONSE
         
         logging.info('VoIP call endpoint called')
         
         try:
-            # Get parameters
-            target_user_id = req.params.get('userId') or req.params.get('user_id')
-            custom_message = req.params.get('message')
-            custom_voice = req.params.get('voice')
-            
-            # Check request body for POST requests
-            if req.method == "POST":
-                try:
-                    req_body = req.get_json()
-                    if req_body:
-                        target_user_id = target_user_id or req_body.get('userId') or req_body.get('user_id')
-                        custom_message = custom_message or req_body.get('message')
-                        custom_voice = custom_voice or req_body.get('voice')
-                except ValueError:
-                    pass
+            # Get parameters from query string or request body
+            params = request_params(req)
+            target_user_id = params.get('userId') or params.get('user_id')
+            custom_message = params.get('message')
+            custom_voice = params.get('voice')
             
             # Use provided user ID or default
             if not target_user_id:
@@ -58,56 +65,31 @@ def register_voip_endpoints(app: func.FunctionApp):
                 
             if not target_user_id:
                 return func.HttpResponse(
-                    json.dumps({
-                        "error": "User ID is required. Provide via 'userId' parameter or set TARGET_USER_ID environment variable.",
-                        "example": "?userId=8:acs:..."
-                    }),
+                    _USER_ID_REQUIRED_BODY,
                     status_code=400,
                     mimetype="application/json"
                 )
             
             # Create the VoIP call using the VoIP calling module
-            call_result = create_voip_call(
+            call_result = await create_voip_call_async(
                 target_user_id=target_user_id,
                 custom_message=custom_message,
                 custom_voice=custom_voice
             )
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
             status_code = 200 if call_result['success'] else 500
             
             return func.HttpResponse(
-                json.dumps(call_result, indent=2),
+                orjson.dumps(call_result, option=orjson.OPT_INDENT_2),
                 status_code=status_code,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error in make_voip_call: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.error("Error in make_voip_call: %s", e)
             
-            return func.HttpResponse(
-                json.dumps({
-                    "success": False,
-                    "error": f"Failed to create VoIP call: {str(e)}",
-                    "call_type": "VoIP"
-                }),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return error_response(_CORS_HEADERS, f"Failed to create VoIP call: {str(e)}", success=False, call_type="VoIP")
 
     @app.route(route="voip_call_webhook", methods=["POST"])
     def voip_call_webhook(req: func.HttpRequest) -> func.HttpResponse:
@@ -115,114 +97,99 @@ def register_voip_endpoints(app: func.FunctionApp):
         logging.info('VoIP call webhook called')
         
         try:
-            # Get the event data
-            event_data = req.get_body().decode('utf-8')
-            logging.info(f"Raw VoIP webhook event data: {event_data}")
+            body = req.get_body()
             
-            # Parse the JSON event
-            events = json.loads(event_data)
-            if not isinstance(events, list):
-                events = [events]
+            # Answer Event Grid subscription validation handshakes directly
+            if req.headers.get('aeg-event-type') == 'SubscriptionValidation':
+                validation_events = orjson.loads(body)
+                validation_event = validation_events[0] if isinstance(validation_events, list) else validation_events
+                return func.HttpResponse(
+                    orjson.dumps({"validationResponse": validation_event.get('data', {}).get('validationCode')}),
+                    status_code=200,
+                    mimetype="application/json"
+                )
             
-            # Process each event using the VoIP calling module
-            for event in events:
-                success = handle_voip_webhook_event(event)
-                if not success:
-                    logging.warning(f"Failed to handle VoIP event: {event.get('type', 'Unknown')}")
+            # Skip parsing deliveries that carry no event we act on
+            if not any(marker in body for marker in _ACTIONABLE_EVENT_MARKERS):
+                logging.info("No actionable VoIP events in webhook payload (%d bytes), skipping", len(body))
+                return func.HttpResponse(
+                    "VoIP webhook processed successfully",
+                    status_code=200
+                )
+            
+            # Dump the raw payload only when debugging; it can be several KB
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Raw VoIP webhook event data: %s", body.decode('utf-8'))
+            
+            # Parse the JSON event straight from the raw bytes
+            events = orjson.loads(body)
+            events = events if isinstance(events, list) else [events]
+            
+            # Process the batch using the VoIP calling module
+            for event in handle_voip_webhook_events(events):
+                logging.warning("Failed to handle VoIP event: %s", event.get('type', 'Unknown'))
             
             return func.HttpResponse(
                 "VoIP webhook processed successfully",
                 status_code=200
             )
             
-        except json.JSONDecodeError as json_error:
-            logging.error(f"Invalid JSON in VoIP webhook request: {str(json_error)}")
+        except orjson.JSONDecodeError as json_error:
+            logging.error("Invalid JSON in VoIP webhook request: %s", json_error)
             return func.HttpResponse(
                 "Invalid JSON in request body",
                 status_code=400
             )
             
         except Exception as e:
-            logging.error(f"Error processing VoIP webhook: {str(e)}")
+            logging.error("Error processing VoIP webhook: %s", e)
             return func.HttpResponse(
                 f"Error processing VoIP webhook: {str(e)}",
                 status_code=500
             )
 
     @app.route(route="make_test_call", methods=["GET", "POST", "OPTIONS"])
-    def make_test_call(req: func.HttpRequest) -> func.HttpResponse:
+    async def make_test_call(req: func.HttpRequest) -> func.HttpResponse:
         """Create a test VoIP call without webhook dependencies"""
         # Handle CORS preflight requests
         if req.method == "OPTIONS":
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            }
-            return func.HttpResponse("", status_code=200, headers=headers)
+            return _PREFLIGHT_RESPONSE
         
         logging.info('Test VoIP call (no webhook) endpoint called')
         
         try:
-            # Get parameters
-            target_user_id = req.params.get('userId')
-            custom_message = req.params.get('message')
-            custom_voice = req.params.get('voice')
-            delay_seconds = int(req.params.get('delay', '3'))
-            
-            # Check request body for POST requests
-            if req.method == "POST":
-                try:
-                    req_body = req.get_json()
-                    if req_body:
-                        target_user_id = target_user_id or req_body.get('userId')
-                        custom_message = custom_message or req_body.get('message')
-                        custom_voice = custom_voice or req_body.get('voice')
-                        delay_seconds = req_body.get('delay', delay_seconds)
-                except ValueError:
-                    pass
+            # Get parameters from query string or request body
+            params = request_params(req)
+            target_user_id = params.get('userId')
+            custom_message = params.get('message')
+            custom_voice = params.get('voice')
+            try:
+                delay_seconds = int(params.get('delay', 3))
+            except (TypeError, ValueError):
+                delay_seconds = 3
+            delay_seconds = max(0, min(delay_seconds, MAX_PLAY_DELAY_SECONDS))
             
             # Create the test call using the VoIP calling module
-            call_result = create_test_voip_call_no_webhook(
+            call_result = await create_test_voip_call_no_webhook(
                 target_user_id=target_user_id,
                 custom_message=custom_message,
                 custom_voice=custom_voice,
                 delay_seconds=delay_seconds
             )
             
-            # Add CORS headers
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            
-            status_code = 200 if call_result['success'] else 500
+            if call_result['success']:
+                status_code = 200
+            else:
+                status_code = 503 if call_result.get('retryable') else 500
             
             return func.HttpResponse(
-                json.dumps(call_result, indent=2),
+                orjson.dumps(call_result, option=orjson.OPT_INDENT_2),
                 status_code=status_code,
                 mimetype="application/json",
-                headers=headers
+                headers=_CORS_HEADERS
             )
             
         except Exception as e:
-            logging.error(f"Error in make_test_call: {str(e)}")
-            
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            logging.error("Error in make_test_call: %s", e)
             
-            return func.HttpResponse(
-                json.dumps({
-                    "success": False,
-                    "error": f"Failed to create test call: {str(e)}",
-                    "call_type": "VoIP-Test"
-                }),
-                status_code=500,
-                mimetype="application/json",
-                headers=headers
-            )
+            return error_response(_CORS_HEADERS, f"Failed to create test call: {str(e)}", success=False, call_type="VoIP-Test")
@@ -5,16 +5,31 @@ Enhanced with medication adherence tracking and bot.js-style patient records
 """
 
 import os
-import json
+import re
 import time
+import random
+import asyncio
 import logging
-from typing import Optional, Dict, List
+import functools
+import threading
+from typing import Optional, Dict, List, Tuple, AsyncIterator
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
-# Azure Cosmos DB imports
-from azure.cosmos import CosmosClient, PartitionKey
-from azure.cosmos.exceptions import CosmosResourceExistsError, CosmosResourceNotFoundError
+import aiohttp
+import orjson
+from cachetools import TTLCache
+from ulid import ULID
+from azure.core import MatchConditions
+from azure.core.pipeline.transport import AioHttpTransport
+
+# Azure Cosmos DB imports (async client, so queries never block the Functions event loop)
+from azure.cosmos import PartitionKey
+from azure.cosmos.aio import CosmosClient
+from azure.cosmos.exceptions import (
+    CosmosResourceExistsError, CosmosResourceNotFoundError, CosmosBatchOperationError, CosmosHttpResponseError,
+    CosmosAccessConditionFailedError
+)
 
 # Import bot configuration
 from bot_config import MedicationAdherenceState, bot_config
@@ -25,6 +40,292 @@ COSMOS_DATABASE_NAME = "nursevoiceagentdb"
 COSMOS_PATIENTS_CONTAINER = "patients"
 COSMOS_APPOINTMENTS_CONTAINER = "appointments"
 
+# Seconds a patient/appointment read is served from memory before going back to Cosmos DB
+PATIENT_CACHE_TTL = int(os.environ.get("PATIENT_CACHE_TTL", "30"))
+
+# Shared client connection pool: connections stay open between invocations on a warm
+# instance, so bursts skip the TCP/TLS handshake
+COSMOS_MAX_CONNECTIONS = int(os.environ.get("COSMOS_MAX_CONNECTIONS", "100"))
+COSMOS_KEEPALIVE_SECONDS = int(os.environ.get("COSMOS_KEEPALIVE_SECONDS", "120"))
+COSMOS_REQUEST_TIMEOUT = int(os.environ.get("COSMOS_REQUEST_TIMEOUT", "5"))
+
+# Regions to route requests to, nearest first (comma-separated). Defaults to the region the
+# Function App runs in (REGION_NAME), so a geo-replicated account is served without a cross-region hop
+COSMOS_PREFERRED_REGIONS = [
+    region.strip()
+    for region in os.environ.get("COSMOS_PREFERRED_REGIONS", os.environ.get("REGION_NAME", "")).split(",")
+    if region.strip()
+]
+
+# Session consistency is what the integrated cache needs and is the usual account default
+COSMOS_CONSISTENCY_LEVEL = os.environ.get("COSMOS_CONSISTENCY_LEVEL", "Session")
+
+# Staleness the Cosmos DB integrated cache may serve for GET reads; 0 disables it. Only takes
+# effect when COSMOS_CONNECTION_STRING points at a dedicated gateway (*.sqlx.cosmos.azure.com)
+COSMOS_INTEGRATED_CACHE_STALENESS_MS = int(os.environ.get("COSMOS_INTEGRATED_CACHE_STALENESS_MS", "0"))
+_CACHED_READ_OPTIONS = (
+    {"max_integrated_cache_staleness_in_ms": COSMOS_INTEGRATED_CACHE_STALENESS_MS}
+    if COSMOS_INTEGRATED_CACHE_STALENESS_MS > 0 else {}
+)
+
+# Cosmos DB accepts at most 10 operations in a single patch request
+MAX_PATCH_OPERATIONS = 10
+
+# Cosmos DB accepts at most 100 operations and a 2 MB payload in a single transactional batch;
+# the byte budget leaves headroom for the batch envelope around the documents
+MAX_BATCH_OPERATIONS = 100
+MAX_BATCH_BYTES = 1_900_000
+
+# Parallelism for cross-partition bulk writes
+BULK_MAX_CONCURRENCY = 64
+
+# Retries for requests Cosmos DB throttles with 429 before the error is surfaced
+MAX_THROTTLE_RETRIES = 5
+THROTTLE_MAX_BACKOFF_MS = 5000
+
+# Attempts for a read-modify-write before a concurrent writer's 412 is surfaced
+MAX_CONFLICT_RETRIES = 3
+
+# Index only the properties the queries filter or sort on (id is always indexed);
+# every other property is excluded so writes stop paying RUs to index it
+PATIENTS_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "includedPaths": [{"path": "/patientId/?"}, {"path": "/createdAt/?"}],
+    "excludedPaths": [{"path": "/*"}],
+    # Serves the patient list's "ORDER BY c.createdAt DESC, c.id DESC" and its keyset predicate
+    "compositeIndexes": [[
+        {"path": "/createdAt", "order": "descending"},
+        {"path": "/id", "order": "descending"}
+    ]]
+}
+APPOINTMENTS_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "includedPaths": [{"path": "/patientId/?"}, {"path": "/createdAt/?"}, {"path": "/appointmentDate/?"}],
+    "excludedPaths": [{"path": "/*"}],
+    # Serves "WHERE c.patientId = @patientId ORDER BY c.appointmentDate" in index order, without a sort
+    "compositeIndexes": [[
+        {"path": "/patientId", "order": "ascending"},
+        {"path": "/appointmentDate", "order": "ascending"}
+    ]]
+}
+
+
+class DocumentNotFoundError(Exception):
+    """The patient or appointment an operation targets does not exist"""
+
+
+def _caused_by(error: BaseException, error_types) -> bool:
+    """Whether an exception or any exception on its cause/context chain is one of error_types"""
+    while error is not None:
+        if isinstance(error, error_types):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_not_found_error(error: BaseException) -> bool:
+    """Whether an error from CosmosDBManager means the document does not exist"""
+    return _caused_by(error, (DocumentNotFoundError, CosmosResourceNotFoundError))
+
+
+def is_precondition_failed_error(error: BaseException) -> bool:
+    """Whether a conditional (If-Match) write was rejected because the document changed"""
+    return _caused_by(error, CosmosAccessConditionFailedError)
+
+
+def _throttling_error(error: BaseException) -> Optional[CosmosHttpResponseError]:
+    """
+    Return the 429 CosmosHttpResponseError behind an exception, if any
+    Manager methods re-raise SDK errors as plain Exceptions inside their except
+    blocks, so the original is found on the implicit exception context chain
+    """
+    while error is not None:
+        if isinstance(error, CosmosHttpResponseError) and error.status_code == 429:
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def cosmos_retry(max_retries: int = MAX_THROTTLE_RETRIES):
+    """
+    Decorator for async Cosmos DB operations: retry throttled (429) calls after the
+    delay Cosmos DB asks for in x-ms-retry-after-ms, falling back to exponential backoff
+    """
+    def decorator(operation):
+        @functools.wraps(operation)
+        async def wrapper(*args, **kwargs):
+            for attempt in range(max_retries + 1):
+                try:
+                    return await operation(*args, **kwargs)
+                except Exception as e:
+                    throttled = _throttling_error(e)
+                    if throttled is None or attempt == max_retries:
+                        raise
+                    headers = throttled.response.headers if throttled.response is not None else {}
+                    retry_after_ms = headers.get('x-ms-retry-after-ms')
+                    if retry_after_ms:
+                        retry_after_ms = float(retry_after_ms)
+                    else:
+                        # No hint from the service: capped exponential backoff with full jitter
+                        retry_after_ms = random.uniform(0, min(THROTTLE_MAX_BACKOFF_MS, 100 * 2 ** attempt))
+                    logging.warning("Cosmos DB throttled %s, retrying in %.0f ms", operation.__name__, retry_after_ms)
+                    await asyncio.sleep(retry_after_ms / 1000)
+        return wrapper
+    return decorator
+
+
+async def _retry_throttled(operation):
+    """Await operation(), retrying 429 responses after the delay Cosmos DB asks for"""
+    return await cosmos_retry()(operation)()
+
+
+async def _read_page(query_iterable, continuation_token: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """
+    Read one page of a query instead of following every continuation
+    Returns (items, continuation_token); the token is None once the results are exhausted
+    """
+    pages = query_iterable.by_page(continuation_token)
+    try:
+        page = await pages.__anext__()
+    except StopAsyncIteration:
+        return [], None
+    items = [item async for item in page]
+    return items, pages.continuation_token
+
+
+async def _query_feed_ranges(container, query: str, parameters: Optional[list] = None, **options) -> list:
+    """
+    Run a cross-partition query as one concurrent query per feed range and concatenate the results
+    Only for queries without ORDER BY, TOP or OFFSET; an aggregate comes back as one value per
+    range, which the caller combines (e.g. sums COUNT(1))
+    """
+    feed_ranges = await container.read_feed_ranges()
+    
+    async def collect(feed_range) -> list:
+        return [item async for item in container.query_items(
+            query=query,
+            parameters=parameters,
+            feed_range=feed_range,
+            **options
+        )]
+    
+    results = await asyncio.gather(*(collect(feed_range) for feed_range in feed_ranges))
+    return [item for items in results for item in items]
+
+
+def _batch_chunks(documents: List[dict]) -> List[List[dict]]:
+    """Split documents into transactional-batch sized chunks: at most MAX_BATCH_OPERATIONS each and MAX_BATCH_BYTES of JSON"""
+    chunks, chunk, chunk_bytes = [], [], 0
+    for document in documents:
+        size = len(orjson.dumps(document))
+        if chunk and (len(chunk) == MAX_BATCH_OPERATIONS or chunk_bytes + size > MAX_BATCH_BYTES):
+            chunks.append(chunk)
+            chunk, chunk_bytes = [], 0
+        chunk.append(document)
+        chunk_bytes += size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def build_patch_operations(updates: dict, immutable_fields: tuple = ('id',)) -> List[dict]:
+    """
+    Build 'set' patch operations for top-level field updates, plus the updatedAt stamp
+    System properties (_rid, _self, _etag, _attachments, _ts) that a client echoes back from a
+    GET are skipped: Cosmos DB rejects patch operations on them
+    """
+    operations = [
+        # Field names become JSON Pointer segments, so escape '~' and '/'
+        {"op": "set", "path": "/" + key.replace('~', '~0').replace('/', '~1'), "value": value}
+        for key, value in updates.items() if key not in immutable_fields and not key.startswith('_')
+    ]
+    operations.append({"op": "set", "path": "/updatedAt", "value": int(time.time())})
+    return operations
+
+
+# Property names a caller may project; anything else could not be spliced into SQL safely
+_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _projection(fields: Optional[List[str]]) -> str:
+    """
+    SELECT list for a query: every property when no fields are given, otherwise just those
+    fields plus id and patientId. Raises ValueError for names that are not plain identifiers
+    """
+    if not fields:
+        return "*"
+    names = dict.fromkeys(['id', 'patientId', *fields])
+    invalid = [name for name in names if not _FIELD_NAME.match(name)]
+    if invalid:
+        raise ValueError(f"Invalid field names: {', '.join(invalid)}")
+    return ", ".join(f"c.{name}" for name in names)
+
+
+def new_document_id() -> str:
+    """
+    Default id for a new document: a ULID, unique across concurrent creates and
+    lexicographically ordered by creation time
+    """
+    return str(ULID())
+
+
+def _match_condition(etag: Optional[str]) -> dict:
+    """Keyword arguments making a write conditional on the document's etag (If-Match), if one is given"""
+    return {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+
+
+async def _patch_document(container, item_id: str, partition_key: str, operations: List[dict],
+                          etag: Optional[str] = None) -> dict:
+    """
+    Apply patch operations server-side, without reading the document first
+    More operations than one patch request accepts are split into consecutive patches of a
+    single transactional batch, so the update still lands atomically; only the first patch
+    carries the etag condition, as the later ones see the version it wrote
+    """
+    if len(operations) <= MAX_PATCH_OPERATIONS:
+        return await container.patch_item(
+            item=item_id, partition_key=partition_key, patch_operations=operations, **_match_condition(etag)
+        )
+    batch = [
+        ("patch", (item_id, operations[start:start + MAX_PATCH_OPERATIONS]))
+        for start in range(0, len(operations), MAX_PATCH_OPERATIONS)
+    ]
+    if etag:
+        batch[0] = (*batch[0], {"if_match_etag": etag})
+    try:
+        results = await container.execute_item_batch(batch_operations=batch, partition_key=partition_key)
+    except CosmosBatchOperationError as e:
+        # Surface a missing document or stale etag as the same errors a single patch raises
+        if e.status_code == 404:
+            raise CosmosResourceNotFoundError(status_code=404, message=str(e))
+        if e.status_code == 412:
+            raise CosmosAccessConditionFailedError(status_code=412, message=str(e))
+        raise
+    return results[-1]['resourceBody']
+
+
+async def _update_document(container, item_id: str, partition_key: str, updates: dict,
+                           etag: Optional[str] = None, immutable_fields: tuple = ('id', 'patientId')) -> dict:
+    """
+    Apply top-level field updates as server-side patch operations
+    When Cosmos DB rejects the patch (400, an update patch cannot express) the document is read
+    and replaced instead, conditional on the given etag or else on the version that was read
+    """
+    try:
+        return await _patch_document(
+            container, item_id, partition_key, build_patch_operations(updates, immutable_fields), etag
+        )
+    except (CosmosHttpResponseError, CosmosBatchOperationError) as e:
+        if e.status_code != 400:
+            raise
+        logging.info("Patch rejected for %s, replacing the document instead: %s", item_id, e)
+    document = await container.read_item(item=item_id, partition_key=partition_key)
+    document.update(
+        (key, value) for key, value in updates.items() if key not in immutable_fields and not key.startswith('_')
+    )
+    document['updatedAt'] = int(time.time())
+    return await container.replace_item(item=item_id, body=document, **_match_condition(etag or document['_etag']))
+
 
 @dataclass
 class MedicationInfo:
@@ -79,9 +380,17 @@ class PatientRecord:
     conversation_notes: List[str] = field(default_factory=list)
     escalation_history: List[str] = field(default_factory=list)
     
-    # Metadata
-    created_at: int = field(default_factory=lambda: int(time.time()))
-    updated_at: int = field(default_factory=lambda: int(time.time()))
+    # Metadata (both default to one clock reading taken at construction)
+    created_at: Optional[int] = None
+    updated_at: Optional[int] = None
+    
+    def __post_init__(self):
+        if self.created_at is None or self.updated_at is None:
+            now = int(time.time())
+            if self.created_at is None:
+                self.created_at = now
+            if self.updated_at is None:
+                self.updated_at = now
     
     def to_dict(self) -> dict:
         """Convert patient record to dictionary for Cosmos DB storage"""
@@ -193,8 +502,9 @@ class PatientRecord:
             escalation_history=data.get('escalationHistory', []),
             
             # Metadata
-            created_at=data.get('createdAt', int(time.time())),
-            updated_at=data.get('updatedAt', int(time.time()))
+            # Missing timestamps are filled in from one clock reading by __post_init__
+            created_at=data.get('createdAt'),
+            updated_at=data.get('updatedAt')
         )
     
     def get_full_name(self) -> str:
@@ -231,10 +541,11 @@ class PatientRecord:
     
     def add_conversation_note(self, note: str):
         """Add a conversation note"""
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
         self.conversation_notes.append(f"{timestamp}: {note}")
         self.last_contact_date = timestamp
-        self.updated_at = int(time.time())
+        self.updated_at = int(now.timestamp())
     
     def add_adherence_concern(self, concern: str):
         """Add an adherence concern"""
@@ -243,6 +554,48 @@ class PatientRecord:
         self.updated_at = int(time.time())
 
 
+class _PooledAioHttpTransport(AioHttpTransport):
+    """
+    AioHttpTransport whose aiohttp session uses the tuned keep-alive connection pool
+    The session is only built in open(), inside the coroutine making the first request:
+    the client itself may be constructed from a sync handler on a thread with no event loop
+    """
+    
+    async def open(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=COSMOS_MAX_CONNECTIONS, keepalive_timeout=COSMOS_KEEPALIVE_SECONDS
+                ),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                auto_decompress=False,
+                trust_env=True
+            )
+        await super().open()
+
+
+# The one CosmosClient of the process: every manager and invocation shares its connection pool
+_COSMOS_CLIENT: Optional[CosmosClient] = None
+_COSMOS_CLIENT_LOCK = threading.Lock()
+
+
+def _get_cosmos_client() -> CosmosClient:
+    """Return the process-wide Cosmos DB client, creating it on first use"""
+    global _COSMOS_CLIENT
+    if _COSMOS_CLIENT is None:
+        with _COSMOS_CLIENT_LOCK:
+            if _COSMOS_CLIENT is None:
+                _COSMOS_CLIENT = CosmosClient.from_connection_string(
+                    COSMOS_CONNECTION_STRING,
+                    consistency_level=COSMOS_CONSISTENCY_LEVEL,
+                    connection_timeout=COSMOS_REQUEST_TIMEOUT,
+                    preferred_locations=COSMOS_PREFERRED_REGIONS or None,
+                    user_agent="voicepoc",
+                    transport=_PooledAioHttpTransport(session_owner=True)
+                )
+    return _COSMOS_CLIENT
+
+
 class CosmosDBManager:
     """
     Azure Cosmos DB manager for healthcare application
@@ -251,7 +604,10 @@ class CosmosDBManager:
     """
     
     def __init__(self):
-        """Initialize Cosmos DB client with connection string"""
+        """
+        Bind to the process-wide async Cosmos DB client and its database/container clients
+        Construction does no I/O; the pooled keep-alive connections open on the first request
+        """
         if not COSMOS_CONNECTION_STRING:
             logging.warning("COSMOS_CONNECTION_STRING not configured")
             self.client = None
@@ -261,23 +617,97 @@ class CosmosDBManager:
             return
             
         try:
-            self.client = CosmosClient.from_connection_string(COSMOS_CONNECTION_STRING)
+            self.client = _get_cosmos_client()
             self.database = self.client.get_database_client(COSMOS_DATABASE_NAME)
             self.patients_container = self.database.get_container_client(COSMOS_PATIENTS_CONTAINER)
             self.appointments_container = self.database.get_container_client(COSMOS_APPOINTMENTS_CONTAINER)
             logging.info("CosmosDB client initialized successfully")
         except Exception as e:
-            logging.error(f"Failed to initialize CosmosDB client: {str(e)}")
+            logging.error("Failed to initialize CosmosDB client: %s", e)
             self.client = None
             self.database = None
             self.patients_container = None
             self.appointments_container = None
     
+    # Recent point reads keyed "p:<patient_id>" / "a:<patient_id>:<appointment_id>".
+    # Only touched from the worker's event loop, so no lock is needed.
+    _read_cache: TTLCache = TTLCache(maxsize=1024, ttl=PATIENT_CACHE_TTL)
+    
+    # Partition key (patientId) of appointments this worker has seen, keyed by appointment id,
+    # so find_appointment can point-read instead of fanning out to every partition.
+    # patientId never changes, so entries only go stale on delete. Event-loop only, like _read_cache.
+    _appointment_partitions: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+    
+    # Whether this worker has applied the indexing policies, which the patient list's
+    # two-property ORDER BY needs on containers created before the composite index
+    _containers_ensured: bool = False
+    
+    def _remember_partitions(self, appointments: list):
+        """Record the patientId of each appointment document for later lookups by id"""
+        for appointment in appointments:
+            if appointment and appointment.get('patientId') is not None:
+                self._appointment_partitions[appointment['id']] = appointment['patientId']
+    
     def is_connected(self) -> bool:
         """Check if Cosmos DB is properly connected"""
         return self.client is not None
     
+    async def close(self):
+        """
+        Close the shared Cosmos DB client and its connection pool
+        Only for scripts that own their event loop; handlers never close it, and in the
+        Functions worker the pool lives until the process exits
+        """
+        if self.client is not None:
+            await self.client.close()
+    
+    async def ensure_containers(self):
+        """
+        Create the database and containers with their indexing policies if they do not exist
+        Idempotent; an existing container whose composite indexes differ from the policy gets the
+        policy applied, which the list queries' multi-property ORDER BY clauses depend on.
+        Runs on its own before a worker's first patient list query
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        await self.client.create_database_if_not_exists(id=COSMOS_DATABASE_NAME)
+        for container_id, indexing_policy in (
+            (COSMOS_PATIENTS_CONTAINER, PATIENTS_INDEXING_POLICY),
+            (COSMOS_APPOINTMENTS_CONTAINER, APPOINTMENTS_INDEXING_POLICY)
+        ):
+            container = await self.database.create_container_if_not_exists(
+                id=container_id,
+                partition_key=PartitionKey(path="/patientId"),
+                indexing_policy=indexing_policy
+            )
+            properties = await container.read()
+            if properties.get('indexingPolicy', {}).get('compositeIndexes', []) != indexing_policy['compositeIndexes']:
+                # Existing container from before the composite index: re-index in the background
+                await self.database.replace_container(
+                    container,
+                    partition_key=PartitionKey(path="/patientId"),
+                    indexing_policy=indexing_policy
+                )
+                logging.info("Applied the current indexing policy to container %s", container_id)
+        logging.info("CosmosDB database and containers are provisioned")
+    
+    async def _ensure_containers_once(self):
+        """
+        Run ensure_containers before this worker's first patient list query, so deploying
+        needs no manual migration step; a failure is logged and tried again on the next query
+        """
+        if self._containers_ensured:
+            return
+        self._containers_ensured = True
+        try:
+            await self.ensure_containers()
+        except Exception as e:
+            self._containers_ensured = False
+            logging.warning("Could not apply the Cosmos DB indexing policies: %s", e)
+    
     # Enhanced Patient Management Methods with Medication Adherence
+    @cosmos_retry()
     async def create_patient_record(self, patient_record: PatientRecord) -> dict:
         """Create a new enhanced patient record with medication adherence tracking"""
         if not self.is_connected():
@@ -285,159 +715,353 @@ class CosmosDBManager:
         
         try:
             patient_dict = patient_record.to_dict()
-            response = self.patients_container.create_item(body=patient_dict)
-            logging.info(f"Enhanced patient record created successfully: {patient_record.id}")
+            response = await self.patients_container.create_item(body=patient_dict)
+            logging.info("Enhanced patient record created successfully: %s", patient_record.id)
             return response
         except CosmosResourceExistsError:
             raise Exception(f"Patient with ID {patient_record.id} already exists")
         except Exception as e:
-            logging.error(f"Error creating enhanced patient record: {str(e)}")
+            logging.error("Error creating enhanced patient record: %s", e)
             raise Exception(f"Failed to create patient record: {str(e)}")
     
+    @cosmos_retry()
     async def get_patient_record(self, patient_id: str) -> PatientRecord:
         """Get enhanced patient record by ID"""
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
-            response = self.patients_container.read_item(item=patient_id, partition_key=patient_id)
+            response = await self.patients_container.read_item(item=patient_id, partition_key=patient_id)
             patient_record = PatientRecord.from_dict(response)
-            logging.info(f"Enhanced patient record retrieved successfully: {patient_id}")
+            logging.info("Enhanced patient record retrieved successfully: %s", patient_id)
             return patient_record
         except CosmosResourceNotFoundError:
-            raise Exception(f"Patient with ID {patient_id} not found")
+            raise DocumentNotFoundError(f"Patient with ID {patient_id} not found")
         except Exception as e:
-            logging.error(f"Error retrieving patient record: {str(e)}")
+            logging.error("Error retrieving patient record: %s", e)
             raise Exception(f"Failed to retrieve patient record: {str(e)}")
     
-    async def update_patient_record(self, patient_record: PatientRecord) -> dict:
-        """Update enhanced patient record with medication adherence tracking"""
+    @cosmos_retry()
+    async def update_patient_record(self, patient_record: PatientRecord, etag: Optional[str] = None) -> dict:
+        """
+        Update enhanced patient record with medication adherence tracking
+        With an etag the record is replaced only if it is still at that version
+        """
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
             patient_record.updated_at = int(time.time())
             patient_dict = patient_record.to_dict()
-            response = self.patients_container.replace_item(item=patient_record.id, body=patient_dict)
-            logging.info(f"Enhanced patient record updated successfully: {patient_record.id}")
+            response = await self.patients_container.replace_item(
+                item=patient_record.id, body=patient_dict, **_match_condition(etag)
+            )
+            self._read_cache.pop(f"p:{patient_record.id}", None)
+            logging.info("Enhanced patient record updated successfully: %s", patient_record.id)
             return response
         except Exception as e:
-            logging.error(f"Error updating patient record: {str(e)}")
+            logging.error("Error updating patient record: %s", e)
             raise Exception(f"Failed to update patient record: {str(e)}")
     
     async def update_medication_adherence_state(self, patient_id: str, new_state: MedicationAdherenceState) -> dict:
-        """Update patient's medication adherence state"""
-        patient_record = await self.get_patient_record(patient_id)
-        patient_record.update_adherence_state(new_state)
-        return await self.update_patient_record(patient_record)
+        """Update patient's medication adherence state with a single patch, without reading the record"""
+        return await self.update_patient(patient_id, {'adherenceState': new_state.value})
     
     async def mark_medication_pickup(self, patient_id: str, medication_name: str, pickup_date: str) -> dict:
         """Mark a medication as picked up for a patient"""
-        patient_record = await self.get_patient_record(patient_id)
-        patient_record.mark_medication_picked_up(medication_name, pickup_date)
-        return await self.update_patient_record(patient_record)
+        return await self._modify_patient_record(
+            patient_id, lambda record: record.mark_medication_picked_up(medication_name, pickup_date)
+        )
     
+    async def _modify_patient_record(self, patient_id: str, modify) -> dict:
+        """
+        Read-modify-write a PatientRecord under optimistic concurrency
+        The replace is conditional on the etag that was read; when a concurrent writer got in
+        first (412) the record is re-read and modify re-applied, up to MAX_CONFLICT_RETRIES times.
+        Throttling is retried per call (the read here, the replace in update_patient_record),
+        never around the whole loop
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            try:
+                document = await _retry_throttled(
+                    lambda: self.patients_container.read_item(item=patient_id, partition_key=patient_id)
+                )
+            except CosmosResourceNotFoundError:
+                raise DocumentNotFoundError(f"Patient with ID {patient_id} not found")
+            patient_record = PatientRecord.from_dict(document)
+            modify(patient_record)
+            try:
+                return await self.update_patient_record(patient_record, etag=document['_etag'])
+            except Exception as e:
+                if not is_precondition_failed_error(e) or attempt == MAX_CONFLICT_RETRIES - 1:
+                    raise
+                logging.info("Patient %s changed concurrently, retrying update", patient_id)
+    
+    @cosmos_retry()
     async def add_patient_conversation_note(self, patient_id: str, note: str) -> dict:
-        """Add a conversation note to patient record"""
-        patient_record = await self.get_patient_record(patient_id)
-        patient_record.add_conversation_note(note)
-        return await self.update_patient_record(patient_record)
+        """
+        Add a conversation note to patient record
+        The note is appended server-side with a patch, so the record is neither read nor rewritten.
+        Patients created through create_patient have no conversationNotes array, which the
+        append cannot target; the array is then created holding just this note
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        try:
+            # One clock reading for the note, lastContactDate and updatedAt
+            now = datetime.now()
+            timestamp = now.isoformat()
+            entry = f"{timestamp}: {note}"
+            stamps = [
+                {"op": "set", "path": "/lastContactDate", "value": timestamp},
+                {"op": "set", "path": "/updatedAt", "value": int(now.timestamp())}
+            ]
+            append = [{"op": "add", "path": "/conversationNotes/-", "value": entry}, *stamps]
+            try:
+                response = await _patch_document(self.patients_container, patient_id, patient_id, append)
+            except CosmosHttpResponseError as e:
+                if e.status_code != 400:
+                    raise
+                try:
+                    # No array to append to: create it, unless a concurrent note just did
+                    response = await self.patients_container.patch_item(
+                        item=patient_id, partition_key=patient_id,
+                        patch_operations=[{"op": "set", "path": "/conversationNotes", "value": [entry]}, *stamps],
+                        filter_predicate="FROM c WHERE NOT IS_DEFINED(c.conversationNotes)"
+                    )
+                except CosmosAccessConditionFailedError:
+                    response = await _patch_document(self.patients_container, patient_id, patient_id, append)
+            self._read_cache[f"p:{patient_id}"] = response
+            logging.info("Conversation note added for patient: %s", patient_id)
+            return dict(response)
+        except Exception as e:
+            logging.error("Error adding conversation note: %s", e)
+            raise Exception(f"Failed to add conversation note: {str(e)}")
     
     # Legacy Patient Management Methods (for backward compatibility)
+    @cosmos_retry()
     async def create_patient(self, patient_data: dict) -> dict:
         """Create a new patient record (legacy method)"""
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
+            now = int(time.time())
+            
             # Ensure required fields
             if 'id' not in patient_data:
-                patient_data['id'] = patient_data.get('patientId', str(int(time.time())))
+                patient_data['id'] = patient_data.get('patientId') or new_document_id()
             if 'patientId' not in patient_data:
                 patient_data['patientId'] = patient_data['id']
                 
             # Add metadata
-            patient_data['createdAt'] = int(time.time())
-            patient_data['updatedAt'] = int(time.time())
+            patient_data['createdAt'] = patient_data['updatedAt'] = now
             
-            response = self.patients_container.create_item(body=patient_data)
-            logging.info(f"Patient created successfully: {patient_data['id']}")
+            response = await self.patients_container.create_item(body=patient_data)
+            logging.info("Patient created successfully: %s", patient_data['id'])
             return response
         except CosmosResourceExistsError:
             raise Exception(f"Patient with ID {patient_data['id']} already exists")
         except Exception as e:
-            logging.error(f"Error creating patient: {str(e)}")
+            logging.error("Error creating patient: %s", e)
             raise Exception(f"Failed to create patient: {str(e)}")
     
+    @cosmos_retry()
     async def get_patient(self, patient_id: str) -> dict:
         """Get a patient by ID (legacy method)"""
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
+        cached = self._read_cache.get(f"p:{patient_id}")
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            response = self.patients_container.read_item(item=patient_id, partition_key=patient_id)
-            logging.info(f"Patient retrieved successfully: {patient_id}")
-            return response
+            response = await self.patients_container.read_item(
+                item=patient_id, partition_key=patient_id, **_CACHED_READ_OPTIONS
+            )
+            self._read_cache[f"p:{patient_id}"] = response
+            logging.info("Patient retrieved successfully: %s", patient_id)
+            return dict(response)
         except CosmosResourceNotFoundError:
-            raise Exception(f"Patient with ID {patient_id} not found")
+            raise DocumentNotFoundError(f"Patient with ID {patient_id} not found")
         except Exception as e:
-            logging.error(f"Error retrieving patient: {str(e)}")
+            logging.error("Error retrieving patient: %s", e)
             raise Exception(f"Failed to retrieve patient: {str(e)}")
     
-    async def update_patient(self, patient_id: str, updates: dict) -> dict:
-        """Update an existing patient record (legacy method)"""
+    @cosmos_retry()
+    async def update_patient(self, patient_id: str, updates: dict, etag: Optional[str] = None) -> dict:
+        """
+        Update an existing patient record (legacy method)
+        With an etag the update is applied only if the document is still at that version
+        """
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
-            # First get the existing patient
-            existing_patient = await self.get_patient(patient_id)
-            
-            # Update fields
-            existing_patient.update(updates)
-            existing_patient['updatedAt'] = int(time.time())
-            
-            response = self.patients_container.replace_item(item=patient_id, body=existing_patient)
-            logging.info(f"Patient updated successfully: {patient_id}")
-            return response
+            # Partial update: one round-trip, only the changed fields are sent
+            response = await _update_document(self.patients_container, patient_id, patient_id, updates, etag)
+            # The write returns the whole document, so keep it for the next read
+            self._read_cache[f"p:{patient_id}"] = response
+            logging.info("Patient updated successfully: %s", patient_id)
+            return dict(response)
         except Exception as e:
-            logging.error(f"Error updating patient: {str(e)}")
+            logging.error("Error updating patient: %s", e)
             raise Exception(f"Failed to update patient: {str(e)}")
     
+    @cosmos_retry()
     async def delete_patient(self, patient_id: str) -> bool:
         """Delete a patient record"""
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
-            self.patients_container.delete_item(item=patient_id, partition_key=patient_id)
-            logging.info(f"Patient deleted successfully: {patient_id}")
+            await self.patients_container.delete_item(item=patient_id, partition_key=patient_id)
+            self._read_cache.pop(f"p:{patient_id}", None)
+            logging.info("Patient deleted successfully: %s", patient_id)
             return True
         except CosmosResourceNotFoundError:
-            raise Exception(f"Patient with ID {patient_id} not found")
+            raise DocumentNotFoundError(f"Patient with ID {patient_id} not found")
         except Exception as e:
-            logging.error(f"Error deleting patient: {str(e)}")
+            logging.error("Error deleting patient: %s", e)
             raise Exception(f"Failed to delete patient: {str(e)}")
     
+    async def bulk_upsert_patients(self, patient_docs: List[dict]) -> list:
+        """
+        Upsert many patient documents concurrently (each in its own partition, so they
+        cannot share a transactional batch), bounded to BULK_MAX_CONCURRENCY in flight
+        Returns one entry per document: the stored document, or the Exception it raised
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        semaphore = asyncio.Semaphore(BULK_MAX_CONCURRENCY)
+        now = int(time.time())
+        
+        async def upsert(patient_doc: dict) -> dict:
+            patient_doc['updatedAt'] = now
+            async with semaphore:
+                return await _retry_throttled(lambda: self.patients_container.upsert_item(body=patient_doc))
+        
+        results = await asyncio.gather(*(upsert(doc) for doc in patient_docs), return_exceptions=True)
+        for patient_doc in patient_docs:
+            self._read_cache.pop(f"p:{patient_doc.get('id')}", None)
+        
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        logging.info("Bulk upserted %s patients (%s failed)", len(results) - failed, failed)
+        return results
+    
+    @cosmos_retry()
     async def list_patients(self, limit: int = 100) -> list:
-        """List all patients with optional limit"""
+        """
+        List the most recently created patients, newest first
+        Fetches a single page of at most `limit` documents; TOP lets every partition
+        stop after `limit` rows instead of streaming its whole range for the merge
+        """
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
-            query = "SELECT * FROM c ORDER BY c.createdAt DESC"
-            items = list(self.patients_container.query_items(
+            query = "SELECT TOP @limit * FROM c ORDER BY c.createdAt DESC"
+            items, _ = await _read_page(self.patients_container.query_items(
                 query=query,
+                parameters=[{"name": "@limit", "value": limit}],
                 max_item_count=limit,
-                enable_cross_partition_query=True
+                **_CACHED_READ_OPTIONS
             ))
-            logging.info(f"Retrieved {len(items)} patients")
+            logging.info("Retrieved %s patients", len(items))
             return items
         except Exception as e:
-            logging.error(f"Error listing patients: {str(e)}")
+            logging.error("Error listing patients: %s", e)
+            raise Exception(f"Failed to list patients: {str(e)}")
+    
+    async def iter_patients(self, limit: Optional[int] = None, page_size: int = 100) -> AsyncIterator[dict]:
+        """
+        Stream patients newest first, page by page, stopping after `limit` if given
+        Callers start on the first page while later pages are still unfetched, and at most
+        one page is held in memory; collect with [p async for p in ...] when a list is needed
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        await self._ensure_containers_once()
+        if limit is not None:
+            page_size = min(page_size, limit)
+        query_iterable = self.patients_container.query_items(
+            query="SELECT * FROM c ORDER BY c.createdAt DESC, c.id DESC",
+            max_item_count=page_size,
+            **_CACHED_READ_OPTIONS
+        )
+        count = 0
+        try:
+            async for page in query_iterable.by_page():
+                async for item in page:
+                    yield item
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+        except CosmosHttpResponseError as e:
+            logging.error("Error streaming patients: %s", e)
+            raise Exception(f"Failed to list patients: {str(e)}")
+    
+    @cosmos_retry()
+    async def count_patients(self) -> int:
+        """Count all patients, one concurrent COUNT per feed range, summed here"""
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        try:
+            counts = await _query_feed_ranges(self.patients_container, "SELECT VALUE COUNT(1) FROM c")
+            return sum(counts)
+        except Exception as e:
+            logging.error("Error counting patients: %s", e)
+            raise Exception(f"Failed to count patients: {str(e)}")
+    
+    @cosmos_retry()
+    async def list_patients_page(self, page_size: int = 100, continuation_token: Optional[str] = None,
+                                 fields: Optional[List[str]] = None,
+                                 after: Optional[Tuple[int, str]] = None) -> Tuple[list, Optional[str]]:
+        """
+        Get one page of patients, newest first (ties broken by id)
+        Returns (patients, continuation_token); pass the token back to resume where the
+        previous page stopped instead of re-scanning the pages already returned.
+        Alternatively pass after=(createdAt, id) of the last patient seen: the keyset predicate
+        seeks straight to the next page through the composite index, at the same RU cost at
+        any depth. With fields, only those properties (plus id, patientId and createdAt) are returned
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        await self._ensure_containers_once()
+        try:
+            projection = _projection([*fields, 'createdAt'] if fields else None)
+            query = f"SELECT {projection} FROM c"
+            parameters = None
+            if after is not None:
+                query += " WHERE c.createdAt < @afterCreatedAt OR (c.createdAt = @afterCreatedAt AND c.id < @afterId)"
+                parameters = [
+                    {"name": "@afterCreatedAt", "value": after[0]},
+                    {"name": "@afterId", "value": after[1]}
+                ]
+            query += " ORDER BY c.createdAt DESC, c.id DESC"
+            items, next_token = await _read_page(self.patients_container.query_items(
+                query=query,
+                parameters=parameters,
+                max_item_count=page_size,
+                **_CACHED_READ_OPTIONS
+            ), continuation_token)
+            logging.info("Retrieved %s patients", len(items))
+            return items, next_token
+        except Exception as e:
+            logging.error("Error listing patients: %s", e)
             raise Exception(f"Failed to list patients: {str(e)}")
 
     # Appointment Management Methods (keeping existing functionality)
+    @cosmos_retry()
     async def create_appointment(self, appointment_data: dict) -> dict:
         """Create a new appointment"""
         if not self.is_connected():
@@ -446,55 +1070,287 @@ class CosmosDBManager:
         try:
             # Ensure required fields
             if 'id' not in appointment_data:
-                appointment_data['id'] = str(int(time.time()))
+                appointment_data['id'] = new_document_id()
             if 'patientId' not in appointment_data:
                 raise Exception("patientId is required for appointments")
                 
             # Add metadata
-            appointment_data['createdAt'] = int(time.time())
-            appointment_data['updatedAt'] = int(time.time())
+            appointment_data['createdAt'] = appointment_data['updatedAt'] = int(time.time())
             
-            response = self.appointments_container.create_item(body=appointment_data)
-            logging.info(f"Appointment created successfully: {appointment_data['id']}")
+            response = await self.appointments_container.create_item(body=appointment_data)
+            self._remember_partitions([response])
+            logging.info("Appointment created successfully: %s", appointment_data['id'])
             return response
         except Exception as e:
-            logging.error(f"Error creating appointment: {str(e)}")
+            logging.error("Error creating appointment: %s", e)
             raise Exception(f"Failed to create appointment: {str(e)}")
     
+    async def create_appointments_bulk(self, appointments: List[dict], patient_id: Optional[str] = None) -> List[dict]:
+        """
+        Create several appointments with one transactional batch per patient partition
+        (chunked to the 100-operation / 2 MB batch limits) instead of one request per document.
+        With patient_id, appointments that carry no patientId are filed under that patient
+        Batches for different partitions run concurrently, bounded to BULK_MAX_CONCURRENCY;
+        each batch is atomic, so a failure leaves only other partitions' batches committed
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        now = int(time.time())
+        by_patient: Dict[str, List[dict]] = {}
+        for appointment_data in appointments:
+            if patient_id is not None:
+                appointment_data.setdefault('patientId', patient_id)
+            if 'patientId' not in appointment_data:
+                raise Exception("patientId is required for appointments")
+            appointment_data.setdefault('id', new_document_id())
+            appointment_data['createdAt'] = now
+            appointment_data['updatedAt'] = now
+            by_patient.setdefault(appointment_data['patientId'], []).append(appointment_data)
+        
+        semaphore = asyncio.Semaphore(BULK_MAX_CONCURRENCY)
+        
+        async def run_batch(partition: str, chunk: List[dict]) -> list:
+            async with semaphore:
+                results = await _retry_throttled(lambda: self.appointments_container.execute_item_batch(
+                    batch_operations=[("create", (appointment_data,)) for appointment_data in chunk],
+                    partition_key=partition
+                ))
+            created = [result.get('resourceBody') for result in results]
+            self._remember_partitions(created)
+            return created
+        
+        batches = [
+            (partition, chunk)
+            for partition, patient_appointments in by_patient.items()
+            for chunk in _batch_chunks(patient_appointments)
+        ]
+        outcomes = await asyncio.gather(*(run_batch(*batch) for batch in batches), return_exceptions=True)
+        
+        created = [doc for outcome in outcomes if not isinstance(outcome, BaseException) for doc in outcome]
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if not errors:
+            logging.info("Created %s appointments for %s patients in %s batches", len(created), len(by_patient), len(batches))
+            return created
+        
+        e = errors[0]
+        if isinstance(e, CosmosBatchOperationError):
+            failed = e.operation_responses[e.error_index] if e.operation_responses else {}
+            logging.error("Appointment batch failed at operation %s: %s", e.error_index, failed.get('statusCode'))
+            raise Exception(
+                f"Failed to create appointments: operation {e.error_index} returned status {failed.get('statusCode')} "
+                f"({len(errors)} of {len(batches)} batches failed, {len(created)} appointments created)"
+            )
+        logging.error("Error creating appointments in bulk: %s", e)
+        raise Exception(
+            f"Failed to create appointments: {str(e)} "
+            f"({len(errors)} of {len(batches)} batches failed, {len(created)} appointments created)"
+        )
+    
+    @cosmos_retry()
     async def get_appointment(self, appointment_id: str, patient_id: str) -> dict:
         """Get an appointment by ID"""
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
+        cached = self._read_cache.get(f"a:{patient_id}:{appointment_id}")
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            response = self.appointments_container.read_item(item=appointment_id, partition_key=patient_id)
-            logging.info(f"Appointment retrieved successfully: {appointment_id}")
-            return response
+            response = await self.appointments_container.read_item(
+                item=appointment_id, partition_key=patient_id, **_CACHED_READ_OPTIONS
+            )
+            self._read_cache[f"a:{patient_id}:{appointment_id}"] = response
+            self._remember_partitions([response])
+            logging.info("Appointment retrieved successfully: %s", appointment_id)
+            return dict(response)
         except CosmosResourceNotFoundError:
-            raise Exception(f"Appointment with ID {appointment_id} not found")
+            raise DocumentNotFoundError(f"Appointment with ID {appointment_id} not found")
         except Exception as e:
-            logging.error(f"Error retrieving appointment: {str(e)}")
+            logging.error("Error retrieving appointment: %s", e)
             raise Exception(f"Failed to retrieve appointment: {str(e)}")
     
-    async def get_patient_appointments(self, patient_id: str) -> list:
-        """Get all appointments for a patient"""
+    @cosmos_retry()
+    async def update_appointment(self, appointment_id: str, patient_id: str, updates: dict,
+                                 etag: Optional[str] = None) -> dict:
+        """
+        Update an existing appointment in the given patient's partition
+        With an etag the update is applied only if the document is still at that version
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        try:
+            # Partial update: one round-trip, only the changed fields are sent
+            response = await _update_document(
+                self.appointments_container, appointment_id, patient_id, updates, etag
+            )
+            # The write returns the whole document, so keep it for the next read
+            self._read_cache[f"a:{patient_id}:{appointment_id}"] = response
+            logging.info("Appointment updated successfully: %s", appointment_id)
+            return dict(response)
+        except Exception as e:
+            logging.error("Error updating appointment: %s", e)
+            raise Exception(f"Failed to update appointment: {str(e)}")
+    
+    async def find_appointment(self, appointment_id: str) -> dict:
+        """
+        Find an appointment by ID when its patient (partition key) is not known
+        An appointment this worker has already seen is point-read from its partition; otherwise
+        every partition is queried concurrently rather than walked one after another.
+        Throttling is retried by the point read or around the query, not around both
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        patient_id = self._appointment_partitions.get(appointment_id)
+        if patient_id is not None:
+            try:
+                return await self.get_appointment(appointment_id, patient_id)
+            except DocumentNotFoundError:
+                self._appointment_partitions.pop(appointment_id, None)
+        
+        try:
+            items = await _retry_throttled(lambda: _query_feed_ranges(
+                self.appointments_container,
+                "SELECT * FROM c WHERE c.id = @appointment_id",
+                [{"name": "@appointment_id", "value": appointment_id}],
+                **_CACHED_READ_OPTIONS
+            ))
+        except Exception as e:
+            logging.error("Error finding appointment: %s", e)
+            raise Exception(f"Failed to find appointment: {str(e)}")
+        if not items:
+            raise DocumentNotFoundError(f"Appointment with ID {appointment_id} not found")
+        appointment = items[0]
+        self._read_cache[f"a:{appointment.get('patientId')}:{appointment_id}"] = appointment
+        self._remember_partitions([appointment])
+        return dict(appointment)
+    
+    @cosmos_retry()
+    async def delete_appointment(self, appointment_id: str, patient_id: str) -> bool:
+        """Delete an appointment from the given patient's partition"""
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        try:
+            await self.appointments_container.delete_item(item=appointment_id, partition_key=patient_id)
+            self._read_cache.pop(f"a:{patient_id}:{appointment_id}", None)
+            self._appointment_partitions.pop(appointment_id, None)
+            logging.info("Appointment deleted successfully: %s", appointment_id)
+            return True
+        except CosmosResourceNotFoundError:
+            raise DocumentNotFoundError(f"Appointment with ID {appointment_id} not found")
+        except Exception as e:
+            logging.error("Error deleting appointment: %s", e)
+            raise Exception(f"Failed to delete appointment: {str(e)}")
+    
+    @cosmos_retry()
+    async def count_appointments(self, patient_id: Optional[str] = None) -> int:
+        """
+        Count appointments, for one patient (a single-partition query) or across all
+        partitions (one concurrent COUNT per feed range, summed here)
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        try:
+            query = "SELECT VALUE COUNT(1) FROM c"
+            if patient_id:
+                counts = [count async for count in self.appointments_container.query_items(
+                    query=query,
+                    partition_key=patient_id
+                )]
+            else:
+                counts = await _query_feed_ranges(self.appointments_container, query)
+            return sum(counts)
+        except Exception as e:
+            logging.error("Error counting appointments: %s", e)
+            raise Exception(f"Failed to count appointments: {str(e)}")
+    
+    @cosmos_retry()
+    async def list_appointments_page(self, page_size: int = 100, continuation_token: Optional[str] = None,
+                                     fields: Optional[List[str]] = None) -> Tuple[list, Optional[str]]:
+        """
+        Get one page of all patients' appointments, ordered by appointment date
+        Returns (appointments, continuation_token); pass the token back to fetch the next page
+        """
         if not self.is_connected():
             raise Exception("Cosmos DB not connected")
         
         try:
-            query = "SELECT * FROM c WHERE c.patientId = @patientId ORDER BY c.createdAt DESC"
+            query = f"SELECT {_projection(fields)} FROM c ORDER BY c.appointmentDate ASC"
+            items, next_token = await _read_page(self.appointments_container.query_items(
+                query=query,
+                max_item_count=page_size,
+                **_CACHED_READ_OPTIONS
+            ), continuation_token)
+            self._remember_partitions(items)
+            logging.info("Retrieved %s appointments", len(items))
+            return items, next_token
+        except Exception as e:
+            logging.error("Error listing appointments: %s", e)
+            raise Exception(f"Failed to list appointments: {str(e)}")
+    
+    @cosmos_retry()
+    async def get_patient_appointments(self, patient_id: str, page_size: int = 100,
+                                       continuation_token: Optional[str] = None,
+                                       fields: Optional[List[str]] = None) -> Tuple[list, Optional[str]]:
+        """
+        Get one page of a patient's appointments, ordered by appointment date
+        Returns (appointments, continuation_token); pass the token back to fetch the next page.
+        With fields, only those properties (plus id and patientId) are returned
+        """
+        if not self.is_connected():
+            raise Exception("Cosmos DB not connected")
+        
+        try:
+            query = f"SELECT {_projection(fields)} FROM c WHERE c.patientId = @patientId ORDER BY c.appointmentDate ASC"
             parameters = [{"name": "@patientId", "value": patient_id}]
-            items = list(self.appointments_container.query_items(
+            items, next_token = await _read_page(self.appointments_container.query_items(
                 query=query,
                 parameters=parameters,
-                enable_cross_partition_query=True
-            ))
-            logging.info(f"Retrieved {len(items)} appointments for patient {patient_id}")
-            return items
+                partition_key=patient_id,
+                max_item_count=page_size,
+                **_CACHED_READ_OPTIONS
+            ), continuation_token)
+            self._remember_partitions(items)
+            logging.info("Retrieved %s appointments for patient %s", len(items), patient_id)
+            return items, next_token
         except Exception as e:
-            logging.error(f"Error retrieving patient appointments: {str(e)}")
+            logging.error("Error retrieving patient appointments: %s", e)
             raise Exception(f"Failed to retrieve patient appointments: {str(e)}")
 
 
+_COSMOS_MANAGER: Optional[CosmosDBManager] = None
+
+
+def get_cosmos_manager() -> CosmosDBManager:
+    """
+    Return the shared CosmosDBManager, creating its client on first use
+    A manager whose client failed to build is not kept, so the next call tries again
+    """
+    global _COSMOS_MANAGER
+    if _COSMOS_MANAGER is not None:
+        return _COSMOS_MANAGER
+    manager = CosmosDBManager()
+    if manager.is_connected() or not COSMOS_CONNECTION_STRING:
+        _COSMOS_MANAGER = manager
+    return manager
+
+
+class _LazyCosmosDBManager:
+    """
+    Stand-in for the shared CosmosDBManager that defers client construction to the
+    first attribute access, so cold starts serving ACS-only endpoints skip it. That first
+    access may come from a sync handler on a worker thread; construction does no I/O and
+    the connection pool is only opened by the first awaited request
+    """
+    
+    def __getattr__(self, name):
+        return getattr(get_cosmos_manager(), name)
+
+
 # Global instance
-cosmos_manager = CosmosDBManager()
+cosmos_manager = _LazyCosmosDBManager()
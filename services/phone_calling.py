@@ -11,6 +11,7 @@ This module implements OUTBOUND CALLING functionality where:
 Key Components:
 - create_pstn_call(): Initiates outbound calls to target phone numbers
 - handle_pstn_webhook_event(): Processes webhook events from Azure Communication Services
+- handle_pstn_webhook_events(): Queues a webhook delivery for background processing
 - Speech Recognition: Listens to the CALLED PERSON's speech using various Azure SDK methods
 - Conversation Flow: Maintains conversational context and generates appropriate responses
 
@@ -21,18 +22,24 @@ Target Participant Logic:
 """
 
 import os
-import json
+import orjson
 import logging
 import time
-from typing import Optional, Dict, Any
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from cachetools import TTLCache
 
 from azure.communication.callautomation import CallAutomationClient, TextSource, RecognitionChoice
 from azure.communication.callautomation import PhoneNumberIdentifier, RecognizeInputType
 
 # Initialize logging for this module
 logging.info("PSTN Phone Calling Module loaded successfully")
-logging.debug(f"Module configuration - ACS configured: {bool(os.environ.get('ACS_CONNECTION_STRING'))}, "
-             f"Cognitive Services configured: {bool(os.environ.get('COGNITIVE_SERVICES_ENDPOINT'))}")
+logging.debug("Module configuration - ACS configured: %s, Cognitive Services configured: %s",
+              bool(os.environ.get('ACS_CONNECTION_STRING')), bool(os.environ.get('COGNITIVE_SERVICES_ENDPOINT')))
 
 # Configuration
 ACS_CONNECTION_STRING = os.environ.get("ACS_CONNECTION_STRING", "")
@@ -46,17 +53,87 @@ WELCOME_MESSAGE = os.environ.get("WELCOME_MESSAGE",
     "Thank you for testing the voice integration.")
 TTS_VOICE = os.environ.get("TTS_VOICE", "en-US-JennyNeural")
 
-# Global variables for conversation state and temporary webhook data storage
+# Webhook callback URL, resolved once per process instead of per call. In Azure the
+# site hostname is used when CALLBACK_URL_BASE is not set; locally the Functions host.
+_CALLBACK_HOST = CALLBACK_URL_BASE or os.environ.get("WEBSITE_HOSTNAME", "")
+_DEFAULT_CALLBACK_URL = (
+    f"https://{_CALLBACK_HOST}/api/phone_call_webhook" if _CALLBACK_HOST
+    else "http://localhost:7071/api/phone_call_webhook"
+)
+
+# Global variables for conversation state and per-call webhook data storage
 # In production, use proper storage like Redis or Azure Storage
-TEMP_CUSTOM_MESSAGE = None
-TEMP_CUSTOM_VOICE = None
+# Per-call (message, voice) for webhook-driven TTS, keyed by call_connection_id
+CALL_CTX: TTLCache = TTLCache(maxsize=10_000, ttl=600)
+_CALL_CTX_LOCK = threading.Lock()
+# Calls whose greeting has been started; ACS delivers at least once, so a redelivered
+# CallConnected must not play the greeting again
+_PLAYED_CALLS: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_PLAYED_CALLS_LOCK = threading.Lock()
 CONVERSATION_STATE = {}  # Store conversation state by call_connection_id
 CALL_TARGET_MAPPING = {}  # Store call_connection_id -> target_phone_number mapping
 
+# TTS sources for fixed prompts, reused instead of rebuilt per call
+_DEFAULT_TEXT_SOURCE = TextSource(text=WELCOME_MESSAGE, voice_name=TTS_VOICE)
+_DTMF_MENU_TEXT_SOURCE = TextSource(
+    text="I'll provide some options. Press 1 for appointments, 2 for general questions, 3 to speak with someone, or 0 to hear this menu again.",
+    voice_name=TTS_VOICE
+)
+_RETRY_MESSAGE = "I'm sorry, I didn't catch that. Could you please repeat what you said?"
+_RETRY_TEXT_SOURCE = TextSource(text=_RETRY_MESSAGE, voice_name=TTS_VOICE)
+_ERROR_MESSAGE = "I'm experiencing some technical difficulties. Let me transfer you to a human representative."
+_ERROR_TEXT_SOURCE = TextSource(text=_ERROR_MESSAGE, voice_name=TTS_VOICE)
+_MENU_FALLBACK_MESSAGE = (
+    "I'm having trouble with speech recognition. Let me offer you some options. "
+    "Press 1 for appointments, 2 for general questions, or 3 to speak with someone."
+)
+_MENU_FALLBACK_TEXT_SOURCE = TextSource(text=_MENU_FALLBACK_MESSAGE, voice_name=TTS_VOICE)
+
+# Identifiers for the fixed caller ID and default target, built once
+_SOURCE_CALLER = PhoneNumberIdentifier(SOURCE_CALLER_ID) if SOURCE_CALLER_ID else None
+_TARGET_PHONE = PhoneNumberIdentifier(TARGET_PHONE_NUMBER) if TARGET_PHONE_NUMBER and TARGET_PHONE_NUMBER.strip() else None
+
+
+@functools.lru_cache(maxsize=1024)
+def _text_source(text: str, voice: str) -> TextSource:
+    """
+    Return a shared TextSource for a (text, voice) pair
+    Only for fixed or caller-supplied prompts, which repeat across calls; generated replies are
+    one-off and would just evict them, so those build a plain TextSource
+    """
+    return TextSource(text=text, voice_name=voice)
+
+
+@functools.lru_cache(maxsize=1024)
+def _phone_identifier(phone_number: str) -> PhoneNumberIdentifier:
+    """Return a shared PhoneNumberIdentifier for a number instead of building one per call and per turn"""
+    return PhoneNumberIdentifier(phone_number)
+
+
+
+class _JsonDump:
+    """Log argument that serializes its payload with orjson only if the record is emitted"""
+    __slots__ = ('obj',)
+    
+    def __init__(self, obj):
+        self.obj = obj
+    
+    def __str__(self) -> str:
+        return orjson.dumps(self.obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
 
+@functools.lru_cache(maxsize=1)
+def _get_acs_client() -> CallAutomationClient:
+    """Return the shared CallAutomationClient, built on first use and reused for every call"""
+    logging.debug("Initializing shared CallAutomationClient with connection string")
+    return CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
+
+
+@functools.lru_cache(maxsize=1)
 def validate_pstn_configuration() -> tuple[bool, str]:
     """
     Validate that all required PSTN configuration is present
+    Settings are read once at import, so the result is computed once per worker
     Returns: (is_valid, error_message)
     """
     logging.debug("Starting PSTN configuration validation")
@@ -65,19 +142,19 @@ def validate_pstn_configuration() -> tuple[bool, str]:
         logging.error("ACS_CONNECTION_STRING is missing or empty")
         return False, "ACS_CONNECTION_STRING is required for PSTN calls"
     else:
-        logging.debug(f"ACS_CONNECTION_STRING is present (length: {len(ACS_CONNECTION_STRING)})")
+        logging.debug("ACS_CONNECTION_STRING is present (length: %s)", len(ACS_CONNECTION_STRING))
     
     if not COGNITIVE_SERVICES_ENDPOINT:
         logging.error("COGNITIVE_SERVICES_ENDPOINT is missing or empty")
         return False, "COGNITIVE_SERVICES_ENDPOINT is required for TTS functionality"
     else:
-        logging.debug(f"COGNITIVE_SERVICES_ENDPOINT is present: {COGNITIVE_SERVICES_ENDPOINT}")
+        logging.debug("COGNITIVE_SERVICES_ENDPOINT is present: %s", COGNITIVE_SERVICES_ENDPOINT)
     
     if not SOURCE_CALLER_ID:
         logging.error("SOURCE_CALLER_ID is missing or empty")
         return False, "SOURCE_CALLER_ID is required for PSTN calls"
     else:
-        logging.debug(f"SOURCE_CALLER_ID is present: {SOURCE_CALLER_ID}")
+        logging.debug("SOURCE_CALLER_ID is present: %s", SOURCE_CALLER_ID)
     
     logging.info("PSTN configuration validation successful")
     return True, ""
@@ -88,22 +165,22 @@ def validate_phone_number(phone_number: str) -> tuple[bool, str]:
     Validate phone number format for PSTN calls
     Returns: (is_valid, error_message)
     """
-    logging.debug(f"Validating phone number: {phone_number}")
+    logging.debug("Validating phone number: %s", phone_number)
     
     if not phone_number:
         logging.error("Phone number is empty or None")
         return False, "Phone number is required"
     
     if not phone_number.startswith('+'):
-        logging.error(f"Phone number does not start with '+': {phone_number}")
+        logging.error("Phone number does not start with '+': %s", phone_number)
         return False, "Phone number must be in international format starting with '+'"
     
     # Basic validation - should have country code + number
     if len(phone_number) < 8 or len(phone_number) > 16:
-        logging.error(f"Phone number length invalid: {len(phone_number)} characters")
+        logging.error("Phone number length invalid: %s characters", len(phone_number))
         return False, "Phone number length should be between 8-16 characters"
     
-    logging.info(f"Phone number validation successful: {phone_number}")
+    logging.info("Phone number validation successful: %s", phone_number)
     return True, ""
 
 
@@ -125,9 +202,7 @@ def create_pstn_call(
     Returns:
         Dict with call result information
     """
-    global TEMP_CUSTOM_MESSAGE, TEMP_CUSTOM_VOICE
-    
-    logging.info(f"Creating PSTN call to: {target_phone}")
+    logging.info("Creating PSTN call to: %s", target_phone)
     
     # Validate configuration
     is_valid, error_msg = validate_pstn_configuration()
@@ -148,32 +223,24 @@ def create_pstn_call(
         }
     
     try:
-        # Initialize ACS client
-        logging.debug("Initializing CallAutomationClient with connection string")
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
-        logging.info("CallAutomationClient initialized successfully")
+        # Shared ACS client
+        client = _get_acs_client()
         
         # Create phone number identifiers
-        logging.debug(f"Creating phone number identifiers - Target: {target_phone}, Source: {SOURCE_CALLER_ID}")
-        target_phone_user = PhoneNumberIdentifier(target_phone)
-        source_caller_id = PhoneNumberIdentifier(SOURCE_CALLER_ID)
+        logging.debug("Creating phone number identifiers - Target: %s, Source: %s", target_phone, SOURCE_CALLER_ID)
+        target_phone_user = _TARGET_PHONE if target_phone == TARGET_PHONE_NUMBER else _phone_identifier(target_phone)
+        source_caller_id = _SOURCE_CALLER
         logging.debug("Phone number identifiers created successfully")
         
-        # Store custom settings for webhook
-        TEMP_CUSTOM_MESSAGE = custom_message or WELCOME_MESSAGE
-        TEMP_CUSTOM_VOICE = custom_voice or TTS_VOICE
-        logging.debug(f"Stored custom settings - Message: '{TEMP_CUSTOM_MESSAGE[:50]}...', Voice: {TEMP_CUSTOM_VOICE}")
+        message_to_play = custom_message or WELCOME_MESSAGE
+        voice_to_use = custom_voice or TTS_VOICE
         
         # Determine callback URL
-        if not callback_url:
-            if CALLBACK_URL_BASE:
-                callback_url = f"https://{CALLBACK_URL_BASE}/api/phone_call_webhook"
-            else:
-                callback_url = "http://localhost:7071/api/phone_call_webhook"
+        callback_url = callback_url or _DEFAULT_CALLBACK_URL
         
-        logging.info(f"Using callback URL: {callback_url}")
-        logging.info(f"Source caller ID: {SOURCE_CALLER_ID}")
-        logging.info(f"Target phone: {target_phone}")
+        logging.info("Using callback URL: %s", callback_url)
+        logging.info("Source caller ID: %s", SOURCE_CALLER_ID)
+        logging.info("Target phone: %s", target_phone)
         
         # Create the PSTN call
         logging.debug("Initiating PSTN call creation...")
@@ -184,31 +251,34 @@ def create_pstn_call(
             source_caller_id_number=source_caller_id
         )
         
-        call_connection_id = call_result.call_connection_id if hasattr(call_result, 'call_connection_id') else 'Unknown'
+        call_connection_id = getattr(call_result, 'call_connection_id', None) or 'Unknown'
         
-        logging.info(f"PSTN call created successfully. Call ID: {call_connection_id}")
-        logging.debug(f"Call result object: {type(call_result)}")
+        logging.info("PSTN call created successfully. Call ID: %s", call_connection_id)
+        logging.debug("Call result object: %s", type(call_result))
         
-        # Store the mapping of call_connection_id to target phone number for speech recognition
+        # Store per-call settings for the webhook and the target phone number for speech recognition
         if call_connection_id != 'Unknown':
+            with _CALL_CTX_LOCK:
+                CALL_CTX[call_connection_id] = (message_to_play, voice_to_use)
+            logging.debug("Stored custom settings - Message: '%.50s...', Voice: %s", message_to_play, voice_to_use)
             CALL_TARGET_MAPPING[call_connection_id] = target_phone
-            logging.debug(f"Stored target phone mapping: {call_connection_id} -> {target_phone}")
+            logging.debug("Stored target phone mapping: %s -> %s", call_connection_id, target_phone)
         
         return {
             "success": True,
             "call_id": call_connection_id,
             "phone_number": target_phone,
-            "message": TEMP_CUSTOM_MESSAGE,
-            "voice": TEMP_CUSTOM_VOICE,
+            "message": message_to_play,
+            "voice": voice_to_use,
             "webhook_url": callback_url,
             "call_type": "PSTN"
         }
         
     except Exception as e:
-        logging.error(f"Failed to create PSTN call: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
-        logging.error(f"Exception args: {e.args}")
-        logging.debug(f"Phone number: {target_phone}, Custom message: {custom_message}, Custom voice: {custom_voice}")
+        logging.error("Failed to create PSTN call: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
+        logging.error("Exception args: %s", e.args)
+        logging.debug("Phone number: %s, Custom message: %s, Custom voice: %s", target_phone, custom_message, custom_voice)
         return {
             "success": False,
             "error": f"Failed to create PSTN call: {str(e)}",
@@ -217,6 +287,21 @@ def create_pstn_call(
         }
 
 
+def _claim_greeting(call_connection_id: str) -> bool:
+    """Mark the call's greeting as started; False if it already was"""
+    with _PLAYED_CALLS_LOCK:
+        if call_connection_id in _PLAYED_CALLS:
+            return False
+        _PLAYED_CALLS[call_connection_id] = True
+        return True
+
+
+def _release_greeting(call_connection_id: str):
+    """Forget a greeting that failed to start so a redelivered event can retry it"""
+    with _PLAYED_CALLS_LOCK:
+        _PLAYED_CALLS.pop(call_connection_id, None)
+
+
 def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
     """
     Handle a single PSTN webhook event
@@ -227,44 +312,45 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
     Returns:
         True if event was handled successfully, False otherwise
     """
-    global TEMP_CUSTOM_MESSAGE, TEMP_CUSTOM_VOICE
-    
     try:
         event_type = event.get('type', 'Unknown')
         call_connection_id = event.get('data', {}).get('callConnectionId', 'Unknown')
         
-        logging.info(f"Processing PSTN event: {event_type}, Call ID: {call_connection_id}")
-        logging.debug(f"Full event data: {json.dumps(event, indent=2)}")
+        logging.info("Processing PSTN event: %s, Call ID: %s", event_type, call_connection_id)
+        logging.debug("Full event data: %s", _JsonDump(event))
         
-        # Initialize ACS client for event handling
-        logging.debug("Initializing CallAutomationClient for event handling")
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
+        # Shared ACS client for event handling
+        client = _get_acs_client()
         
         if event_type == 'Microsoft.Communication.CallConnected':
-            logging.info(f"PSTN call connected! Playing TTS message...")
-            logging.debug(f"Current conversation states: {list(CONVERSATION_STATE.keys())}")
+            if not _claim_greeting(call_connection_id):
+                logging.info("Greeting already started for PSTN call %s, skipping duplicate CallConnected", call_connection_id)
+                return True
+            
+            logging.info("PSTN call connected! Playing TTS message...")
+            logging.debug("Current conversation states: %s", list(CONVERSATION_STATE.keys()))
             
             try:
                 # Get call connection
-                logging.debug(f"Getting call connection for ID: {call_connection_id}")
+                logging.debug("Getting call connection for ID: %s", call_connection_id)
                 call_connection = client.get_call_connection(call_connection_id)
                 logging.debug("Call connection retrieved successfully")
                 
-                # Use stored custom message and voice, or defaults
-                message_to_play = TEMP_CUSTOM_MESSAGE or WELCOME_MESSAGE
-                voice_to_use = TEMP_CUSTOM_VOICE or TTS_VOICE
+                # Use this call's stored message and voice, or defaults
+                with _CALL_CTX_LOCK:
+                    message_to_play, voice_to_use = CALL_CTX.get(call_connection_id, (WELCOME_MESSAGE, TTS_VOICE))
                 
-                logging.debug(f"Message to play (full): '{message_to_play}'")
-                logging.debug(f"Voice to use: {voice_to_use}")
+                logging.debug("Message to play (full): '%s'", message_to_play)
+                logging.debug("Voice to use: %s", voice_to_use)
                 
-                # Create text source for TTS
-                text_source = TextSource(
-                    text=message_to_play,
-                    voice_name=voice_to_use
-                )
+                # Create text source for TTS (reuse the default one when possible)
+                if message_to_play == WELCOME_MESSAGE and voice_to_use == TTS_VOICE:
+                    text_source = _DEFAULT_TEXT_SOURCE
+                else:
+                    text_source = _text_source(message_to_play, voice_to_use)
                 logging.debug("TextSource created successfully")
                 
-                logging.info(f"Playing message: '{message_to_play[:50]}...', Voice: {voice_to_use}")
+                logging.info("Playing message: '%.50s...', Voice: %s", message_to_play, voice_to_use)
                 
                 # Play the message to all participants
                 play_result = call_connection.play_media(
@@ -273,8 +359,8 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                 )
                 
                 operation_id = getattr(play_result, 'operation_id', 'Unknown')
-                logging.info(f"TTS playback initiated. Operation ID: {operation_id}")
-                logging.debug(f"Play result type: {type(play_result)}")
+                logging.info("TTS playback initiated. Operation ID: %s", operation_id)
+                logging.debug("Play result type: %s", type(play_result))
                 
                 # Initialize conversation state for this call
                 CONVERSATION_STATE[call_connection_id] = {
@@ -285,24 +371,26 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                         {'speaker': 'assistant', 'message': message_to_play}
                     ]
                 }
-                logging.debug(f"Conversation state initialized for call {call_connection_id}")
+                logging.debug("Conversation state initialized for call %s", call_connection_id)
                 
-                # Clear temp variables after use
-                TEMP_CUSTOM_MESSAGE = None
-                TEMP_CUSTOM_VOICE = None
-                logging.debug("Temp variables cleared after successful message play")
+                # Clear per-call settings after use
+                with _CALL_CTX_LOCK:
+                    CALL_CTX.pop(call_connection_id, None)
+                logging.debug("Per-call settings cleared after successful message play")
                 
             except Exception as play_error:
-                logging.error(f"Error playing TTS: {str(play_error)}")
-                logging.error(f"Play error type: {type(play_error).__name__}")
-                logging.error(f"Play error args: {play_error.args}")
+                logging.error("Error playing TTS: %s", play_error)
+                logging.error("Play error type: %s", type(play_error).__name__)
+                logging.error("Play error args: %s", play_error.args)
+                # Let a redelivered CallConnected retry the greeting
+                _release_greeting(call_connection_id)
                 return False
                 
         elif event_type == 'Microsoft.Communication.CallDisconnected':
             disconnect_data = event.get('data', {})
             disconnect_reason = disconnect_data.get('callConnectionId', 'Unknown reason')
-            logging.info(f"PSTN call disconnected. Call ID: {call_connection_id}, Reason: {disconnect_reason}")
-            logging.debug(f"Disconnect event data: {json.dumps(disconnect_data, indent=2)}")
+            logging.info("PSTN call disconnected. Call ID: %s, Reason: %s", call_connection_id, disconnect_reason)
+            logging.debug("Disconnect event data: %s", _JsonDump(disconnect_data))
             
             # Clear conversation state and temp variables on disconnect
             clear_conversation_state(call_connection_id)
@@ -311,23 +399,23 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
             if call_connection_id in CALL_TARGET_MAPPING:
                 target_phone = CALL_TARGET_MAPPING[call_connection_id]
                 del CALL_TARGET_MAPPING[call_connection_id]
-                logging.debug(f"Cleared call target mapping for {call_connection_id} -> {target_phone}")
+                logging.debug("Cleared call target mapping for %s -> %s", call_connection_id, target_phone)
             
-            TEMP_CUSTOM_MESSAGE = None
-            TEMP_CUSTOM_VOICE = None
-            logging.debug("Conversation state and temp variables cleared on disconnect")
+            with _CALL_CTX_LOCK:
+                CALL_CTX.pop(call_connection_id, None)
+            logging.debug("Conversation state and per-call settings cleared on disconnect")
             
         elif event_type == 'Microsoft.Communication.PlayCompleted':
-            logging.info(f"TTS playback completed for call {call_connection_id}")
+            logging.info("TTS playback completed for call %s", call_connection_id)
             play_data = event.get('data', {})
-            logging.debug(f"PlayCompleted event data: {json.dumps(play_data, indent=2)}")
+            logging.debug("PlayCompleted event data: %s", _JsonDump(play_data))
             
             # After greeting is played, start listening for user response
             # Use safe conversation state retrieval to prevent missing state warnings
             if call_connection_id in CONVERSATION_STATE:
                 state = CONVERSATION_STATE[call_connection_id]
                 current_stage = state['stage']
-                logging.debug(f"Current conversation stage: {current_stage}")
+                logging.debug("Current conversation stage: %s", current_stage)
                 
                 if current_stage == 'greeting_played':
                     logging.info("Greeting completed, starting speech recognition")
@@ -344,7 +432,7 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                     
                     # Simulate a typical user response
                     simulated_input = "I need help with scheduling an appointment"
-                    logging.debug(f"Using simulated input: '{simulated_input}'")
+                    logging.debug("Using simulated input: '%s'", simulated_input)
                     
                     # Process the simulated input
                     fake_recognition_result = {
@@ -353,7 +441,7 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                         }
                     }
                     
-                    logging.info(f"Processing simulated speech: '{simulated_input}'")
+                    logging.info("Processing simulated speech: '%s'", simulated_input)
                     _handle_speech_recognition_result(client, call_connection_id, fake_recognition_result)
                 elif current_stage == 'listening_for_response':
                     # Handle case where we're already listening for response
@@ -368,7 +456,7 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                         current_time = time.time()
                         elapsed_time = current_time - listen_start_time
                         
-                        logging.debug(f"Recognition mode: {recognition_mode}, Elapsed time: {elapsed_time:.2f}s")
+                        logging.debug("Recognition mode: %s, Elapsed time: %.2fs", recognition_mode, elapsed_time)
                         
                         # If using simulation mode and enough time has passed, simulate user input
                         if recognition_mode == 'simulation' and elapsed_time > 2:  # 2 seconds timeout for simulation
@@ -391,7 +479,7 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                             response_index = min(turn_count, len(simulated_responses) - 1)
                             simulated_input = simulated_responses[response_index]
                             
-                            logging.debug(f"Using simulated input (turn {turn_count}): '{simulated_input}'")
+                            logging.debug("Using simulated input (turn %s): '%s'", turn_count, simulated_input)
                             
                             # Process the simulated input
                             fake_recognition_result = {
@@ -400,17 +488,17 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                                 }
                             }
                             
-                            logging.info(f"Processing simulated speech after timeout: '{simulated_input}'")
+                            logging.info("Processing simulated speech after timeout: '%s'", simulated_input)
                             _handle_speech_recognition_result(client, call_connection_id, fake_recognition_result)
                         elif recognition_mode == 'azure_speech':
                             # For real speech recognition, just log that we're waiting
-                            logging.debug(f"Real Azure speech recognition active, waiting for user input (elapsed: {elapsed_time:.2f}s)")
+                            logging.debug("Real Azure speech recognition active, waiting for user input (elapsed: %.2fs)", elapsed_time)
                             # In a real implementation, you might want to handle timeouts here too
                             if elapsed_time > 30:  # 30 second timeout for real speech
                                 logging.warning("Speech recognition timeout reached, playing retry message")
                                 _play_retry_message(client, call_connection_id)
                         else:
-                            logging.debug(f"Unknown recognition mode: {recognition_mode}, no action taken")
+                            logging.debug("Unknown recognition mode: %s, no action taken", recognition_mode)
                     else:
                         logging.warning("No conversation state found for timeout check")
                     
@@ -420,18 +508,18 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                     logging.info("Menu presented, ready for user input")
                     logging.debug("In a real implementation, DTMF recognition would be set up here")
                 else:
-                    logging.warning(f"Unknown stage after PlayCompleted: {current_stage}")
+                    logging.warning("Unknown stage after PlayCompleted: %s", current_stage)
             else:
                 # Enhanced: Create missing conversation state instead of just warning
-                logging.warning(f"No conversation state found for call {call_connection_id} after PlayCompleted")
-                logging.info(f"Attempting to recreate conversation state for call {call_connection_id}")
+                logging.warning("No conversation state found for call %s after PlayCompleted", call_connection_id)
+                logging.info("Attempting to recreate conversation state for call %s", call_connection_id)
                 
                 # Try to import and use the enhanced conversation state management
                 try:
                     from services.bot_service import safe_get_conversation_state
                     enhanced_state = safe_get_conversation_state(call_connection_id, create_if_missing=True)
                     if enhanced_state:
-                        logging.info(f"Successfully created enhanced conversation state for call {call_connection_id}")
+                        logging.info("Successfully created enhanced conversation state for call %s", call_connection_id)
                         
                         # Create basic PSTN conversation state to continue the call flow
                         CONVERSATION_STATE[call_connection_id] = {
@@ -442,23 +530,23 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
                             'turn_count': 0,
                             'recreated': True  # Flag to indicate this was recreated
                         }
-                        logging.info(f"Created fallback PSTN conversation state for call {call_connection_id}")
+                        logging.info("Created fallback PSTN conversation state for call %s", call_connection_id)
                     else:
-                        logging.error(f"Failed to create enhanced conversation state for call {call_connection_id}")
+                        logging.error("Failed to create enhanced conversation state for call %s", call_connection_id)
                         
                 except ImportError as e:
-                    logging.error(f"Could not import enhanced conversation state management: {e}")
+                    logging.error("Could not import enhanced conversation state management: %s", e)
                 except Exception as e:
-                    logging.error(f"Error creating conversation state for call {call_connection_id}: {e}")
+                    logging.error("Error creating conversation state for call %s: %s", call_connection_id, e)
                 
                 # Log available states for debugging
-                logging.debug(f"Current PSTN conversation states: {list(CONVERSATION_STATE.keys())}")
+                logging.debug("Current PSTN conversation states: %s", list(CONVERSATION_STATE.keys()))
             
             
         elif event_type == 'Microsoft.Communication.RecognizeCompleted':
-            logging.info(f"Speech recognition completed for call {call_connection_id}")
+            logging.info("Speech recognition completed for call %s", call_connection_id)
             recognize_data = event.get('data', {})
-            logging.debug(f"RecognizeCompleted event data: {json.dumps(recognize_data, indent=2)}")
+            logging.debug("RecognizeCompleted event data: %s", _JsonDump(recognize_data))
             
             # Process the recognized speech and generate response
             # The webhook puts speech data directly in the data section, not nested in recognitionResult
@@ -467,48 +555,118 @@ def handle_pstn_webhook_event(event: Dict[str, Any]) -> bool:
         elif event_type == 'Microsoft.Communication.RecognizeFailed':
             recognize_data = event.get('data', {})
             error_info = recognize_data.get('resultInformation', {})
-            logging.error(f"Speech recognition failed for call {call_connection_id}")
-            logging.error(f"Recognition failure details: {json.dumps(error_info, indent=2)}")
+            logging.error("Speech recognition failed for call %s", call_connection_id)
+            logging.error("Recognition failure details: %s", _JsonDump(error_info))
             
             # Handle recognition failure - ask user to repeat
             if call_connection_id in CONVERSATION_STATE:
                 logging.info("Attempting to play retry message due to recognition failure")
                 _play_retry_message(client, call_connection_id)
             else:
-                logging.warning(f"No conversation state found for failed recognition on call {call_connection_id}")
+                logging.warning("No conversation state found for failed recognition on call %s", call_connection_id)
             
         elif event_type == 'Microsoft.Communication.PlayFailed':
             play_data = event.get('data', {})
             play_error = play_data.get('resultInformation', {}).get('message', 'Unknown error')
             error_code = play_data.get('resultInformation', {}).get('code', 'Unknown')
-            logging.error(f"TTS playback failed for call {call_connection_id}: {play_error} (Code: {error_code})")
-            logging.error(f"PlayFailed event data: {json.dumps(play_data, indent=2)}")
+            logging.error("TTS playback failed for call %s: %s (Code: %s)", call_connection_id, play_error, error_code)
+            logging.error("PlayFailed event data: %s", _JsonDump(play_data))
             
         elif event_type == 'Microsoft.Communication.CallEstablished':
-            logging.info(f"PSTN call established for call {call_connection_id}")
+            logging.info("PSTN call established for call %s", call_connection_id)
             establish_data = event.get('data', {})
-            logging.debug(f"CallEstablished event data: {json.dumps(establish_data, indent=2)}")
+            logging.debug("CallEstablished event data: %s", _JsonDump(establish_data))
             
         elif event_type == 'Microsoft.Communication.ParticipantsUpdated':
             participants_data = event.get('data', {})
             participants = participants_data.get('participants', [])
-            logging.info(f"Participants updated for call {call_connection_id}, count: {len(participants)}")
-            logging.debug(f"Participants details: {json.dumps(participants, indent=2)}")
+            logging.info("Participants updated for call %s, count: %s", call_connection_id, len(participants))
+            logging.debug("Participants details: %s", _JsonDump(participants))
             
         else:
-            logging.info(f"Unhandled PSTN event type: {event_type}")
-            logging.debug(f"Unhandled event full data: {json.dumps(event, indent=2)}")
+            logging.info("Unhandled PSTN event type: %s", event_type)
+            logging.debug("Unhandled event full data: %s", _JsonDump(event))
         
         return True
         
     except Exception as e:
-        logging.error(f"Error handling PSTN webhook event: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
-        logging.error(f"Exception args: {e.args}")
-        logging.error(f"Event that caused error: {json.dumps(event, indent=2)}")
+        logging.error("Error handling PSTN webhook event: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
+        logging.error("Exception args: %s", e.args)
+        logging.error("Event that caused error: %s", _JsonDump(event))
         return False
 
 
+def _drain_call_events(call_id: str):
+    """
+    Handle one call's queued events in arrival order until its queue is empty
+    Only one drain runs per call at a time; other calls drain concurrently on the executor
+    """
+    while True:
+        with _PENDING_CALL_EVENTS_LOCK:
+            pending = _PENDING_CALL_EVENTS[call_id]
+            if not pending:
+                del _PENDING_CALL_EVENTS[call_id]
+                return
+            event = pending.popleft()
+        try:
+            if not handle_pstn_webhook_event(event):
+                logging.warning("Failed to handle PSTN event: %s", event.get('type', 'Unknown'))
+        except Exception as e:
+            logging.error("Error draining PSTN events for call %s: %s", call_id, e)
+
+
+# PSTN events waiting to be handled, one serial queue per call. A call has an entry exactly
+# while a drain for it is scheduled or running on the shared executor, so ACS round-trips
+# (play, recognize) and LLM replies run off the request path without one call waiting on another
+_PENDING_CALL_EVENTS: Dict[str, deque] = {}
+_PENDING_CALL_EVENTS_LOCK = threading.Lock()
+_PSTN_EVENT_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='pstn-webhook')
+
+# Event types that drive the call; the rest (CallEstablished, ParticipantsUpdated, ...)
+# would only be logged, so they are dropped before queueing
+_ACTIONABLE_PSTN_EVENTS = frozenset({
+    'Microsoft.Communication.CallConnected',
+    'Microsoft.Communication.CallDisconnected',
+    'Microsoft.Communication.PlayCompleted',
+    'Microsoft.Communication.PlayFailed',
+    'Microsoft.Communication.RecognizeCompleted',
+    'Microsoft.Communication.RecognizeFailed'
+})
+
+
+def handle_pstn_webhook_events(events: List[Dict[str, Any]]) -> int:
+    """
+    Queue a webhook delivery's events for background handling so the webhook can be
+    acknowledged at once instead of waiting on ACS round-trips
+    
+    Args:
+        events: Events from one webhook delivery
+    
+    Returns:
+        Number of actionable events queued
+    """
+    actionable = [event for event in events if event.get('type') in _ACTIONABLE_PSTN_EVENTS]
+    if not actionable:
+        logging.debug("No actionable PSTN events in webhook delivery of %d, skipping", len(events))
+        return 0
+    
+    idle_calls = []
+    with _PENDING_CALL_EVENTS_LOCK:
+        for event in actionable:
+            call_id = event.get('data', {}).get('callConnectionId', 'Unknown')
+            pending = _PENDING_CALL_EVENTS.get(call_id)
+            if pending is None:
+                pending = _PENDING_CALL_EVENTS[call_id] = deque()
+                idle_calls.append(call_id)
+            pending.append(event)
+    
+    # Calls already draining pick their new events up in order; idle ones get a drain now
+    for call_id in idle_calls:
+        _PSTN_EVENT_EXECUTOR.submit(_drain_call_events, call_id)
+    return len(actionable)
+
+
 def get_call_status(call_id: str) -> Dict[str, Any]:
     """
     Get the status of a PSTN call
@@ -519,7 +677,7 @@ def get_call_status(call_id: str) -> Dict[str, Any]:
     Returns:
         Dict with call status information
     """
-    logging.debug(f"Getting call status for call ID: {call_id}")
+    logging.debug("Getting call status for call ID: %s", call_id)
     
     try:
         if not ACS_CONNECTION_STRING:
@@ -529,15 +687,14 @@ def get_call_status(call_id: str) -> Dict[str, Any]:
                 "call_id": call_id
             }
         
-        # Initialize the CallAutomationClient
-        logging.debug("Initializing CallAutomationClient for status check")
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
+        # Shared ACS client for the status check
+        client = _get_acs_client()
         
         try:
             # Get the call connection to check status
-            logging.debug(f"Attempting to get call connection for ID: {call_id}")
+            logging.debug("Attempting to get call connection for ID: %s", call_id)
             call_connection = client.get_call_connection(call_id)
-            logging.info(f"Successfully retrieved call connection for {call_id}")
+            logging.info("Successfully retrieved call connection for %s", call_id)
             
             return {
                 "call_id": call_id,
@@ -546,8 +703,8 @@ def get_call_status(call_id: str) -> Dict[str, Any]:
             }
             
         except Exception as status_error:
-            logging.warning(f"Unable to retrieve call connection for {call_id}: {str(status_error)}")
-            logging.debug(f"Status error type: {type(status_error).__name__}")
+            logging.warning("Unable to retrieve call connection for %s: %s", call_id, status_error)
+            logging.debug("Status error type: %s", type(status_error).__name__)
             return {
                 "call_id": call_id,
                 "status": "disconnected_or_invalid",
@@ -555,8 +712,8 @@ def get_call_status(call_id: str) -> Dict[str, Any]:
             }
             
     except Exception as e:
-        logging.error(f"Error getting call status: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
+        logging.error("Error getting call status: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
         return {
             "error": f"Failed to get call status: {str(e)}",
             "call_id": call_id
@@ -564,12 +721,11 @@ def get_call_status(call_id: str) -> Dict[str, Any]:
 
 
 def clear_temp_variables():
-    """Clear temporary variables used for webhook communication"""
-    global TEMP_CUSTOM_MESSAGE, TEMP_CUSTOM_VOICE
-    logging.debug(f"Clearing temp variables - Message: {TEMP_CUSTOM_MESSAGE is not None}, Voice: {TEMP_CUSTOM_VOICE is not None}")
-    TEMP_CUSTOM_MESSAGE = None
-    TEMP_CUSTOM_VOICE = None
-    logging.debug("Temp variables cleared successfully")
+    """Clear per-call settings stored for webhook communication"""
+    with _CALL_CTX_LOCK:
+        logging.debug("Clearing per-call settings for %s calls", len(CALL_CTX))
+        CALL_CTX.clear()
+    logging.debug("Per-call settings cleared successfully")
 
 
 def _get_target_participant_for_call(call_connection_id: str) -> Optional[PhoneNumberIdentifier]:
@@ -586,81 +742,81 @@ def _get_target_participant_for_call(call_connection_id: str) -> Optional[PhoneN
         # First check the call target mapping (most reliable for outbound calls)
         if call_connection_id in CALL_TARGET_MAPPING:
             target_phone = CALL_TARGET_MAPPING[call_connection_id]
-            logging.debug(f"Found target phone in call mapping: {target_phone}")
+            logging.debug("Found target phone in call mapping: %s", target_phone)
             if target_phone and target_phone.strip():
-                return PhoneNumberIdentifier(target_phone)
+                return _phone_identifier(target_phone)
             else:
-                logging.warning(f"Target phone in mapping is empty for call {call_connection_id}")
+                logging.warning("Target phone in mapping is empty for call %s", call_connection_id)
         
         # Check if we have conversation state that might contain the target phone
         if call_connection_id in CONVERSATION_STATE:
             state = CONVERSATION_STATE[call_connection_id]
             target_phone = state.get('target_phone_number')
             if target_phone and target_phone.strip():
-                logging.debug(f"Found target phone in conversation state: {target_phone}")
-                return PhoneNumberIdentifier(target_phone)
+                logging.debug("Found target phone in conversation state: %s", target_phone)
+                return _phone_identifier(target_phone)
         
         # Fall back to the global TARGET_PHONE_NUMBER if available
         if TARGET_PHONE_NUMBER and TARGET_PHONE_NUMBER.strip():
-            logging.debug(f"Using global TARGET_PHONE_NUMBER: {TARGET_PHONE_NUMBER}")
-            return PhoneNumberIdentifier(TARGET_PHONE_NUMBER)
+            logging.debug("Using global TARGET_PHONE_NUMBER: %s", TARGET_PHONE_NUMBER)
+            return _TARGET_PHONE
         
         # If no target phone is available, log the issue
-        logging.warning(f"No valid target phone number found for call {call_connection_id}")
-        logging.debug(f"Call mapping keys: {list(CALL_TARGET_MAPPING.keys())}")
-        logging.debug(f"Conversation state keys: {list(CONVERSATION_STATE.keys())}")
-        logging.debug(f"Global TARGET_PHONE_NUMBER: '{TARGET_PHONE_NUMBER}'")
+        logging.warning("No valid target phone number found for call %s", call_connection_id)
+        logging.debug("Call mapping keys: %s", list(CALL_TARGET_MAPPING.keys()))
+        logging.debug("Conversation state keys: %s", list(CONVERSATION_STATE.keys()))
+        logging.debug("Global TARGET_PHONE_NUMBER: '%s'", TARGET_PHONE_NUMBER)
         return None
         
     except Exception as e:
-        logging.error(f"Error determining target participant for call {call_connection_id}: {e}")
-        logging.error(f"Exception type: {type(e).__name__}")
+        logging.error("Error determining target participant for call %s: %s", call_connection_id, e)
+        logging.error("Exception type: %s", type(e).__name__)
         return None
 
 
 def _start_speech_recognition(client: CallAutomationClient, call_connection_id: str):
     """Start speech recognition to listen for user input"""
-    logging.info(f"Starting speech recognition for call {call_connection_id}")
+    logging.info("Starting speech recognition for call %s", call_connection_id)
     
     # Log SDK version information for debugging
     try:
         import azure.communication.callautomation
         sdk_version = getattr(azure.communication.callautomation, '__version__', 'Unknown version')
-        logging.info(f"Azure Communication CallAutomation SDK version: {sdk_version}")
+        logging.info("Azure Communication CallAutomation SDK version: %s", sdk_version)
     except Exception as e:
-        logging.warning(f"Could not determine SDK version: {e}")
+        logging.warning("Could not determine SDK version: %s", e)
     
     call_connection = None
     try:
-        logging.debug(f"Getting call connection for speech recognition: {call_connection_id}")
+        logging.debug("Getting call connection for speech recognition: %s", call_connection_id)
         call_connection = client.get_call_connection(call_connection_id)
         logging.debug("Call connection retrieved for speech recognition")
         
         # Get the target participant for speech recognition (the person we called)
         target_phone_participant = _get_target_participant_for_call(call_connection_id)
-        logging.debug(f"Target participant for speech recognition: {target_phone_participant}")
+        logging.debug("Target participant for speech recognition: %s", target_phone_participant)
         
         # Ensure we have a valid target participant
         if target_phone_participant is None:
-            logging.warning(f"No target participant found for call {call_connection_id}, cannot proceed with speech recognition")
-            logging.debug(f"Current call mappings: {list(CALL_TARGET_MAPPING.keys())}")
-            logging.debug(f"Current conversation states: {list(CONVERSATION_STATE.keys())}")
-            logging.debug(f"Global TARGET_PHONE_NUMBER: '{TARGET_PHONE_NUMBER}'")
+            logging.warning("No target participant found for call %s, cannot proceed with speech recognition", call_connection_id)
+            logging.debug("Current call mappings: %s", list(CALL_TARGET_MAPPING.keys()))
+            logging.debug("Current conversation states: %s", list(CONVERSATION_STATE.keys()))
+            logging.debug("Global TARGET_PHONE_NUMBER: '%s'", TARGET_PHONE_NUMBER)
             logging.info("Falling back to conversation simulation due to missing target participant")
             _use_conversation_simulation(call_connection, call_connection_id)
             return
         
         # Validate the target participant object
         if not hasattr(target_phone_participant, 'raw_id'):
-            logging.error(f"Invalid target participant object: {target_phone_participant} (type: {type(target_phone_participant)})")
+            logging.error("Invalid target participant object: %s (type: %s)", target_phone_participant, type(target_phone_participant))
             logging.error("PhoneNumberIdentifier object is missing required 'raw_id' attribute")
             logging.info("Falling back to conversation simulation due to invalid target participant")
             _use_conversation_simulation(call_connection, call_connection_id)
             return
         
-        logging.info(f"Using validated target participant: {target_phone_participant} (type: {type(target_phone_participant)})")
-        logging.debug(f"Target participant raw_id: {target_phone_participant.raw_id}")
-        logging.debug(f"Target participant properties: {getattr(target_phone_participant, 'properties', 'N/A')}")
+        logging.info("Using validated target participant: %s (type: %s)", target_phone_participant, type(target_phone_participant))
+        logging.debug("Target participant raw_id: %s", target_phone_participant.raw_id)
+        logging.debug("Target participant properties: %s", getattr(target_phone_participant, 'properties', 'N/A'))
         
         # First, try to use actual Azure Communication Services speech recognition
         try:
@@ -670,7 +826,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
             if not COGNITIVE_SERVICES_ENDPOINT:
                 raise Exception("COGNITIVE_SERVICES_ENDPOINT not configured for speech recognition")
             
-            logging.debug(f"Using cognitive services endpoint: {COGNITIVE_SERVICES_ENDPOINT}")
+            logging.debug("Using cognitive services endpoint: %s", COGNITIVE_SERVICES_ENDPOINT)
             
             # Try to use the recognize API if available
             # Note: Different SDK versions may have different method names
@@ -687,45 +843,45 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
             available_methods = []
             
             # First, check what recognition methods are actually available
-            logging.debug(f"Call connection object type: {type(call_connection)}")
-            logging.debug(f"Call connection available attributes: {[attr for attr in dir(call_connection) if 'recogni' in attr.lower() or 'speech' in attr.lower()]}")
+            logging.debug("Call connection object type: %s", type(call_connection))
+            logging.debug("Call connection available attributes: %s", [attr for attr in dir(call_connection) if 'recogni' in attr.lower() or 'speech' in attr.lower()])
             
             for method_name in recognition_methods:
                 if hasattr(call_connection, method_name):
                     available_methods.append(method_name)
-                    logging.debug(f"Found recognition method: {method_name}")
+                    logging.debug("Found recognition method: %s", method_name)
                 else:
-                    logging.debug(f"Method not available: {method_name}")
+                    logging.debug("Method not available: %s", method_name)
             
-            logging.debug(f"Available recognition methods: {available_methods}")
+            logging.debug("Available recognition methods: %s", available_methods)
             
             if not available_methods:
                 # Log all available methods for debugging
                 all_methods = [method for method in dir(call_connection) if not method.startswith('_')]
                 speech_related = [method for method in all_methods if any(keyword in method.lower() for keyword in ['recogni', 'speech', 'dtmf', 'listen'])]
-                logging.debug(f"All available call_connection methods: {all_methods}")
-                logging.debug(f"Speech-related methods found: {speech_related}")
+                logging.debug("All available call_connection methods: %s", all_methods)
+                logging.debug("Speech-related methods found: %s", speech_related)
                 raise Exception(f"No compatible speech recognition methods found in current SDK version. Available methods: {len(all_methods)}, Speech-related: {speech_related}")
             
             # Try each available method
             for method_name in available_methods:
-                logging.debug(f"Attempting to use recognition method: {method_name}")
+                logging.debug("Attempting to use recognition method: %s", method_name)
                 try:
                     method = getattr(call_connection, method_name)
-                    logging.debug(f"Retrieved method {method_name}, attempting to call with appropriate parameters")
+                    logging.debug("Retrieved method %s, attempting to call with appropriate parameters", method_name)
                     
                     # Try to inspect the method signature for debugging
                     try:
                         import inspect
                         sig = inspect.signature(method)
-                        logging.debug(f"Method {method_name} signature: {sig}")
+                        logging.debug("Method %s signature: %s", method_name, sig)
                         
                         # Get parameter names to help with correct usage
                         param_names = list(sig.parameters.keys())
-                        logging.debug(f"Method {method_name} parameters: {param_names}")
+                        logging.debug("Method %s parameters: %s", method_name, param_names)
                         
                     except Exception:
-                        logging.debug(f"Could not inspect signature for {method_name}")
+                        logging.debug("Could not inspect signature for %s", method_name)
                     
                     # Try to call the recognition method with specific parameters for each method type
                     if method_name == 'start_recognizing_media':
@@ -734,7 +890,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                         
                         # For speech recognition in outbound calls, we want to listen to the person we called
                         # We've already validated that target_phone_participant is not None above
-                        logging.debug(f"Using validated target participant for speech recognition: {target_phone_participant}")
+                        logging.debug("Using validated target participant for speech recognition: %s", target_phone_participant)
                         
                         # Try different parameter combinations to find the correct one
                         try:
@@ -746,7 +902,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                             )
                             logging.info("Speech recognition started successfully with minimal parameters")
                         except Exception as e1:
-                            logging.debug(f"Minimal parameters failed: {e1}")
+                            logging.debug("Minimal parameters failed: %s", e1)
                             try:
                                 # Try with timeout parameter using correct name
                                 logging.debug("Attempting start_recognizing_media with initial_silence_timeout")
@@ -757,7 +913,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                                 )
                                 logging.info("Speech recognition started successfully with initial_silence_timeout")
                             except Exception as e2:
-                                logging.debug(f"initial_silence_timeout failed: {e2}")
+                                logging.debug("initial_silence_timeout failed: %s", e2)
                                 try:
                                     # Try with different timeout parameter name
                                     logging.debug("Attempting start_recognizing_media with silence_timeout")
@@ -768,7 +924,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                                     )
                                     logging.info("Speech recognition started successfully with silence_timeout")
                                 except Exception as e3:
-                                    logging.debug(f"silence_timeout failed: {e3}")
+                                    logging.debug("silence_timeout failed: %s", e3)
                                     try:
                                         # Try with recognize_options parameter
                                         logging.debug("Attempting start_recognizing_media with recognize_options")
@@ -779,8 +935,8 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                                         )
                                         logging.info("Speech recognition started successfully with speech_language")
                                     except Exception as e4:
-                                        logging.warning(f"All parameter variations failed for start_recognizing_media")
-                                        logging.error(f"Final error: {e4}")
+                                        logging.warning("All parameter variations failed for start_recognizing_media")
+                                        logging.error("Final error: %s", e4)
                                         raise e4
                                 
                     elif method_name == 'start_continuous_dtmf_recognition':
@@ -789,7 +945,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                         
                         # For DTMF in outbound calls, we want to listen to the person we called
                         # We've already validated that target_phone_participant is not None above
-                        logging.debug(f"Using validated target participant for DTMF recognition: {target_phone_participant}")
+                        logging.debug("Using validated target participant for DTMF recognition: %s", target_phone_participant)
                         
                         try:
                             # Try minimal parameters first
@@ -797,11 +953,11 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                             result = method(target_phone_participant)
                             logging.info("DTMF recognition started successfully with target participant")
                         except Exception as dtmf_e1:
-                            logging.warning(f"DTMF recognition with target participant failed: {dtmf_e1}")
+                            logging.warning("DTMF recognition with target participant failed: %s", dtmf_e1)
                             # Log the error details and raise since we should have a valid participant
-                            logging.error(f"Target participant validation passed but DTMF recognition still failed")
-                            logging.error(f"Target participant type: {type(target_phone_participant)}")
-                            logging.error(f"Target participant value: {target_phone_participant}")
+                            logging.error("Target participant validation passed but DTMF recognition still failed")
+                            logging.error("Target participant type: %s", type(target_phone_participant))
+                            logging.error("Target participant value: %s", target_phone_participant)
                             raise dtmf_e1
                     elif method_name == 'recognize_media':
                         logging.debug("Calling recognize_media with media recognition parameters")
@@ -811,7 +967,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                             initial_silence_timeout=10
                         )
                     elif method_name in ['start_recognizing_speech', 'recognize_speech']:
-                        logging.debug(f"Calling {method_name} with speech-specific parameters")
+                        logging.debug("Calling %s with speech-specific parameters", method_name)
                         # Try speech-specific methods
                         result = method(
                             target_participant=None,
@@ -823,22 +979,22 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                         # Try more generic speech recognition
                         result = method(language="en-US", timeout=10)
                     else:
-                        logging.debug(f"Trying {method_name} with fallback parameter approaches")
+                        logging.debug("Trying %s with fallback parameter approaches", method_name)
                         # Generic attempt with minimal parameters
                         try:
                             logging.debug("Attempting with RecognizeInputType.SPEECH parameter")
                             result = method(RecognizeInputType.SPEECH)
                         except TypeError as te1:
-                            logging.debug(f"RecognizeInputType.SPEECH failed: {te1}, trying with no parameters")
+                            logging.debug("RecognizeInputType.SPEECH failed: %s, trying with no parameters", te1)
                             # If that fails, try with no parameters
                             try:
                                 result = method()
                             except TypeError as te2:
-                                logging.debug(f"No parameters failed: {te2}, trying with basic target_participant=None")
+                                logging.debug("No parameters failed: %s, trying with basic target_participant=None", te2)
                                 result = method(target_participant=None)
                     
-                    logging.info(f"Azure Communication Services speech recognition started using {method_name}")
-                    logging.debug(f"Recognition operation result: {type(result)}")
+                    logging.info("Azure Communication Services speech recognition started using %s", method_name)
+                    logging.debug("Recognition operation result: %s", type(result))
                     recognition_started = True
                     
                     # Update conversation state to indicate real speech recognition is active
@@ -846,28 +1002,28 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
                         CONVERSATION_STATE[call_connection_id]['recognition_mode'] = 'azure_speech'
                         CONVERSATION_STATE[call_connection_id]['recognition_method'] = method_name
                         CONVERSATION_STATE[call_connection_id]['recognition_start_time'] = time.time()
-                        logging.debug(f"Updated conversation state for Azure speech recognition using {method_name}")
+                        logging.debug("Updated conversation state for Azure speech recognition using %s", method_name)
                     
                     break  # Successfully started, exit the loop
                     
                 except Exception as method_error:
                     error_msg = str(method_error)
                     error_type = type(method_error).__name__
-                    logging.warning(f"Method {method_name} failed: {error_msg}")
-                    logging.debug(f"Method error type: {error_type}")
-                    logging.debug(f"Method error args: {method_error.args}")
+                    logging.warning("Method %s failed: %s", method_name, error_msg)
+                    logging.debug("Method error type: %s", error_type)
+                    logging.debug("Method error args: %s", method_error.args)
                     
                     # Log specific error patterns to help with debugging
                     if "parameter" in error_msg.lower():
-                        logging.debug(f"Parameter-related error for {method_name}: {error_msg}")
+                        logging.debug("Parameter-related error for %s: %s", method_name, error_msg)
                     elif "argument" in error_msg.lower():
-                        logging.debug(f"Argument-related error for {method_name}: {error_msg}")
+                        logging.debug("Argument-related error for %s: %s", method_name, error_msg)
                     elif "authorization" in error_msg.lower() or "auth" in error_msg.lower():
-                        logging.warning(f"Authorization error for {method_name}: {error_msg}")
+                        logging.warning("Authorization error for %s: %s", method_name, error_msg)
                     elif "endpoint" in error_msg.lower():
-                        logging.warning(f"Endpoint-related error for {method_name}: {error_msg}")
+                        logging.warning("Endpoint-related error for %s: %s", method_name, error_msg)
                     else:
-                        logging.debug(f"General error for {method_name}: {error_msg}")
+                        logging.debug("General error for %s: %s", method_name, error_msg)
                     
                     continue
             
@@ -877,12 +1033,12 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
             else:
                 # Provide detailed information about why recognition failed
                 error_details = f"No compatible speech recognition methods worked. Tried: {available_methods}"
-                logging.warning(f"All recognition methods failed: {error_details}")
+                logging.warning("All recognition methods failed: %s", error_details)
                 raise Exception(error_details)
             
         except Exception as speech_error:
-            logging.warning(f"Azure speech recognition failed: {str(speech_error)}")
-            logging.warning(f"Speech error type: {type(speech_error).__name__}")
+            logging.warning("Azure speech recognition failed: %s", speech_error)
+            logging.warning("Speech error type: %s", type(speech_error).__name__)
             logging.info("Falling back to conversation simulation approach")
             
             # Fall back to conversation simulation
@@ -893,8 +1049,8 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
             _use_conversation_simulation(call_connection, call_connection_id)
         
     except Exception as e:
-        logging.error(f"Failed to start speech recognition: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
+        logging.error("Failed to start speech recognition: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
         if call_connection:
             logging.info("Attempting conversation simulation as fallback")
             _use_conversation_simulation(call_connection, call_connection_id)
@@ -906,7 +1062,7 @@ def _start_speech_recognition(client: CallAutomationClient, call_connection_id:
 def _use_conversation_simulation(call_connection, call_connection_id: str):
     """Use a conversation simulation approach when speech recognition API is not available"""
     try:
-        logging.info(f"Using conversation simulation for call {call_connection_id}")
+        logging.info("Using conversation simulation for call %s", call_connection_id)
         logging.debug("Creating simulation prompt for listening")
         
         # Get current conversation state to personalize the prompt
@@ -929,8 +1085,8 @@ def _use_conversation_simulation(call_connection, call_connection_id: str):
             text=simulation_text,
             voice_name=TTS_VOICE
         )
-        logging.debug(f"Simulation prompt created with voice: {TTS_VOICE}")
-        logging.debug(f"Simulation text: '{simulation_text}'")
+        logging.debug("Simulation prompt created with voice: %s", TTS_VOICE)
+        logging.debug("Simulation text: '%s'", simulation_text)
         
         # Play the prompt
         logging.debug("Playing simulation listening prompt")
@@ -940,7 +1096,7 @@ def _use_conversation_simulation(call_connection, call_connection_id: str):
         )
         
         operation_id = getattr(play_result, 'operation_id', 'Unknown')
-        logging.info(f"Simulation listening prompt initiated. Operation ID: {operation_id}")
+        logging.info("Simulation listening prompt initiated. Operation ID: %s", operation_id)
         
         # Set conversation state to simulate speech recognition
         if call_connection_id in CONVERSATION_STATE:
@@ -949,20 +1105,20 @@ def _use_conversation_simulation(call_connection, call_connection_id: str):
             CONVERSATION_STATE[call_connection_id]['simulation_mode'] = True
             CONVERSATION_STATE[call_connection_id]['recognition_mode'] = 'simulation'
             CONVERSATION_STATE[call_connection_id]['simulation_prompt_played'] = True
-            logging.debug(f"Updated conversation state for simulation mode: {CONVERSATION_STATE[call_connection_id]['stage']}")
+            logging.debug("Updated conversation state for simulation mode: %s", CONVERSATION_STATE[call_connection_id]['stage'])
             
             # Log the reason for using simulation
             logging.info("Conversation simulation activated due to Azure Communication Services speech recognition limitations")
             logging.debug("This simulation will automatically generate user responses after the listening prompt")
-            logging.debug(f"Simulation will trigger after listening prompt completes (stage will change to 'simulated_listening')")
+            logging.debug("Simulation will trigger after listening prompt completes (stage will change to 'simulated_listening')")
         else:
-            logging.warning(f"No conversation state found for call {call_connection_id} during simulation setup")
+            logging.warning("No conversation state found for call %s during simulation setup", call_connection_id)
         
         logging.info("Conversation simulation mode activated - will simulate user response after prompt completion")
         
     except Exception as sim_error:
-        logging.error(f"Conversation simulation failed: {str(sim_error)}")
-        logging.error(f"Simulation error type: {type(sim_error).__name__}")
+        logging.error("Conversation simulation failed: %s", sim_error)
+        logging.error("Simulation error type: %s", type(sim_error).__name__)
         logging.info("Falling back to DTMF menu due to simulation failure")
         _provide_dtmf_menu(call_connection, call_connection_id)
 
@@ -970,15 +1126,9 @@ def _use_conversation_simulation(call_connection, call_connection_id: str):
 def _provide_dtmf_menu(call_connection, call_connection_id: str):
     """Provide DTMF menu when speech recognition is not working"""
     try:
-        logging.info(f"Providing DTMF menu for call {call_connection_id}")
-        logging.debug("Creating DTMF menu prompt")
-        
-        # Create DTMF menu prompt
-        dtmf_prompt = TextSource(
-            text="I'll provide some options. Press 1 for appointments, 2 for general questions, 3 to speak with someone, or 0 to hear this menu again.",
-            voice_name=TTS_VOICE
-        )
-        logging.debug(f"DTMF prompt created with voice: {TTS_VOICE}")
+        logging.info("Providing DTMF menu for call %s", call_connection_id)
+        # Fixed DTMF menu prompt
+        dtmf_prompt = _DTMF_MENU_TEXT_SOURCE
         
         # Play the DTMF prompt
         play_result = call_connection.play_media(
@@ -987,7 +1137,7 @@ def _provide_dtmf_menu(call_connection, call_connection_id: str):
         )
         
         operation_id = getattr(play_result, 'operation_id', 'Unknown')
-        logging.info(f"DTMF menu playback initiated. Operation ID: {operation_id}")
+        logging.info("DTMF menu playback initiated. Operation ID: %s", operation_id)
         
         # Update conversation state to indicate DTMF mode
         if call_connection_id in CONVERSATION_STATE:
@@ -995,21 +1145,21 @@ def _provide_dtmf_menu(call_connection, call_connection_id: str):
             CONVERSATION_STATE[call_connection_id]['stage'] = 'dtmf_menu'
             logging.debug("Updated conversation state to DTMF mode")
         else:
-            logging.warning(f"No conversation state found for call {call_connection_id} during DTMF menu setup")
+            logging.warning("No conversation state found for call %s during DTMF menu setup", call_connection_id)
         
         logging.info("DTMF menu provided")
         
     except Exception as menu_error:
-        logging.error(f"Failed to provide DTMF menu: {str(menu_error)}")
-        logging.error(f"DTMF error type: {type(menu_error).__name__}")
-        logging.error(f"Call ID: {call_connection_id}")
+        logging.error("Failed to provide DTMF menu: %s", menu_error)
+        logging.error("DTMF error type: %s", type(menu_error).__name__)
+        logging.error("Call ID: %s", call_connection_id)
 
 
 def _handle_speech_recognition_result(client: CallAutomationClient, call_connection_id: str, recognition_result: dict):
     """Process recognized speech and generate conversational response"""
     try:
-        logging.info(f"Processing speech recognition result for call {call_connection_id}")
-        logging.debug(f"Recognition result: {json.dumps(recognition_result, indent=2)}")
+        logging.info("Processing speech recognition result for call %s", call_connection_id)
+        logging.debug("Recognition result: %s", _JsonDump(recognition_result))
         
         # Extract recognized text - handle both direct speechResult and nested structure
         recognized_text = ""
@@ -1020,7 +1170,7 @@ def _handle_speech_recognition_result(client: CallAutomationClient, call_connect
             speech_result = recognition_result['speechResult']
             recognized_text = speech_result.get('speech', '').strip()
             confidence = speech_result.get('confidence', 0.0)
-            logging.debug(f"Found speechResult in recognition_result: speech='{recognized_text}', confidence={confidence}")
+            logging.debug("Found speechResult in recognition_result: speech='%s', confidence=%s", recognized_text, confidence)
         
         # Check if we have recognitionResult containing speechResult (from webhook)
         elif 'recognitionResult' in recognition_result:
@@ -1029,15 +1179,15 @@ def _handle_speech_recognition_result(client: CallAutomationClient, call_connect
                 speech_result = recognition_data['speechResult']
                 recognized_text = speech_result.get('speech', '').strip()
                 confidence = speech_result.get('confidence', 0.0)
-                logging.debug(f"Found speechResult in recognitionResult: speech='{recognized_text}', confidence={confidence}")
+                logging.debug("Found speechResult in recognitionResult: speech='%s', confidence=%s", recognized_text, confidence)
         
         # Direct access for webhook events that pass speechResult at top level
         elif 'speech' in recognition_result:
             recognized_text = recognition_result.get('speech', '').strip()
             confidence = recognition_result.get('confidence', 0.0)
-            logging.debug(f"Found speech directly in result: speech='{recognized_text}', confidence={confidence}")
+            logging.debug("Found speech directly in result: speech='%s', confidence=%s", recognized_text, confidence)
         
-        logging.info(f"Recognized speech: '{recognized_text}' (confidence: {confidence:.3f})")
+        logging.info("Recognized speech: '%s' (confidence: %.3f)", recognized_text, confidence)
         
         if not recognized_text:
             logging.warning("No speech recognized, asking user to repeat")
@@ -1047,7 +1197,7 @@ def _handle_speech_recognition_result(client: CallAutomationClient, call_connect
         # Update conversation state
         if call_connection_id in CONVERSATION_STATE:
             state = CONVERSATION_STATE[call_connection_id]
-            logging.debug(f"Current conversation state before update: {state}")
+            logging.debug("Current conversation state before update: %s", state)
             
             state['conversation_history'].append({
                 'speaker': 'user', 
@@ -1055,13 +1205,13 @@ def _handle_speech_recognition_result(client: CallAutomationClient, call_connect
             })
             state['turn_count'] += 1
             
-            logging.debug(f"Updated turn count: {state['turn_count']}")
-            logging.debug(f"Conversation history length: {len(state['conversation_history'])}")
+            logging.debug("Updated turn count: %s", state['turn_count'])
+            logging.debug("Conversation history length: %s", len(state['conversation_history']))
             
             # Generate conversational response
             logging.debug("Generating conversational response")
             response_text = _generate_conversational_response(recognized_text, state)
-            logging.info(f"Generated response: '{response_text[:100]}...'")
+            logging.info("Generated response: '%.100s...'", response_text)
             
             # Play the response
             _play_conversational_response(client, call_connection_id, response_text)
@@ -1071,22 +1221,22 @@ def _handle_speech_recognition_result(client: CallAutomationClient, call_connect
                 'speaker': 'assistant', 
                 'message': response_text
             })
-            logging.debug(f"Updated conversation history length: {len(state['conversation_history'])}")
+            logging.debug("Updated conversation history length: %s", len(state['conversation_history']))
         else:
-            logging.error(f"No conversation state found for call {call_connection_id}")
+            logging.error("No conversation state found for call %s", call_connection_id)
             
     except Exception as e:
-        logging.error(f"Error handling speech recognition result: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
-        logging.error(f"Recognition result that caused error: {json.dumps(recognition_result, indent=2)}")
+        logging.error("Error handling speech recognition result: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
+        logging.error("Recognition result that caused error: %s", _JsonDump(recognition_result))
         _play_error_message(client, call_connection_id)
 
 
 def _generate_conversational_response(user_input: str, conversation_state: dict) -> str:
     """Generate an appropriate conversational response based on user input using enhanced bot service"""
     
-    logging.debug(f"Generating response for input: '{user_input}'")
-    logging.debug(f"Conversation state: Turn {conversation_state['turn_count']}, History length: {len(conversation_state['conversation_history'])}")
+    logging.debug("Generating response for input: '%s'", user_input)
+    logging.debug("Conversation state: Turn %s, History length: %s", conversation_state['turn_count'], len(conversation_state['conversation_history']))
     
     try:
         # Try to use the enhanced bot service with conversation state management
@@ -1121,14 +1271,14 @@ def _generate_conversational_response(user_input: str, conversation_state: dict)
         )
         
         if bot_response and bot_response.strip():
-            logging.info(f"Enhanced bot service generated response: '{bot_response[:50]}...'")
+            logging.info("Enhanced bot service generated response: '%.50s...'", bot_response)
             return bot_response.strip()
         else:
             logging.warning("Enhanced bot service returned empty response, falling back to rule-based")
             
     except Exception as bot_error:
-        logging.warning(f"Enhanced bot service failed: {str(bot_error)}, falling back to basic bot service")
-        logging.debug(f"Bot error type: {type(bot_error).__name__}")
+        logging.warning("Enhanced bot service failed: %s, falling back to basic bot service", bot_error)
+        logging.debug("Bot error type: %s", type(bot_error).__name__)
         
         # Fallback to basic bot service
         try:
@@ -1154,20 +1304,20 @@ def _generate_conversational_response(user_input: str, conversation_state: dict)
             else:
                 enhanced_message = f"Patient says: {user_input}"
             
-            logging.debug(f"Enhanced message for basic bot service: '{enhanced_message}'")
+            logging.debug("Enhanced message for basic bot service: '%s'", enhanced_message)
             
             # Generate response using basic bot service
             bot_response = generate_response_sync(enhanced_message)
             
             if bot_response and bot_response.strip():
-                logging.info(f"Basic bot service generated response: '{bot_response[:50]}...'")
+                logging.info("Basic bot service generated response: '%.50s...'", bot_response)
                 return bot_response.strip()
             else:
                 logging.warning("Basic bot service returned empty response, falling back to rule-based")
                 
         except Exception as basic_bot_error:
-            logging.warning(f"Basic bot service failed: {str(basic_bot_error)}, falling back to rule-based responses")
-            logging.debug(f"Basic bot error type: {type(basic_bot_error).__name__}")
+            logging.warning("Basic bot service failed: %s, falling back to rule-based responses", basic_bot_error)
+            logging.debug("Basic bot error type: %s", type(basic_bot_error).__name__)
     
     # Fallback to rule-based responses if both bot services fail
     logging.debug("Using fallback rule-based responses")
@@ -1175,7 +1325,7 @@ def _generate_conversational_response(user_input: str, conversation_state: dict)
     user_input_lower = user_input.lower()
     turn_count = conversation_state['turn_count']
     
-    logging.debug(f"Processing turn {turn_count} with lowercase input: '{user_input_lower}'")
+    logging.debug("Processing turn %s with lowercase input: '%s'", turn_count, user_input_lower)
     
     # Healthcare-specific responses
     if any(word in user_input_lower for word in ['appointment', 'book', 'schedule']):
@@ -1210,27 +1360,30 @@ def _generate_conversational_response(user_input: str, conversation_state: dict)
         response = "I want to make sure I'm helping you properly. Could you please clarify what type of assistance you're looking for?"
         logging.debug("Using default generic response")
     
-    logging.info(f"Generated fallback response: '{response[:50]}...'")
+    logging.info("Generated fallback response: '%.50s...'", response)
     return response
 
 
-def _play_conversational_response(client: CallAutomationClient, call_connection_id: str, response_text: str):
-    """Play the conversational response and then listen for next input"""
+def _play_conversational_response(client: CallAutomationClient, call_connection_id: str, response_text: str,
+                                  text_source: Optional[TextSource] = None):
+    """
+    Play the conversational response and then listen for next input
+    Fixed prompts pass their prebuilt text_source; otherwise one is created for response_text
+    """
     try:
-        logging.info(f"Playing conversational response for call {call_connection_id}")
-        logging.debug(f"Response text: '{response_text}'")
+        logging.info("Playing conversational response for call %s", call_connection_id)
+        logging.debug("Response text: '%s'", response_text)
         
         call_connection = client.get_call_connection(call_connection_id)
         logging.debug("Retrieved call connection for response playback")
         
-        # Create text source for TTS
-        text_source = TextSource(
-            text=response_text,
-            voice_name=TTS_VOICE
-        )
-        logging.debug(f"Created TextSource with voice: {TTS_VOICE}")
+        # Create text source for TTS unless a prebuilt one was given; generated replies never
+        # repeat, so they bypass the _text_source cache
+        if text_source is None:
+            text_source = TextSource(text=response_text, voice_name=TTS_VOICE)
+            logging.debug("Created TextSource with voice: %s", TTS_VOICE)
         
-        logging.info(f"Playing conversational response: '{response_text[:50]}...'")
+        logging.info("Playing conversational response: '%.50s...'", response_text)
         
         # Play the response
         play_result = call_connection.play_media(
@@ -1243,42 +1396,40 @@ def _play_conversational_response(client: CallAutomationClient, call_connection_
             CONVERSATION_STATE[call_connection_id]['stage'] = 'playing_response'
             logging.debug("Updated conversation stage to 'playing_response'")
         else:
-            logging.warning(f"No conversation state found for call {call_connection_id} during response play")
+            logging.warning("No conversation state found for call %s during response play", call_connection_id)
         
         operation_id = getattr(play_result, 'operation_id', 'Unknown')
-        logging.info(f"Conversational response playback initiated. Operation ID: {operation_id}")
+        logging.info("Conversational response playback initiated. Operation ID: %s", operation_id)
         
     except Exception as e:
-        logging.error(f"Failed to play conversational response: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
-        logging.error(f"Response text that failed: '{response_text}'")
-        logging.error(f"Call ID: {call_connection_id}")
+        logging.error("Failed to play conversational response: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
+        logging.error("Response text that failed: '%s'", response_text)
+        logging.error("Call ID: %s", call_connection_id)
 
 
 def _play_retry_message(client: CallAutomationClient, call_connection_id: str):
     """Play a message asking the user to repeat their input"""
-    logging.info(f"Playing retry message for call {call_connection_id}")
-    retry_message = "I'm sorry, I didn't catch that. Could you please repeat what you said?"
-    logging.debug(f"Retry message: '{retry_message}'")
-    _play_conversational_response(client, call_connection_id, retry_message)
+    logging.info("Playing retry message for call %s", call_connection_id)
+    logging.debug("Retry message: '%s'", _RETRY_MESSAGE)
+    _play_conversational_response(client, call_connection_id, _RETRY_MESSAGE, _RETRY_TEXT_SOURCE)
 
 
 def _play_error_message(client: CallAutomationClient, call_connection_id: str):
     """Play an error message when something goes wrong"""
-    logging.error(f"Playing error message for call {call_connection_id}")
-    error_message = "I'm experiencing some technical difficulties. Let me transfer you to a human representative."
-    logging.debug(f"Error message: '{error_message}'")
-    _play_conversational_response(client, call_connection_id, error_message)
+    logging.error("Playing error message for call %s", call_connection_id)
+    logging.debug("Error message: '%s'", _ERROR_MESSAGE)
+    _play_conversational_response(client, call_connection_id, _ERROR_MESSAGE, _ERROR_TEXT_SOURCE)
 
 
 def get_conversation_state(call_connection_id: str) -> dict:
     """Get the current conversation state for a call"""
-    logging.debug(f"Getting conversation state for call {call_connection_id}")
+    logging.debug("Getting conversation state for call %s", call_connection_id)
     state = CONVERSATION_STATE.get(call_connection_id, {})
     if state:
-        logging.debug(f"Found conversation state - Stage: {state.get('stage')}, Turns: {state.get('turn_count')}")
+        logging.debug("Found conversation state - Stage: %s, Turns: %s", state.get('stage'), state.get('turn_count'))
     else:
-        logging.debug(f"No conversation state found for call {call_connection_id}")
+        logging.debug("No conversation state found for call %s", call_connection_id)
     return state
 
 
@@ -1286,63 +1437,57 @@ def clear_conversation_state(call_connection_id: str):
     """Clear conversation state when call ends"""
     if call_connection_id in CONVERSATION_STATE:
         state_info = CONVERSATION_STATE[call_connection_id]
-        logging.info(f"Clearing conversation state for call {call_connection_id}")
-        logging.debug(f"Final state - Stage: {state_info.get('stage')}, Turns: {state_info.get('turn_count')}, History length: {len(state_info.get('conversation_history', []))}")
+        logging.info("Clearing conversation state for call %s", call_connection_id)
+        logging.debug("Final state - Stage: %s, Turns: %s, History length: %s", state_info.get('stage'), state_info.get('turn_count'), len(state_info.get('conversation_history', [])))
         
         del CONVERSATION_STATE[call_connection_id]
-        logging.info(f"Cleared conversation state for call {call_connection_id}")
+        logging.info("Cleared conversation state for call %s", call_connection_id)
         
         # Also clear enhanced conversation state from bot service
         try:
             from .bot_service import clear_conversation_state as clear_enhanced_state
             clear_enhanced_state(call_connection_id)
-            logging.debug(f"Cleared enhanced conversation state for call {call_connection_id}")
+            logging.debug("Cleared enhanced conversation state for call %s", call_connection_id)
         except Exception as e:
-            logging.debug(f"Could not clear enhanced conversation state: {str(e)}")
+            logging.debug("Could not clear enhanced conversation state: %s", e)
             
     else:
-        logging.warning(f"No conversation state found to clear for call {call_connection_id}")
-        logging.debug(f"Current conversation states: {list(CONVERSATION_STATE.keys())}")
+        logging.warning("No conversation state found to clear for call %s", call_connection_id)
+        logging.debug("Current conversation states: %s", list(CONVERSATION_STATE.keys()))
 
 
 def _continue_conversation_without_recognition(client: CallAutomationClient, call_connection_id: str):
     """Continue conversation when speech recognition is not available"""
     try:
-        logging.info(f"Continuing conversation without recognition for call {call_connection_id}")
+        logging.info("Continuing conversation without recognition for call %s", call_connection_id)
         
         # Play a message indicating we'll use a simple menu system
-        menu_text = "I'm having trouble with speech recognition. Let me offer you some options. Press 1 for appointments, 2 for general questions, or 3 to speak with someone."
-        logging.debug(f"Menu fallback text: '{menu_text}'")
+        logging.debug("Menu fallback text: '%s'", _MENU_FALLBACK_MESSAGE)
         
         call_connection = client.get_call_connection(call_connection_id)
         logging.debug("Retrieved call connection for menu fallback")
         
-        text_source = TextSource(
-            text=menu_text,
-            voice_name=TTS_VOICE
-        )
-        
         play_result = call_connection.play_media(
-            play_source=text_source,
+            play_source=_MENU_FALLBACK_TEXT_SOURCE,
             play_to="all"
         )
         
         operation_id = getattr(play_result, 'operation_id', 'Unknown')
-        logging.info(f"Menu fallback playback initiated. Operation ID: {operation_id}")
+        logging.info("Menu fallback playback initiated. Operation ID: %s", operation_id)
         
         # Update conversation state
         if call_connection_id in CONVERSATION_STATE:
             CONVERSATION_STATE[call_connection_id]['stage'] = 'menu_presented'
             logging.debug("Updated conversation stage to 'menu_presented'")
         else:
-            logging.warning(f"No conversation state found for call {call_connection_id} during menu fallback")
+            logging.warning("No conversation state found for call %s during menu fallback", call_connection_id)
         
         logging.info("Presented menu options due to speech recognition unavailability")
         
     except Exception as e:
-        logging.error(f"Failed to continue conversation without recognition: {str(e)}")
-        logging.error(f"Exception type: {type(e).__name__}")
-        logging.error(f"Call ID: {call_connection_id}")
+        logging.error("Failed to continue conversation without recognition: %s", e)
+        logging.error("Exception type: %s", type(e).__name__)
+        logging.error("Call ID: %s", call_connection_id)
 
 
 def diagnose_speech_recognition_capabilities(client: CallAutomationClient) -> dict:
@@ -1371,12 +1516,12 @@ def diagnose_speech_recognition_capabilities(client: CallAutomationClient) -> di
             # so we'll check the client capabilities instead
             client_methods = [method for method in dir(client) if not method.startswith('_')]
             diagnosis["client_methods"] = client_methods
-            logging.debug(f"Available client methods: {client_methods}")
+            logging.debug("Available client methods: %s", client_methods)
             
             # Check for recognition-related methods
             recognition_methods = [method for method in client_methods if 'recogni' in method.lower()]
             diagnosis["recognition_related_methods"] = recognition_methods
-            logging.debug(f"Recognition-related methods: {recognition_methods}")
+            logging.debug("Recognition-related methods: %s", recognition_methods)
             
             # Try to get SDK version information
             try:
@@ -1385,17 +1530,17 @@ def diagnose_speech_recognition_capabilities(client: CallAutomationClient) -> di
             except Exception:
                 diagnosis["sdk_version"] = "Unable to determine SDK version"
             
-            logging.info(f"Speech recognition diagnosis completed")
-            logging.debug(f"Diagnosis results: {diagnosis}")
+            logging.info("Speech recognition diagnosis completed")
+            logging.debug("Diagnosis results: %s", diagnosis)
             
         except Exception as method_check_error:
-            logging.warning(f"Could not fully diagnose SDK capabilities: {str(method_check_error)}")
+            logging.warning("Could not fully diagnose SDK capabilities: %s", method_check_error)
             diagnosis["method_check_error"] = str(method_check_error)
         
         return diagnosis
         
     except Exception as e:
-        logging.error(f"Failed to diagnose speech recognition capabilities: {str(e)}")
+        logging.error("Failed to diagnose speech recognition capabilities: %s", e)
         return {
             "error": str(e),
             "diagnosis_failed": True,
@@ -1413,7 +1558,7 @@ def get_speech_recognition_status() -> dict:
     logging.debug("Getting speech recognition status")
     
     try:
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
+        client = _get_acs_client()
         diagnosis = diagnose_speech_recognition_capabilities(client)
         
         status = {
@@ -1446,11 +1591,11 @@ def get_speech_recognition_status() -> dict:
             status["speech_recognition_available"] = True
             status["using_simulation"] = False
         
-        logging.info(f"Speech recognition status: Available={status['speech_recognition_available']}, Using simulation={status['using_simulation']}")
+        logging.info("Speech recognition status: Available=%s, Using simulation=%s", status['speech_recognition_available'], status['using_simulation'])
         return status
         
     except Exception as e:
-        logging.error(f"Failed to get speech recognition status: {str(e)}")
+        logging.error("Failed to get speech recognition status: %s", e)
         return {
             "error": str(e),
             "speech_recognition_available": False,
@@ -1469,7 +1614,7 @@ def debug_conversation_flow(call_connection_id: Optional[str] = None) -> dict:
     Returns:
         dict: Debug information about conversation flow
     """
-    logging.info(f"Debugging conversation flow for call: {call_connection_id if call_connection_id else 'all calls'}")
+    logging.info("Debugging conversation flow for call: %s", call_connection_id if call_connection_id else 'all calls')
     
     debug_info = {
         "debug_timestamp": time.time(),
@@ -1491,11 +1636,11 @@ def debug_conversation_flow(call_connection_id: Optional[str] = None) -> dict:
             for cid, state in CONVERSATION_STATE.items():
                 debug_info["conversation_details"][cid] = _analyze_conversation_state(cid, state)
         
-        logging.debug(f"Conversation flow debug completed: {len(debug_info['conversation_details'])} conversations analyzed")
+        logging.debug("Conversation flow debug completed: %s conversations analyzed", len(debug_info['conversation_details']))
         return debug_info
         
     except Exception as e:
-        logging.error(f"Failed to debug conversation flow: {str(e)}")
+        logging.error("Failed to debug conversation flow: %s", e)
         debug_info["debug_error"] = str(e)
         return debug_info
 
@@ -1553,7 +1698,7 @@ def _analyze_conversation_state(call_connection_id: str, state: dict) -> dict:
         analysis["stage_issues"].append(f"Missing required state fields: {missing_fields}")
         analysis["recommendations"].append("Reinitialize conversation state")
     
-    logging.debug(f"Analyzed conversation {call_connection_id}: Stage={analysis['current_stage']}, Issues={len(analysis['stage_issues'])}")
+    logging.debug("Analyzed conversation %s: Stage=%s, Issues=%s", call_connection_id, analysis['current_stage'], len(analysis['stage_issues']))
     
     return analysis
 
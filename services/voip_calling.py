@@ -1,358 +1,653 @@
-"""
-VoIP Calling Module
-Handles VoIP calls to Communication Service users using Azure Communication Services
-"""
-
-import os
-import json
-import logging
-from typing import Optional, Dict, Any
-
-from azure.communication.callautomation import CallAutomationClient, TextSource
-from azure.communication.identity import CommunicationUserIdentifier
-
-# Configuration
-ACS_CONNECTION_STRING = os.environ.get("ACS_CONNECTION_STRING", "")
-COGNITIVE_SERVICES_ENDPOINT = os.environ.get("COGNITIVE_SERVICES_ENDPOINT", "").rstrip('/') if os.environ.get("COGNITIVE_SERVICES_ENDPOINT") else ""
-TARGET_USER_ID = os.environ.get("TARGET_USER_ID", "")
-CALLBACK_URL_BASE = os.environ.get("CALLBACK_URL_BASE", "")
-WELCOME_MESSAGE = os.environ.get("WELCOME_MESSAGE", 
-    "Hello! This is your Azure Communication Services assistant. The call connection is working perfectly. "
-    "You can now hear automated messages through Azure's text-to-speech service. "
-    "Thank you for testing the voice integration.")
-TTS_VOICE = os.environ.get("TTS_VOICE", "en-US-JennyNeural")
-
-# Global variables for temporary webhook data storage
-TEMP_CUSTOM_MESSAGE = None
-TEMP_CUSTOM_VOICE = None
-
-
-def validate_voip_configuration() -> tuple[bool, str]:
-    """
-    Validate that all required VoIP configuration is present
-    Returns: (is_valid, error_message)
-    """
-    if not ACS_CONNECTION_STRING:
-        return False, "ACS_CONNECTION_STRING is required for VoIP calls"
-    
-    if not COGNITIVE_SERVICES_ENDPOINT:
-        return False, "COGNITIVE_SERVICES_ENDPOINT is required for TTS functionality"
-    
-    return True, ""
-
-
-def validate_user_id(user_id: str) -> tuple[bool, str]:
-    """
-    Validate user ID format for VoIP calls
-    Returns: (is_valid, error_message)
-    """
-    if not user_id:
-        return False, "User ID is required"
-    
-    # Basic validation for ACS user ID format
-    if not user_id.startswith('8:acs:'):
-        return False, "User ID should be in ACS format (starting with '8:acs:')"
-    
-    return True, ""
-
-
-def create_voip_call(
-    target_user_id: str,
-    custom_message: Optional[str] = None,
-    custom_voice: Optional[str] = None,
-    callback_url: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Create a VoIP call to a Communication Service user
-    
-    Args:
-        target_user_id: Target user ID in ACS format
-        custom_message: Custom TTS message to play
-        custom_voice: Custom voice for TTS
-        callback_url: Callback URL for webhook events
-    
-    Returns:
-        Dict with call result information
-    """
-    global TEMP_CUSTOM_MESSAGE, TEMP_CUSTOM_VOICE
-    
-    logging.info(f"Creating VoIP call to: {target_user_id}")
-    
-    # Validate configuration
-    is_valid, error_msg = validate_voip_configuration()
-    if not is_valid:
-        return {
-            "success": False,
-            "error": f"Configuration error: {error_msg}",
-            "call_type": "VoIP"
-        }
-    
-    # Validate user ID
-    is_valid, error_msg = validate_user_id(target_user_id)
-    if not is_valid:
-        return {
-            "success": False,
-            "error": f"User ID validation error: {error_msg}",
-            "call_type": "VoIP"
-        }
-    
-    try:
-        # Initialize ACS client
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
-        
-        # Create communication user identifier
-        target_user = CommunicationUserIdentifier(target_user_id)
-        
-        # Store custom settings for webhook
-        TEMP_CUSTOM_MESSAGE = custom_message or WELCOME_MESSAGE
-        TEMP_CUSTOM_VOICE = custom_voice or TTS_VOICE
-        
-        # Determine callback URL
-        if not callback_url:
-            if CALLBACK_URL_BASE:
-                callback_url = f"https://{CALLBACK_URL_BASE}/api/CallWebhook"
-            else:
-                callback_url = "http://localhost:7071/api/CallWebhook"
-        
-        logging.info(f"Using callback URL: {callback_url}")
-        
-        # Create the VoIP call
-        call_result = client.create_call(
-            target_participant=target_user,
-            callback_url=callback_url,
-            cognitive_services_endpoint=COGNITIVE_SERVICES_ENDPOINT
-        )
-        
-        call_connection_id = call_result.call_connection_id if hasattr(call_result, 'call_connection_id') else 'Unknown'
-        
-        logging.info(f"VoIP call created successfully. Call ID: {call_connection_id}")
-        
-        return {
-            "success": True,
-            "call_id": call_connection_id,
-            "user_id": target_user_id,
-            "message": TEMP_CUSTOM_MESSAGE,
-            "voice": TEMP_CUSTOM_VOICE,
-            "webhook_url": callback_url,
-            "call_type": "VoIP"
-        }
-        
-    except Exception as e:
-        logging.error(f"Failed to create VoIP call: {str(e)}")
-        return {
-            "success": False,
-            "error": f"Failed to create VoIP call: {str(e)}",
-            "user_id": target_user_id,
-            "call_type": "VoIP"
-        }
-
-
-def handle_voip_webhook_event(event: Dict[str, Any]) -> bool:
-    """
-    Handle a single VoIP webhook event
-    
-    Args:
-        event: Event data from Azure Communication Services
-    
-    Returns:
-        True if event was handled successfully, False otherwise
-    """
-    global TEMP_CUSTOM_MESSAGE, TEMP_CUSTOM_VOICE
-    
-    try:
-        event_type = event.get('type', 'Unknown')
-        call_connection_id = event.get('data', {}).get('callConnectionId', 'Unknown')
-        
-        logging.info(f"Processing VoIP event: {event_type}, Call ID: {call_connection_id}")
-        
-        # Initialize ACS client for event handling
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
-        
-        if event_type == 'Microsoft.Communication.CallConnected':
-            logging.info(f"VoIP call connected! Playing TTS message...")
-            
-            try:
-                # Get call connection
-                call_connection = client.get_call_connection(call_connection_id)
-                
-                # Use stored custom message and voice, or defaults
-                message_to_play = TEMP_CUSTOM_MESSAGE or WELCOME_MESSAGE
-                voice_to_use = TEMP_CUSTOM_VOICE or TTS_VOICE
-                
-                # Create text source for TTS
-                text_source = TextSource(
-                    text=message_to_play,
-                    voice_name=voice_to_use
-                )
-                
-                logging.info(f"Playing message: '{message_to_play[:50]}...', Voice: {voice_to_use}")
-                
-                # Play the message to all participants
-                play_result = call_connection.play_media_to_all(
-                    play_source=text_source
-                )
-                
-                operation_id = getattr(play_result, 'operation_id', 'Unknown')
-                logging.info(f"TTS playback initiated. Operation ID: {operation_id}")
-                
-                # Clear temp variables after use
-                TEMP_CUSTOM_MESSAGE = None
-                TEMP_CUSTOM_VOICE = None
-                
-            except Exception as play_error:
-                logging.error(f"Error playing TTS: {str(play_error)}")
-                return False
-                
-        elif event_type == 'Microsoft.Communication.CallDisconnected':
-            disconnect_reason = event.get('data', {}).get('callConnectionId', 'Unknown reason')
-            logging.info(f"VoIP call disconnected. Call ID: {call_connection_id}, Reason: {disconnect_reason}")
-            
-            # Clear temp variables on disconnect
-            TEMP_CUSTOM_MESSAGE = None
-            TEMP_CUSTOM_VOICE = None
-            
-        elif event_type == 'Microsoft.Communication.PlayCompleted':
-            logging.info(f"TTS playback completed for call {call_connection_id}")
-            
-        elif event_type == 'Microsoft.Communication.PlayFailed':
-            play_error = event.get('data', {}).get('resultInformation', {}).get('message', 'Unknown error')
-            logging.error(f"TTS playback failed for call {call_connection_id}: {play_error}")
-            
-        elif event_type == 'Microsoft.Communication.CallEstablished':
-            logging.info(f"VoIP call established for call {call_connection_id}")
-            
-        elif event_type == 'Microsoft.Communication.ParticipantsUpdated':
-            participants = event.get('data', {}).get('participants', [])
-            logging.info(f"Participants updated for call {call_connection_id}, count: {len(participants)}")
-            
-        else:
-            logging.info(f"Unhandled VoIP event type: {event_type}")
-        
-        return True
-        
-    except Exception as e:
-        logging.error(f"Error handling VoIP webhook event: {str(e)}")
-        return False
-
-
-def create_test_voip_call_no_webhook(
-    target_user_id: Optional[str] = None,
-    custom_message: Optional[str] = None,
-    custom_voice: Optional[str] = None,
-    delay_seconds: int = 3
-) -> Dict[str, Any]:
-    """
-    Create a VoIP call without webhook for testing purposes
-    Uses threading to play TTS after delay
-    
-    Args:
-        target_user_id: Target user ID (uses default if not provided)
-        custom_message: Custom TTS message
-        custom_voice: Custom voice for TTS
-        delay_seconds: Delay before playing message
-    
-    Returns:
-        Dict with call result information
-    """
-    import threading
-    import time
-    
-    logging.info('Creating test VoIP call without webhook dependencies')
-    
-    # Use provided user ID or default
-    user_id = target_user_id or TARGET_USER_ID
-    
-    # Validate configuration
-    is_valid, error_msg = validate_voip_configuration()
-    if not is_valid:
-        return {
-            "success": False,
-            "error": f"Configuration error: {error_msg}",
-            "call_type": "VoIP-Test"
-        }
-    
-    if not user_id:
-        return {
-            "success": False,
-            "error": "TARGET_USER_ID not configured and no user_id provided",
-            "call_type": "VoIP-Test"
-        }
-    
-    try:
-        # Initialize ACS client
-        client = CallAutomationClient.from_connection_string(ACS_CONNECTION_STRING)
-        target_user = CommunicationUserIdentifier(user_id)
-        
-        # Use a dummy callback URL since we're not using webhooks
-        callback_uri = "http://localhost:7071/api/DummyWebhook"
-        
-        # Create the call
-        call_result = client.create_call(
-            target_participant=target_user,
-            callback_url=callback_uri,
-            cognitive_services_endpoint=COGNITIVE_SERVICES_ENDPOINT
-        )
-        
-        call_connection_id = call_result.call_connection_id if hasattr(call_result, 'call_connection_id') else 'Unknown'
-        
-        logging.info(f"Test VoIP call created. Call ID: {call_connection_id}")
-        
-        # Function to play TTS after delay
-        def play_tts_delayed():
-            try:
-                time.sleep(delay_seconds)
-                
-                # Get call connection
-                call_connection = client.get_call_connection(call_connection_id)
-                
-                # Use custom message or default
-                message_to_play = custom_message or WELCOME_MESSAGE
-                voice_to_use = custom_voice or TTS_VOICE
-                
-                # Create text source
-                text_source = TextSource(
-                    text=message_to_play,
-                    voice_name=voice_to_use
-                )
-                
-                logging.info(f"Playing delayed TTS message: '{message_to_play[:50]}...'")
-                
-                # Play the message
-                play_result = call_connection.play_media_to_all(
-                    play_source=text_source
-                )
-                
-                logging.info(f"Delayed TTS playback initiated successfully")
-                
-            except Exception as e:
-                logging.error(f"Error in delayed TTS playback: {str(e)}")
-        
-        # Start the delayed TTS in a separate thread
-        threading.Thread(target=play_tts_delayed, daemon=True).start()
-        
-        return {
-            "success": True,
-            "call_id": call_connection_id,
-            "user_id": user_id,
-            "message": custom_message or WELCOME_MESSAGE,
-            "voice": custom_voice or TTS_VOICE,
-            "delay": delay_seconds,
-            "call_type": "VoIP-Test",
-            "note": "Using delayed TTS without webhook"
-        }
-        
-    except Exception as e:
-        logging.error(f"Failed to create test VoIP call: {str(e)}")
-        return {
-            "success": False,
-            "error": f"Failed to create test VoIP call: {str(e)}",
-            "user_id": user_id,
-            "call_type": "VoIP-Test"
-        }
-
-
-def clear_temp_variables():
-    """Clear temporary variables used for webhook communication"""
-    global TEMP_CUSTOM_MESSAGE, TEMP_CUSTOM_VOICE
-    TEMP_CUSTOM_MESSAGE = None
-    TEMP_CUSTOM_VOICE = None
+"""
+VoIP Calling Module
+Handles VoIP calls to Communication Service users using Azure Communication Services
+"""
+
+import os
+import asyncio
+import random
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from cachetools import TTLCache
+from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.communication.callautomation import CallAutomationClient, TextSource, FileSource
+from azure.communication.callautomation.aio import CallAutomationClient as AsyncCallAutomationClient
+from azure.communication.identity import CommunicationUserIdentifier
+
+# Configuration
+ACS_CONNECTION_STRING = os.environ.get("ACS_CONNECTION_STRING", "")
+COGNITIVE_SERVICES_ENDPOINT = os.environ.get("COGNITIVE_SERVICES_ENDPOINT", "").rstrip('/') if os.environ.get("COGNITIVE_SERVICES_ENDPOINT") else ""
+TARGET_USER_ID = os.environ.get("TARGET_USER_ID", "")
+CALLBACK_URL_BASE = os.environ.get("CALLBACK_URL_BASE", "")
+WELCOME_MESSAGE = os.environ.get("WELCOME_MESSAGE", 
+    "Hello! This is your Azure Communication Services assistant. The call connection is working perfectly. "
+    "You can now hear automated messages through Azure's text-to-speech service. "
+    "Thank you for testing the voice integration.")
+TTS_VOICE = os.environ.get("TTS_VOICE", "en-US-JennyNeural")
+# Optional pre-rendered audio (e.g. a WAV in Blob Storage) for WELCOME_MESSAGE spoken in TTS_VOICE
+WELCOME_AUDIO_URL = os.environ.get("WELCOME_AUDIO_URL", "")
+
+# Neural voices known to work with the call TTS; TTS_VOICE is checked against these once
+_VALID_VOICES = frozenset({
+    "en-US-JennyNeural", "en-US-AriaNeural", "en-US-DavisNeural",
+    "en-US-AmberNeural", "en-US-GuyNeural"
+})
+_VALID_VOICES_STR = ", ".join(sorted(_VALID_VOICES))
+if TTS_VOICE not in _VALID_VOICES:
+    logging.warning("TTS_VOICE '%s' is not a known voice; recommended voices: %s", TTS_VOICE, _VALID_VOICES_STR)
+
+
+def _parse_conn_str(conn_str: str) -> Tuple[str, str]:
+    """Split an ACS connection string into (endpoint, access_key)"""
+    parts = dict(
+        segment.split('=', 1) for segment in conn_str.split(';') if '=' in segment
+    )
+    parts = {key.lower(): value for key, value in parts.items()}
+    return parts.get('endpoint', ''), parts.get('accesskey', '')
+
+
+# ACS endpoint and access key, parsed once for all clients built by this module
+_ACS_ENDPOINT, _ACS_KEY = _parse_conn_str(ACS_CONNECTION_STRING)
+
+# Webhook callback URLs, resolved once instead of formatted per call. In Azure the
+# site hostname is used when CALLBACK_URL_BASE is not set; locally the Functions host.
+_CALLBACK_HOST = CALLBACK_URL_BASE or os.environ.get("WEBSITE_HOSTNAME", "")
+_PROD_CB = f"https://{_CALLBACK_HOST}/api/CallWebhook"
+_LOCAL_CB = "http://localhost:7071/api/CallWebhook"
+_DEFAULT_CALLBACK_URL = _PROD_CB if _CALLBACK_HOST else _LOCAL_CB
+# Placeholder for test calls that drive playback themselves and ignore call events
+_DUMMY_CALLBACK_URL = "http://localhost:7071/api/DummyWebhook"
+
+# Default TTS source, reused whenever no custom message/voice is requested
+_DEFAULT_TEXT_SOURCE = TextSource(text=WELCOME_MESSAGE, voice_name=TTS_VOICE)
+
+# Pre-rendered audio URLs keyed by (message, voice); a hit plays the file and skips TTS synthesis
+TTS_CACHE: Dict[Tuple[str, str], str] = {}
+if WELCOME_AUDIO_URL:
+    TTS_CACHE[(WELCOME_MESSAGE, TTS_VOICE)] = WELCOME_AUDIO_URL
+
+# Per-call (message, voice) for webhook-driven TTS, keyed by call_connection_id
+CALL_CTX: TTLCache = TTLCache(maxsize=10_000, ttl=600)
+_CALL_CTX_LOCK = threading.Lock()
+
+# Calls whose greeting has been started; ACS delivers at least once, so a redelivered
+# CallConnected must not play the greeting again
+_PLAYED_CALLS: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_PLAYED_CALLS_LOCK = threading.Lock()
+
+# Delayed playback retry policy: capped exponential backoff with jitter. 400 is retried
+# because ACS rejects media actions with it while the call is still connecting.
+_PLAY_MAX_ATTEMPTS = 5
+_PLAY_RETRY_BASE_DELAY = 1.0
+_PLAY_RETRY_MAX_DELAY = 10.0
+_NON_RETRYABLE_STATUS_CODES = frozenset({401, 403, 404})
+# Error message fragments (lowercase) that mean the call or TTS setup is gone for good,
+# whatever status code ACS reported them with
+_TERMINAL_ERROR_MARKERS = ("bad request to cognitive services", "call not found", "callnotfound")
+
+# Worker pool running each CallConnected playback off the request path, concurrently across calls
+_WEBHOOK_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='voip-webhook')
+
+# Identifier for the default VoIP target, built once
+_TARGET_USER = CommunicationUserIdentifier(TARGET_USER_ID) if TARGET_USER_ID else None
+
+
+# Keep-alive session for the synchronous ACS client, with a pool large enough for
+# every webhook worker thread to hold its own connection to the ACS endpoint
+_ACS_SESSION = requests.Session()
+_ACS_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_acs_client() -> CallAutomationClient:
+    """Return the shared synchronous CallAutomationClient (one HTTP pipeline per worker)"""
+    return CallAutomationClient(
+        _ACS_ENDPOINT,
+        AzureKeyCredential(_ACS_KEY),
+        transport=RequestsTransport(session=_ACS_SESSION, session_owner=False)
+    )
+
+
+# Shared async ACS client (one connection pool per worker) and strong
+# references to fire-and-forget tasks so they are not garbage collected
+_async_acs_client: Optional[AsyncCallAutomationClient] = None
+_BACKGROUND_TASKS: set = set()
+
+# Delayed playbacks waiting to run, keyed by call_connection_id. New test calls are
+# refused once this many are pending instead of piling up sleeping tasks.
+MAX_PENDING_DELAYED_PLAYS = 256
+_PENDING_PLAYS: Dict[str, asyncio.Task] = {}
+
+# Longest delay a caller may ask for before a test call's message plays, so a pending
+# playback always drains within a minute and cannot hold a slot for the worker's lifetime
+MAX_PLAY_DELAY_SECONDS = 60
+
+
+def _get_async_acs_client() -> AsyncCallAutomationClient:
+    """
+    Return the shared async CallAutomationClient, creating it on first use.
+    Construction does no I/O, so the check-and-set cannot interleave with
+    another coroutine on the worker's event loop and needs no lock.
+    """
+    global _async_acs_client
+    if _async_acs_client is None:
+        _async_acs_client = AsyncCallAutomationClient(_ACS_ENDPOINT, AzureKeyCredential(_ACS_KEY))
+    return _async_acs_client
+
+
+def _on_background_done(task: asyncio.Task) -> None:
+    """Drop the finished task's strong reference and log anything it raised"""
+    _BACKGROUND_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.error('Background task %s failed: %s', task.get_name(), task.exception())
+
+
+def _schedule_background(coro, name: Optional[str] = None) -> asyncio.Task:
+    """Run a coroutine in the background on the current event loop"""
+    task = asyncio.get_running_loop().create_task(coro, name=name)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_on_background_done)
+    return task
+
+
+@functools.lru_cache(maxsize=1024)
+def _text_source(text: str, voice: str) -> TextSource:
+    """Return a shared TextSource for a (text, voice) pair; prompts repeat across calls"""
+    return TextSource(text=text, voice_name=voice)
+
+
+def _get_play_source(message: str, voice: str):
+    """Return a FileSource for pre-rendered audio if cached, otherwise a TextSource for TTS"""
+    cached_url = TTS_CACHE.get((message, voice))
+    if cached_url:
+        return FileSource(url=cached_url)
+    if message == WELCOME_MESSAGE and voice == TTS_VOICE:
+        return _DEFAULT_TEXT_SOURCE
+    return _text_source(message, voice)
+
+
+@functools.lru_cache(maxsize=1)
+def validate_voip_configuration() -> tuple[bool, str]:
+    """
+    Validate that all required VoIP configuration is present
+    Settings are read once at import, so the result is computed once per worker
+    Returns: (is_valid, error_message)
+    """
+    if not ACS_CONNECTION_STRING:
+        return False, "ACS_CONNECTION_STRING is required for VoIP calls"
+    
+    if not COGNITIVE_SERVICES_ENDPOINT:
+        return False, "COGNITIVE_SERVICES_ENDPOINT is required for TTS functionality"
+    
+    return True, ""
+
+
+def validate_user_id(user_id: str) -> tuple[bool, str]:
+    """
+    Validate user ID format for VoIP calls
+    Returns: (is_valid, error_message)
+    """
+    if not user_id:
+        return False, "User ID is required"
+    
+    # Basic validation for ACS user ID format
+    if not user_id.startswith('8:acs:'):
+        return False, "User ID should be in ACS format (starting with '8:acs:')"
+    
+    return True, ""
+
+
+def _validate_voip_call(target_user_id: str) -> Optional[Dict[str, Any]]:
+    """Return the error result for a VoIP call that cannot be placed, or None if it can"""
+    is_valid, error_msg = validate_voip_configuration()
+    if not is_valid:
+        return {
+            "success": False,
+            "error": f"Configuration error: {error_msg}",
+            "call_type": "VoIP"
+        }
+    
+    is_valid, error_msg = validate_user_id(target_user_id)
+    if not is_valid:
+        return {
+            "success": False,
+            "error": f"User ID validation error: {error_msg}",
+            "call_type": "VoIP"
+        }
+    
+    return None
+
+
+def _voip_call_created(call_result, target_user_id: str, message_to_play: str, voice_to_use: str,
+                       callback_url: str) -> Dict[str, Any]:
+    """Store the call's TTS settings for the webhook and build the success result"""
+    call_connection_id = getattr(call_result, 'call_connection_id', None) or 'Unknown'
+    
+    logging.info("VoIP call created successfully. Call ID: %s", call_connection_id)
+    
+    # Store custom settings for the webhook, keyed by this call
+    with _CALL_CTX_LOCK:
+        CALL_CTX[call_connection_id] = (message_to_play, voice_to_use)
+    
+    return {
+        "success": True,
+        "call_id": call_connection_id,
+        "user_id": target_user_id,
+        "message": message_to_play,
+        "voice": voice_to_use,
+        "webhook_url": callback_url,
+        "call_type": "VoIP"
+    }
+
+
+def _voip_call_failed(target_user_id: str, error: Exception) -> Dict[str, Any]:
+    logging.error("Failed to create VoIP call: %s", error)
+    return {
+        "success": False,
+        "error": f"Failed to create VoIP call: {str(error)}",
+        "user_id": target_user_id,
+        "call_type": "VoIP"
+    }
+
+
+def create_voip_call(
+    target_user_id: str,
+    custom_message: Optional[str] = None,
+    custom_voice: Optional[str] = None,
+    callback_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Create a VoIP call to a Communication Service user
+    Blocking; async callers should use create_voip_call_async
+    
+    Args:
+        target_user_id: Target user ID in ACS format
+        custom_message: Custom TTS message to play
+        custom_voice: Custom voice for TTS
+        callback_url: Callback URL for webhook events
+    
+    Returns:
+        Dict with call result information
+    """
+    logging.info("Creating VoIP call to: %s", target_user_id)
+    
+    error_result = _validate_voip_call(target_user_id)
+    if error_result:
+        return error_result
+    
+    try:
+        target_user = _TARGET_USER if target_user_id == TARGET_USER_ID else CommunicationUserIdentifier(target_user_id)
+        callback_url = callback_url or _DEFAULT_CALLBACK_URL
+        logging.info("Using callback URL: %s", callback_url)
+        
+        # Create the VoIP call with the shared ACS client
+        call_result = _get_acs_client().create_call(
+            target_participant=target_user,
+            callback_url=callback_url,
+            cognitive_services_endpoint=COGNITIVE_SERVICES_ENDPOINT
+        )
+        
+        return _voip_call_created(call_result, target_user_id, custom_message or WELCOME_MESSAGE,
+                                  custom_voice or TTS_VOICE, callback_url)
+        
+    except Exception as e:
+        return _voip_call_failed(target_user_id, e)
+
+
+async def create_voip_call_async(
+    target_user_id: str,
+    custom_message: Optional[str] = None,
+    custom_voice: Optional[str] = None,
+    callback_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Create a VoIP call to a Communication Service user without blocking the event loop
+    Same arguments and result as create_voip_call, using the shared async ACS client
+    """
+    logging.info("Creating VoIP call to: %s", target_user_id)
+    
+    error_result = _validate_voip_call(target_user_id)
+    if error_result:
+        return error_result
+    
+    try:
+        target_user = _TARGET_USER if target_user_id == TARGET_USER_ID else CommunicationUserIdentifier(target_user_id)
+        callback_url = callback_url or _DEFAULT_CALLBACK_URL
+        logging.info("Using callback URL: %s", callback_url)
+        
+        # Create the VoIP call with the shared async ACS client
+        call_result = await _get_async_acs_client().create_call(
+            target_participant=target_user,
+            callback_url=callback_url,
+            cognitive_services_endpoint=COGNITIVE_SERVICES_ENDPOINT
+        )
+        
+        return _voip_call_created(call_result, target_user_id, custom_message or WELCOME_MESSAGE,
+                                  custom_voice or TTS_VOICE, callback_url)
+        
+    except Exception as e:
+        return _voip_call_failed(target_user_id, e)
+
+
+def _claim_greeting(call_connection_id: str) -> bool:
+    """Mark the call's greeting as started; False if it already was"""
+    with _PLAYED_CALLS_LOCK:
+        if call_connection_id in _PLAYED_CALLS:
+            return False
+        _PLAYED_CALLS[call_connection_id] = True
+        return True
+
+
+def _release_greeting(call_connection_id: str):
+    """Forget a greeting that failed to start so a redelivered event can retry it"""
+    with _PLAYED_CALLS_LOCK:
+        _PLAYED_CALLS.pop(call_connection_id, None)
+
+
+def _on_call_connected(call_connection_id: str, data: Dict[str, Any]) -> bool:
+    """Play the stored (or default) TTS message once the call is connected"""
+    if not _claim_greeting(call_connection_id):
+        logging.info("Greeting already started for VoIP call %s, skipping duplicate CallConnected", call_connection_id)
+        return True
+    
+    logging.info("VoIP call connected! Playing TTS message...")
+    
+    try:
+        # Get call connection from the shared ACS client
+        call_connection = _get_acs_client().get_call_connection(call_connection_id)
+        
+        # Use the custom message and voice stored for this call, or defaults
+        with _CALL_CTX_LOCK:
+            message_to_play, voice_to_use = CALL_CTX.get(call_connection_id, (WELCOME_MESSAGE, TTS_VOICE))
+        
+        # Create the play source (pre-rendered audio when available)
+        text_source = _get_play_source(message_to_play, voice_to_use)
+        
+        logging.info("Playing message: '%.50s', Voice: %s", message_to_play, voice_to_use)
+        
+        # Play the message to all participants
+        play_result = call_connection.play_media_to_all(
+            play_source=text_source
+        )
+        
+        operation_id = getattr(play_result, 'operation_id', 'Unknown')
+        logging.info("TTS playback initiated. Operation ID: %s", operation_id)
+        
+        # Clear stored settings after use
+        with _CALL_CTX_LOCK:
+            CALL_CTX.pop(call_connection_id, None)
+        
+    except Exception as play_error:
+        logging.error("Error playing TTS: %s", play_error)
+        _release_greeting(call_connection_id)
+        return False
+    
+    return True
+
+
+def _on_call_disconnected(call_connection_id: str, data: Dict[str, Any]) -> bool:
+    disconnect_reason = data.get('callConnectionId', 'Unknown reason')
+    logging.info("VoIP call disconnected. Call ID: %s, Reason: %s", call_connection_id, disconnect_reason)
+    
+    # Clear stored settings on disconnect
+    with _CALL_CTX_LOCK:
+        CALL_CTX.pop(call_connection_id, None)
+    return True
+
+
+def _on_play_completed(call_connection_id: str, data: Dict[str, Any]) -> bool:
+    logging.info("TTS playback completed for call %s", call_connection_id)
+    return True
+
+
+def _on_play_failed(call_connection_id: str, data: Dict[str, Any]) -> bool:
+    play_error = data.get('resultInformation', {}).get('message', 'Unknown error')
+    logging.error("TTS playback failed for call %s: %s", call_connection_id, play_error)
+    return True
+
+
+def _on_call_established(call_connection_id: str, data: Dict[str, Any]) -> bool:
+    logging.info("VoIP call established for call %s", call_connection_id)
+    return True
+
+
+def _on_participants_updated(call_connection_id: str, data: Dict[str, Any]) -> bool:
+    participants = data.get('participants', [])
+    logging.info("Participants updated for call %s, count: %d", call_connection_id, len(participants))
+    return True
+
+
+# Handler per ACS event type; each takes (call_connection_id, event data) and returns success
+_VOIP_EVENT_HANDLERS = {
+    'Microsoft.Communication.CallConnected': _on_call_connected,
+    'Microsoft.Communication.CallDisconnected': _on_call_disconnected,
+    'Microsoft.Communication.PlayCompleted': _on_play_completed,
+    'Microsoft.Communication.PlayFailed': _on_play_failed,
+    'Microsoft.Communication.CallEstablished': _on_call_established,
+    'Microsoft.Communication.ParticipantsUpdated': _on_participants_updated,
+}
+
+
+def handle_voip_webhook_event(event: Dict[str, Any]) -> bool:
+    """
+    Handle a single VoIP webhook event
+    
+    Args:
+        event: Event data from Azure Communication Services
+    
+    Returns:
+        True if event was handled successfully, False otherwise
+    """
+    try:
+        event_type = event.get('type', 'Unknown')
+        data = event.get('data', {})
+        call_connection_id = data.get('callConnectionId', 'Unknown')
+        
+        logging.info("Processing VoIP event: %s, Call ID: %s", event_type, call_connection_id)
+        
+        handler = _VOIP_EVENT_HANDLERS.get(event_type)
+        if handler is None:
+            logging.info("Unhandled VoIP event type: %s", event_type)
+            return True
+        return handler(call_connection_id, data)
+        
+    except Exception as e:
+        logging.error("Error handling VoIP webhook event: %s", e)
+        return False
+
+
+def _log_connected_event_result(future):
+    """Done-callback for a background CallConnected playback: log a failure or crash"""
+    try:
+        if not future.result():
+            logging.warning("Failed to handle VoIP event: Microsoft.Communication.CallConnected")
+    except Exception as e:
+        logging.error("Error handling VoIP connected event: %s", e)
+
+
+def handle_voip_webhook_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Handle a batch of VoIP webhook events
+    CallConnected events need ACS round-trips, so each is submitted to the webhook executor
+    on its own and the webhook can be acknowledged at once, without one call's playback
+    waiting on another's; the remaining events only log and are handled inline
+    
+    Args:
+        events: Events from one webhook delivery
+    
+    Returns:
+        List of inline-handled events that could not be handled
+    """
+    failed = []
+    for event in events:
+        if event.get('type') == 'Microsoft.Communication.CallConnected':
+            future = _WEBHOOK_EXECUTOR.submit(handle_voip_webhook_event, event)
+            future.add_done_callback(_log_connected_event_result)
+        elif not handle_voip_webhook_event(event):
+            failed.append(event)
+    return failed
+
+
+async def create_test_voip_call_no_webhook(
+    target_user_id: Optional[str] = None,
+    custom_message: Optional[str] = None,
+    custom_voice: Optional[str] = None,
+    delay_seconds: int = 3
+) -> Dict[str, Any]:
+    """
+    Create a VoIP call without webhook for testing purposes
+    Uses a background asyncio task to play TTS after delay
+    
+    Args:
+        target_user_id: Target user ID (uses default if not provided)
+        custom_message: Custom TTS message
+        custom_voice: Custom voice for TTS
+        delay_seconds: Delay before playing message
+    
+    Returns:
+        Dict with call result information
+    """
+    logging.info('Creating test VoIP call without webhook dependencies')
+    
+    # Use provided user ID, message and voice or defaults
+    user_id = target_user_id or TARGET_USER_ID
+    message_to_play = custom_message or WELCOME_MESSAGE
+    voice_to_use = custom_voice or TTS_VOICE
+    
+    # Validate configuration
+    is_valid, error_msg = validate_voip_configuration()
+    if not is_valid:
+        return {
+            "success": False,
+            "error": f"Configuration error: {error_msg}",
+            "call_type": "VoIP-Test"
+        }
+    
+    if not user_id:
+        return {
+            "success": False,
+            "error": "TARGET_USER_ID not configured and no user_id provided",
+            "call_type": "VoIP-Test"
+        }
+    
+    # Shed load before placing a call whose message could not be scheduled
+    if len(_PENDING_PLAYS) >= MAX_PENDING_DELAYED_PLAYS:
+        logging.warning("Refusing test VoIP call: %s delayed playbacks pending", len(_PENDING_PLAYS))
+        return {
+            "success": False,
+            "error": "Too many delayed playbacks pending, try again later",
+            "retryable": True,
+            "call_type": "VoIP-Test"
+        }
+    
+    try:
+        # Shared async ACS client
+        client = _get_async_acs_client()
+        target_user = _TARGET_USER if user_id == TARGET_USER_ID else CommunicationUserIdentifier(user_id)
+        
+        # Create the call (dummy callback URL since we're not using webhooks)
+        call_result = await client.create_call(
+            target_participant=target_user,
+            callback_url=_DUMMY_CALLBACK_URL,
+            cognitive_services_endpoint=COGNITIVE_SERVICES_ENDPOINT
+        )
+        
+        call_connection_id = getattr(call_result, 'call_connection_id', None) or 'Unknown'
+        
+        logging.info("Test VoIP call created. Call ID: %s", call_connection_id)
+        
+        # Coroutine to play TTS after delay, retrying with exponential backoff.
+        # It only awaits timers and ACS I/O, so no worker thread is held while it waits.
+        async def play_tts_delayed():
+            max_retries = _PLAY_MAX_ATTEMPTS
+            try:
+                await asyncio.sleep(delay_seconds)
+                
+                # Get call connection
+                call_connection = client.get_call_connection(call_connection_id)
+                
+                # Create the play source (pre-rendered audio when available)
+                text_source = _get_play_source(message_to_play, voice_to_use)
+                
+                logging.info("Playing delayed TTS message: '%.50s'", message_to_play)
+                
+                state_logged = False
+                for attempt in range(max_retries):
+                    try:
+                        # Play the message
+                        await call_connection.play_media_to_all(
+                            play_source=text_source
+                        )
+                        logging.info("Delayed TTS playback initiated successfully (attempt %s)", attempt + 1)
+                        return
+                    except Exception as attempt_error:
+                        error_msg = str(attempt_error)
+                        logging.warning("TTS attempt %s/%s failed: %s", attempt + 1, max_retries, error_msg)
+                        
+                        # Give up at once on errors another attempt cannot fix
+                        if isinstance(attempt_error, HttpResponseError) and attempt_error.status_code in _NON_RETRYABLE_STATUS_CODES:
+                            logging.error("Delayed TTS playback not retried (HTTP %s)", attempt_error.status_code)
+                            return
+                        error_lower = error_msg.lower()
+                        if any(marker in error_lower for marker in _TERMINAL_ERROR_MARKERS):
+                            logging.error("Delayed TTS playback not retried: %s", error_msg)
+                            return
+                        
+                        # Querying call state costs an extra ACS round-trip, so only do it when
+                        # debugging, and only on the first failure of this play
+                        if not state_logged and logging.getLogger().isEnabledFor(logging.DEBUG):
+                            state_logged = True
+                            try:
+                                call_properties = await call_connection.get_call_properties()
+                                logging.debug("Call state: %s", getattr(call_properties, 'call_connection_state', 'Unknown'))
+                            except Exception as state_error:
+                                logging.debug("Could not get call properties: %s", state_error)
+                        
+                        if attempt < max_retries - 1:
+                            backoff = min(_PLAY_RETRY_MAX_DELAY, _PLAY_RETRY_BASE_DELAY * 2 ** attempt)
+                            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+                
+                logging.error("Delayed TTS playback failed after %s attempts", max_retries)
+                
+            except Exception as e:
+                logging.error("Error in delayed TTS playback: %s", e)
+        
+        # Schedule the delayed TTS on the running event loop, at most once per call
+        if call_connection_id not in _PENDING_PLAYS:
+            task = _schedule_background(play_tts_delayed(), name=f'voip-delayed-play-{call_connection_id}')
+            _PENDING_PLAYS[call_connection_id] = task
+            task.add_done_callback(lambda _task: _PENDING_PLAYS.pop(call_connection_id, None))
+        
+        return {
+            "success": True,
+            "call_id": call_connection_id,
+            "user_id": user_id,
+            "message": message_to_play,
+            "voice": voice_to_use,
+            "delay": delay_seconds,
+            "call_type": "VoIP-Test",
+            "note": "Using delayed TTS without webhook"
+        }
+        
+    except Exception as e:
+        logging.error("Failed to create test VoIP call: %s", e)
+        return {
+            "success": False,
+            "error": f"Failed to create test VoIP call: {str(e)}",
+            "user_id": user_id,
+            "call_type": "VoIP-Test"
+        }
+
+
+def clear_temp_variables():
+    """Clear per-call settings stored for webhook communication"""
+    with _CALL_CTX_LOCK:
+        CALL_CTX.clear()
@@ -90,13 +90,12 @@ class PhaseBTester:
         print("-" * 40)
         
         try:
-            # Use the async list_patients method and convert to PatientRecord objects
+            # Stream patients with the async iter_patients method and convert to PatientRecord objects
             import asyncio
             
             async def get_patients():
-                patient_dicts = await cosmos_manager.list_patients()
                 patients = []
-                for patient_dict in patient_dicts:
+                async for patient_dict in cosmos_manager.iter_patients(limit=100):
                     try:
                         patient = PatientRecord.from_dict(patient_dict)
                         patients.append(patient)